@@ -0,0 +1,46 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from src.batch_runner import run_batch
+from src.result_cache import ResultCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs seeded replicas of a scenario without viewer "
+                                                 "and aggregates the results.")
+    parser.add_argument("parameters", type=Path, help="Path to parameters file")
+    parser.add_argument("--replicas", type=int, default=100, help="Number of replicas")
+    parser.add_argument("--processes", type=int, default=None, help="Number of worker processes, default all cores")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first replica")
+    parser.add_argument("--output", type=Path, default=None, help="Optional JSON file for the results")
+    parser.add_argument("--cache", type=Path, default=None,
+                        help="Result cache directory, replicas that are in the cache are not run")
+    parser.add_argument("--cache-size", type=float, default=1024, help="Size limit of the result cache (MB)")
+    args = parser.parse_args()
+
+    if not args.parameters.exists():
+        print(f"Invalid file path provided: {args.parameters}, Please provide path to parameters file")
+        sys.exit(1)
+    with open(str(args.parameters)) as file_obj:
+        json_data = json.load(file_obj)
+
+    cache = ResultCache(args.cache, int(args.cache_size * 2 ** 20)) if args.cache else None
+    start = time.perf_counter()
+    results = run_batch(json_data, args.replicas, seed=args.seed, processes=args.processes, cache=cache)
+    elapsed = time.perf_counter() - start
+
+    results.results()
+    print(f"Ran {args.replicas} replicas in {elapsed:.1f} s ({args.replicas / elapsed:.1f} replicas/s)")
+
+    if args.output:
+        with open(str(args.output), 'w') as file_obj:
+            json.dump({"statistics": results.statistics(), "replicas": results.summaries}, file_obj, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    main()
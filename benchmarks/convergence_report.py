@@ -0,0 +1,93 @@
+"""
+Convergence report of the simulation statistics over the frame rate, with and without swept collisions and seeker
+substeps.
+For every mode and frame rate a batch of seeded replicas is run, the mean intercept ratio and damage
+received are compared with those of the highest frame rate of the same mode. The difference is given in standard
+errors as well, a statistic has converged when the difference is within a few standard errors.
+The missiles of a seed depend on the frame rate, launches are grouped per frame, so the comparison is statistical.
+Substeps only refine the paths of seekers. The drift left at the lowest frame rates mostly comes from defences that
+reload and fire on frame boundaries, which neither swept collisions nor substeps change.
+Usage: python benchmarks/convergence_report.py --frame-rates 240,60,30,15,5 --replicas 200 --output convergence.json
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.batch_runner import run_batch  # noqa: E402
+
+MODES = {"step length": {"swept collisions": False}, "swept": {"swept collisions": True},
+         "swept, seeker substeps": {"swept collisions": True, "max substeps": 16}}
+STATISTICS = ("intercept ratio", "damage received")
+
+
+def run_case(base: dict, settings: dict, frame_rate: float, replicas: int, seed: int, processes: int) -> dict:
+    """
+    Runs the replicas of one mode and frame rate.
+    :return: Mean and standard error of the statistics and the wall time per replica
+    """
+    scenario = copy.deepcopy(base)
+    scenario["simulation settings"].update({"frame rate(hz)": frame_rate, **settings})
+    start = time.perf_counter()
+    batch = run_batch(scenario, replicas, seed, processes)
+    elapsed = time.perf_counter() - start
+    result = {"frame rate": frame_rate, "seconds per replica": elapsed / replicas}
+    for name in STATISTICS:
+        values = batch.values(name)
+        result[name] = {"mean": float(np.mean(values)),
+                        "standard error": float(np.std(values, ddof=1) / np.sqrt(len(values)))
+                        if len(values) > 1 else 0.}
+    return result
+
+
+def print_mode(mode: str, cases: list):
+    reference = cases[0]
+    print(f"\n{mode}, against {reference['frame rate']:g} hz")
+    print(f"{'hz':>7} {'s/replica':>10}" + "".join(f" {name:>28}" for name in STATISTICS))
+    for case in cases:
+        columns = []
+        for name in STATISTICS:
+            difference = case[name]["mean"] - reference[name]["mean"]
+            error = np.hypot(case[name]["standard error"], reference[name]["standard error"])
+            deviation = difference / error if error > 0 else 0.
+            columns.append(f"{case[name]['mean']:8.3f} {difference:+8.3f} ({deviation:+5.1f} se)")
+        print(f"{case['frame rate']:7g} {case['seconds per replica']:10.3f}" +
+              "".join(f" {column:>28}" for column in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convergence of the statistics over the frame rate.")
+    parser.add_argument("--parameters", type=Path, default=Path(__file__).parent.parent / "parameters.json",
+                        help="Parameter file")
+    parser.add_argument("--frame-rates", default="240,120,60,30,15,10,5",
+                        help="Comma separated frame rates (hz), the highest is the reference")
+    parser.add_argument("--replicas", type=int, default=100, help="Seeded replicas per frame rate")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first replica")
+    parser.add_argument("--processes", type=int, default=None, help="Number of worker processes, default all cores")
+    parser.add_argument("--output", type=Path, default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    with open(str(args.parameters)) as file_obj:
+        base = json.load(file_obj)
+    frame_rates = sorted((float(rate) for rate in args.frame_rates.split(",")), reverse=True)
+
+    results = {}
+    for mode, settings in MODES.items():
+        results[mode] = [run_case(base, settings, frame_rate, args.replicas, args.seed, args.processes)
+                         for frame_rate in frame_rates]
+        print_mode(mode, results[mode])
+
+    if args.output:
+        with open(str(args.output), 'w') as file_obj:
+            json.dump({"replicas": args.replicas, "seed": args.seed, "modes": results}, file_obj, indent=2)
+
+
+if __name__ == "__main__":
+    main()
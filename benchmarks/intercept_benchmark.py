@@ -0,0 +1,89 @@
+"""
+Benchmark of the closed-form intercept solver against the previous np.roots based implementation.
+Usage: python benchmarks/intercept_benchmark.py [number of pairs]
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.util import Vector, intercept, intercept_many  # noqa: E402
+
+
+def legacy_intercept(target_p: Vector, target_v: Vector, intercept_p: Vector, intercept_speed: float) -> Vector:
+    """The np.roots based util.intercept, as it was before the closed-form solver"""
+    p = intercept_p - target_p
+    firing_solution = Vector()
+    firing_solution.y = intercept_speed
+    if p.y != 0.0:
+        Q = target_v.x - p.x/p.y * target_v.y
+        A = 1 + np.square(p.x/p.y)
+        B = 2 * Q * p.y/p.x
+        C = np.square(Q) - np.square(intercept_speed)
+        roots = np.roots([A, B, C])
+        roots = [root for root in roots if root > 0 and np.isreal(root)]
+
+        if len(roots) > 0:
+            v_y = roots[0]
+            v_x = Q + p.x/p.y * v_y
+            firing_solution.x = v_x
+            firing_solution.y = v_y
+    return firing_solution
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = np.random.default_rng(0)
+    # Missiles descending on the defended area, defences on the ground
+    target_p = np.column_stack((rng.uniform(-800, 800, n), rng.uniform(10, 800, n)))
+    target_v = np.column_stack((rng.uniform(-50, 50, n), rng.uniform(-100, -20, n)))
+    intercept_p = np.column_stack((rng.uniform(-200, 200, n), np.zeros(n)))
+    speed = rng.uniform(50, 120, n)
+
+    pairs = [(Vector(*target_p[i]), Vector(*target_v[i]), Vector(*intercept_p[i]), speed[i]) for i in range(n)]
+
+    def run_legacy():
+        for pair in pairs:
+            legacy_intercept(*pair)
+
+    def run_scalar():
+        for pair in pairs:
+            intercept(*pair)
+
+    def run_batched():
+        intercept_many(target_p, target_v, intercept_p, speed)
+
+    repeats = 3
+    results = [("legacy np.roots intercept", run_legacy, 1),
+               ("closed-form intercept, one pair per call", run_scalar, 1),
+               ("closed-form intercept_many, all pairs in one call", run_batched, 10)]
+    print(f"Solving {n} (shooter, target) pairs")
+    baseline = None
+    for name, function, number in results:
+        seconds = min(timeit.repeat(function, number=number, repeat=repeats)) / number
+        per_pair = seconds / n * 1e6
+        baseline = baseline or per_pair
+        print(f"{name:<52} {per_pair:9.3f} us/pair  ({baseline / per_pair:7.1f}x)")
+
+    velocities, feasible, time = intercept_many(target_p, target_v, intercept_p, speed)
+    miss = np.linalg.norm(target_p + target_v * time[:, np.newaxis] - intercept_p - velocities * time[:, np.newaxis],
+                          axis=1)
+    legacy_miss = []
+    for target_p_, target_v_, intercept_p_, speed_ in pairs:
+        v = legacy_intercept(target_p_, target_v_, intercept_p_, speed_)
+        # closest approach of projectile and target
+        d = np.array([target_p_.x - intercept_p_.x, target_p_.y - intercept_p_.y])
+        dv = np.array([target_v_.x - v.x, target_v_.y - v.y])
+        t = max(0., -np.dot(d, dv) / np.dot(dv, dv))
+        legacy_miss.append(np.linalg.norm(d + dv * t))
+    legacy_miss = np.array(legacy_miss)
+    print(f"\nFeasible pairs: {feasible.mean() * 100:.1f}%")
+    print(f"Closed-form solutions, largest miss distance: {miss[feasible].max():.2e} m")
+    print(f"Legacy solutions missing by more than 1 m: {(legacy_miss[feasible] > 1.).mean() * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
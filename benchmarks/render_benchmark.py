@@ -0,0 +1,171 @@
+"""
+Microbenchmark of the per-frame render cost of Viewer.draw_frame, against the previous implementation that drew
+the background for every frame and flipped the image, of the frame throughput with the "render threads"
+viewer setting and of the "pipelined rendering" viewer setting against its render and encode stages.
+Usage: python benchmarks/render_benchmark.py
+"""
+import os
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.defences import BulletDefence, BulletProjectile  # noqa: E402
+from src.frame_state import FrameState  # noqa: E402
+from src.missiles import DefaultMissile  # noqa: E402
+from src.util import Vector  # noqa: E402
+from src.viewer import FrameWriter, Viewer  # noqa: E402
+from src.viewer_settings import ViewerSettings  # noqa: E402
+
+
+def legacy_circle(image_obj, p: Vector, image_offset: Vector, rgb, scale: float):
+    x = int(p.x + image_offset.x)
+    y = int(p.y + image_offset.y)
+    cv2.circle(image_obj, (x, y), scale, rgb, -1)
+
+
+def legacy_square(image_obj, p: Vector, image_offset: Vector, rgb, scale: float):
+    x = int(p.x + image_offset.x - scale/2)
+    y = int(p.y + image_offset.y - scale/2)
+    scale = int(scale)
+    cv2.rectangle(image_obj, (x, y), (x+scale, y+scale), rgb, -1)
+
+
+LEGACY_SHAPES = {"Circle": legacy_circle, "Square": legacy_square}
+
+
+def legacy_draw(entity, image_obj, p: Vector, image_offset: Vector):
+    """Drawable.draw with the previous shapes"""
+    LEGACY_SHAPES[entity.shape.__name__](image_obj, p, image_offset, entity.rgb, entity.scale)
+
+
+def legacy_draw_frame(settings: ViewerSettings, frames: list, missiles, projectiles, defences):
+    """Viewer.draw_frame as it was before the cached background"""
+    img = np.zeros((settings.pixels_y, settings.pixels_x, 3), np.uint8)
+    ground_pixel_height = 10
+    cv2.rectangle(img, (0, 0), (settings.pixels_x, settings.pixels_y), color=(135, 206, 250), thickness=-1)
+    cv2.rectangle(img, (0, 0), (settings.pixels_x, ground_pixel_height), color=(52, 140, 49), thickness=-1)
+    offset = Vector(int(settings.pixels_x/2), ground_pixel_height)
+    for entities in (missiles, projectiles, defences):
+        for entity in entities:
+            legacy_draw(entity, img, entity.p, offset)
+    img = cv2.flip(img, 0)
+    frames.append(img)
+
+
+def check_identical(settings: ViewerSettings, missiles, projectiles, defences):
+    legacy_frames = []
+    legacy_draw_frame(settings, legacy_frames, missiles, projectiles, defences)
+    viewer = Viewer(settings)
+    viewer.draw_frame(missiles, projectiles, defences)
+    return np.array_equal(legacy_frames[0], viewer.frames[0])
+
+
+def threaded_throughput(settings: ViewerSettings, states, render_threads: int):
+    """Draws the states with the given number of render threads, returns the frames and the frames per second"""
+    settings.render_threads = render_threads
+    viewer = Viewer(settings)
+    start = timeit.default_timer()
+    for state in states:
+        viewer.draw_state(state)
+    viewer.flush()
+    return viewer.frames, len(states) / (timeit.default_timer() - start)
+
+
+def pipeline_times(settings: ViewerSettings, states, output: str) -> dict:
+    """
+    Wall time of drawing and writing the states to output: the render and encode stages alone, one after the other
+    on the caller's thread, and pipelined.
+    """
+    settings.render_threads = None
+    settings.pipelined_rendering = False
+    viewer = Viewer(settings)
+    start = timeit.default_timer()
+    for state in states:
+        viewer.draw_state(state)
+    images = viewer.frames
+    render = timeit.default_timer() - start
+
+    viewer.plan(1., len(states))
+    writer = FrameWriter(output, 30., settings.pixels_x, settings.pixels_y)
+    start = timeit.default_timer()
+    for image in images:
+        writer.write(image)
+    writer.close()
+    encode = timeit.default_timer() - start
+
+    times = {"render": render, "encode": encode}
+    for name, pipelined in (("serial", False), ("pipelined", True)):
+        settings.pipelined_rendering = pipelined
+        viewer = Viewer(settings)
+        viewer.open_stream(output)
+        viewer.plan(30., len(states))
+        start = timeit.default_timer()
+        for state in states:
+            viewer.draw_state(state)
+        viewer.close_stream()
+        times[name] = timeit.default_timer() - start
+    settings.pipelined_rendering = False
+    return times
+
+
+def main():
+    settings = ViewerSettings.load_from_json({"pixels x": 1024, "pixels y": 728})
+    rng = np.random.default_rng(0)
+    print(f"Per-frame render cost at {settings.pixels_x}x{settings.pixels_y}")
+    for entities in (0, 100, 1000):
+        missiles = [DefaultMissile(Vector(*rng.uniform((-500, 0), (500, 700))), Vector()) for _ in range(entities)]
+        projectiles = [BulletProjectile(Vector(*rng.uniform((-500, 0), (500, 700))), Vector(), 1., None)
+                       for _ in range(entities // 2)]
+        defences = [BulletDefence() for _ in range(5)]
+
+        legacy_frames = []
+        viewer = Viewer(settings)
+
+        def run_legacy():
+            legacy_draw_frame(settings, legacy_frames, missiles, projectiles, defences)
+            legacy_frames.clear()
+
+        def run_current():
+            viewer.draw_frame(missiles, projectiles, defences)
+            viewer.frames.clear()
+
+        number = 50
+        legacy = min(timeit.repeat(run_legacy, number=number, repeat=5)) / number * 1e3
+        current = min(timeit.repeat(run_current, number=number, repeat=5)) / number * 1e3
+        identical = check_identical(settings, missiles, projectiles, defences)
+        print(f"{entities + entities // 2 + len(defences):6d} entities: before {legacy:7.3f} ms/frame, "
+              f"after {current:7.3f} ms/frame ({legacy / current:4.1f}x), identical images: {identical}")
+
+    threads = os.cpu_count() or 1
+    print(f"Frame throughput with {threads} render threads")
+    for entities in (100, 1000):
+        states = [FrameState.from_drawables(
+                  [DefaultMissile(Vector(*rng.uniform((-500, 0), (500, 700))), Vector()) for _ in range(entities)])
+                  for _ in range(40)]
+        serial_frames, serial = threaded_throughput(settings, states, 0)
+        threaded_frames, threaded = threaded_throughput(settings, states, threads)
+        identical = all(np.array_equal(a, b) for a, b in zip(serial_frames, threaded_frames))
+        print(f"{entities:6d} entities: serial {serial:7.1f} frames/s, threaded {threaded:7.1f} frames/s "
+              f"({threaded / serial:4.1f}x), identical images: {identical}")
+
+    print("Pipelined rendering and encoding of 40 frames, wall time")
+    with tempfile.TemporaryDirectory() as directory:
+        for entities in (100, 1000):
+            states = [FrameState.from_drawables(
+                      [DefaultMissile(Vector(*rng.uniform((-500, 0), (500, 700))), Vector()) for _ in range(entities)])
+                      for _ in range(40)]
+            for suffix in (".avi", ".gif"):
+                times = pipeline_times(settings, states, str(Path(directory) / f"pipeline{suffix}"))
+                print(f"{entities:6d} entities {suffix}: render {times['render']:5.2f} s, encode "
+                      f"{times['encode']:5.2f} s, serial {times['serial']:5.2f} s, pipelined "
+                      f"{times['pipelined']:5.2f} s (slowest stage {max(times['render'], times['encode']):5.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
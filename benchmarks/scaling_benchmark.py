@@ -0,0 +1,223 @@
+"""
+Scaling benchmark of the simulation core on synthetic scenarios.
+The scenarios are built from a parameter file by scaling the missile frequency, the number of defences and the frame
+rate. For every scenario the frames per second, the time per Simulation.update phase and the peak memory are reported,
+with the Viewer off and on. Every scenario runs in a fresh process, so the peak memory is that of the scenario alone.
+Results are saved as JSON, a saved result file can be used as baseline of a later run.
+Usage:
+    python benchmarks/scaling_benchmark.py --output baseline.json
+    python benchmarks/scaling_benchmark.py --baseline baseline.json --output results.json
+    python benchmarks/scaling_benchmark.py --settings '{"event driven missiles": true}' --viewer off
+"""
+import argparse
+import copy
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.json_loader import JSONLoader  # noqa: E402
+from src.scenario import load_simulation  # noqa: E402
+from src.simulation import Simulation  # noqa: E402
+from src.viewer import Viewer  # noqa: E402
+
+DEFENCE_KEYS = ("bullet defence", "seeker defence")
+MISSILE_KEYS = ("default missile", "boost missile")
+# Spacing of the additional copies of a defence (m)
+DEFENCE_SPACING = 40.
+
+
+def build_scenario(base: dict, frequency_scale: float, defences: int, frame_rate: float, simulation_time: float,
+                   settings: dict) -> dict:
+    """
+    Builds a parameter file by scaling a base parameter file.
+    :param base: Contents of the base parameter file.
+    :param frequency_scale: Factor the frequency of every missile generator is multiplied with.
+    :param defences: Number of defences. The defences of the base file are repeated at shifted locations.
+    :param frame_rate: Simulation frame rate (hz).
+    :param simulation_time: Simulated time (s).
+    :param settings: Additional simulation settings, e.g. the optional settings.
+    """
+    scenario = {key: copy.deepcopy(node) for key, node in base.items()
+                if not any(defence_key in key for defence_key in DEFENCE_KEYS)}
+    scenario["simulation settings"].update({"frame rate(hz)": frame_rate, "simulation time (s)": simulation_time,
+                                            **settings})
+    for key, node in scenario.items():
+        if any(missile_key in key for missile_key in MISSILE_KEYS):
+            node["frequency (missiles/second)"] *= frequency_scale
+
+    base_defences = [(key, node) for key, node in base.items()
+                     if any(defence_key in key for defence_key in DEFENCE_KEYS)]
+    for i in range(defences):
+        key, node = base_defences[i % len(base_defences)]
+        copy_index = i // len(base_defences)
+        node = copy.deepcopy(node)
+        # Copies alternate left and right of the original
+        node["location (m)"] += DEFENCE_SPACING * ((copy_index + 1) // 2) * (-1) ** copy_index
+        scenario[f"{key} copy {i}"] = node
+    return scenario
+
+
+def run_case(case: dict) -> dict:
+    """
+    Runs one scenario, in its own process.
+    :return: The measurements of the case
+    """
+    scenario = case["scenario"]
+    timings = {phase: 0. for phase in Simulation.PHASES + ("draw",)}
+
+    def timed(function, phase):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            timings[phase] += time.perf_counter() - start
+            return result
+        return wrapper
+
+    viewer = None
+    output_directory = None
+    if case["viewer"]:
+        output_directory = tempfile.TemporaryDirectory()
+        loader = JSONLoader.from_dict(scenario)
+        viewer = Viewer(loader.load_viewer_settings())
+        viewer.open_stream(str(Path(output_directory.name) / "benchmark.avi"))
+        for name in ("draw_frame", "draw_state", "flush"):
+            setattr(viewer, name, timed(getattr(viewer, name), "draw"))
+
+    simulation = load_simulation(JSONLoader.from_dict(scenario), viewer, seed=case["seed"])
+    for phase in Simulation.PHASES:
+        name = f"update_{phase}"
+        setattr(simulation, name, timed(getattr(simulation, name), phase))
+
+    simulated_time = simulation.simulation_settings.simulation_time
+    frames = int(simulated_time * simulation.simulation_settings.frame_rate)
+    start = time.perf_counter()
+    simulation.run(simulated_time, verbose=False)
+    if viewer:
+        viewer.close_stream()
+    wall_time = time.perf_counter() - start
+    if output_directory:
+        output_directory.cleanup()
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_memory = None
+    if resource is not None:
+        peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 ** 2 if sys.platform == 'darwin'
+                                                                             else 1024)
+    return {"name": case["name"],
+            "frequency scale": case["frequency scale"],
+            "defences": case["defences"],
+            "frame rate": case["frame rate"],
+            "viewer": case["viewer"],
+            "frames": frames,
+            "wall time (s)": wall_time,
+            "frames per second": frames / wall_time,
+            "phase time per frame (ms)": {phase: total / frames * 1e3 for phase, total in timings.items()},
+            "peak memory (MB)": peak_memory,
+            "summary": simulation.tracker.summary()}
+
+
+def compare(results: list, baseline: dict, tolerance: float):
+    """Prints the frames per second of the cases against the baseline"""
+    baseline_cases = {case["name"]: case for case in baseline["cases"]}
+    print(f"\nAgainst baseline of {baseline['metadata']['date']}, changes beyond {tolerance:.0%} are marked")
+    for case in results:
+        if case["name"] not in baseline_cases:
+            print(f"{case['name']:>46s}: not in baseline")
+            continue
+        before = baseline_cases[case["name"]]
+        ratio = case["frames per second"] / before["frames per second"]
+        marker = "  faster" if ratio > 1 + tolerance else "  SLOWER" if ratio < 1 - tolerance else ""
+        memory = ""
+        if case["peak memory (MB)"] is not None and before.get("peak memory (MB)") is not None:
+            memory = f", memory {before['peak memory (MB)']:7.1f} -> {case['peak memory (MB)']:7.1f} MB"
+        print(f"{case['name']:>46s}: {before['frames per second']:9.1f} -> {case['frames per second']:9.1f} "
+              f"frames/s ({ratio:5.2f}x){memory}{marker}")
+
+
+def parse_list(text: str, type_):
+    return [type_(value) for value in text.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scaling benchmark of the simulation on synthetic scenarios.")
+    parser.add_argument("--parameters", type=Path, default=Path(__file__).parent.parent / "parameters.json",
+                        help="Base parameter file")
+    parser.add_argument("--frequency-scales", default="1,10,100", help="Missile frequency factors, comma separated")
+    parser.add_argument("--defences", default="7,70", help="Numbers of defences, comma separated")
+    parser.add_argument("--frame-rates", default="30,300", help="Frame rates (hz), comma separated")
+    parser.add_argument("--viewer", choices=("off", "on", "both"), default="both", help="Run with the Viewer")
+    parser.add_argument("--time", type=float, default=10., help="Simulated time per case (s)")
+    parser.add_argument("--settings", type=json.loads, default={},
+                        help="Additional simulation settings as JSON, e.g. '{\"vectorized missiles\": true}'")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of every case")
+    parser.add_argument("--output", type=Path, default=None, help="JSON file for the results")
+    parser.add_argument("--baseline", type=Path, default=None, help="Results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Relative change in frames per second that is reported as faster or slower")
+    args = parser.parse_args()
+
+    with open(str(args.parameters)) as file_obj:
+        base = json.load(file_obj)
+    viewer_modes = {"off": [False], "on": [True], "both": [False, True]}[args.viewer]
+
+    cases = []
+    for frequency_scale, defences, frame_rate, viewer in product(parse_list(args.frequency_scales, float),
+                                                                 parse_list(args.defences, int),
+                                                                 parse_list(args.frame_rates, float),
+                                                                 viewer_modes):
+        cases.append({"name": f"frequency {frequency_scale:g}x, {defences} defences, {frame_rate:g} hz, "
+                              f"viewer {'on' if viewer else 'off'}",
+                      "frequency scale": frequency_scale, "defences": defences, "frame rate": frame_rate,
+                      "viewer": viewer, "seed": args.seed,
+                      "scenario": build_scenario(base, frequency_scale, defences, frame_rate, args.time,
+                                                 args.settings)})
+
+    results = []
+    # A fresh process per case, so the peak memory of a case is not inflated by the cases before it
+    context = multiprocessing.get_context("spawn")
+    print(f"{'case':>46s}  {'frames/s':>9s}  " + "  ".join(f"{phase:>11s}" for phase in Simulation.PHASES + ("draw",))
+          + "  (ms per frame)  peak memory")
+    for case in cases:
+        with context.Pool(1) as pool:
+            result = pool.apply(run_case, (case,))
+        results.append(result)
+        phases = "  ".join(f"{result['phase time per frame (ms)'][phase]:11.3f}"
+                           for phase in Simulation.PHASES + ("draw",))
+        memory = f"{result['peak memory (MB)']:7.1f} MB" if result["peak memory (MB)"] is not None else "n/a"
+        print(f"{result['name']:>46s}  {result['frames per second']:9.1f}  {phases}  {memory:>27s}")
+
+    output = {"metadata": {"date": datetime.datetime.now().isoformat(timespec="seconds"),
+                           "python": platform.python_version(),
+                           "numpy": np.__version__,
+                           "platform": platform.platform(),
+                           "processor": platform.processor(),
+                           "parameters": str(args.parameters),
+                           "time (s)": args.time,
+                           "settings": args.settings},
+              "cases": results}
+    if args.baseline:
+        with open(str(args.baseline)) as file_obj:
+            compare(results, json.load(file_obj), args.tolerance)
+    if args.output:
+        with open(str(args.output), 'w') as file_obj:
+            json.dump(output, file_obj, indent=2)
+
+
+if __name__ == "__main__":
+    main()
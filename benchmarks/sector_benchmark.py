@@ -0,0 +1,57 @@
+"""
+Benchmark of the sector simulation against the single process simulation on a wide front scenario.
+The scenario repeats the defences of the parameter file along the x-axis and scales the missile frequency. Every run
+also checks that the Tracker totals equal those of the single process run.
+Usage: python benchmarks/sector_benchmark.py --defences 300 --frequency-scale 60 --sectors 2,4,8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from scaling_benchmark import build_scenario, parse_list  # noqa: E402
+from src.json_loader import JSONLoader  # noqa: E402
+from src.scenario import load_simulation  # noqa: E402
+from src.sector_simulation import SectorSimulation  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sector simulation against the single process simulation.")
+    parser.add_argument("--parameters", type=Path, default=Path(__file__).parent.parent / "parameters.json",
+                        help="Base parameter file")
+    parser.add_argument("--defences", type=int, default=300, help="Number of defences")
+    parser.add_argument("--frequency-scale", type=float, default=60., help="Factor of the missile frequencies")
+    parser.add_argument("--frame-rate", type=float, default=30., help="Simulation frame rate (hz)")
+    parser.add_argument("--time", type=float, default=20., help="Simulated time (s)")
+    parser.add_argument("--sectors", default="2,4,8", help="Comma separated numbers of sectors")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    with open(str(args.parameters)) as file_obj:
+        base = json.load(file_obj)
+    scenario = build_scenario(base, args.frequency_scale, args.defences, args.frame_rate, args.time, {})
+    loader = JSONLoader.from_dict(scenario)
+
+    start = time.perf_counter()
+    simulation = load_simulation(loader, seed=args.seed)
+    simulation.run(args.time, verbose=False)
+    single = time.perf_counter() - start
+    expected = simulation.tracker.summary()
+    print(f"{args.defences} defences, {expected['missiles launched']} missiles, {os.cpu_count()} cores")
+    print(f"{'single process':>16}: {single:7.2f} s")
+
+    for sectors in parse_list(args.sectors, int):
+        start = time.perf_counter()
+        sector_simulation = SectorSimulation(loader, sectors, seed=args.seed)
+        sector_simulation.run(args.time, verbose=False)
+        elapsed = time.perf_counter() - start
+        equal = "equal" if sector_simulation.tracker.summary() == expected else "DIFFERENT"
+        print(f"{f'{sectors} sectors':>16}: {elapsed:7.2f} s, speedup {single / elapsed:5.2f}, totals {equal}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Microbenchmark of util.Vector operations, against the previous Vector without __slots__ that created a new object
+for every operation and computed norms with numpy.
+Usage: python benchmarks/vector_benchmark.py
+"""
+import os
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.util import Vector, distance  # noqa: E402
+
+
+class LegacyVector:
+    """util.Vector as it was before __slots__ and the in-place operators"""
+    def __init__(self, x=0, y=0):
+        self.x: float = x
+        self.y: float = y
+
+    def __add__(self, other):
+        new = LegacyVector()
+        new.x = self.x + other.x
+        new.y = self.y + other.y
+        return new
+
+    def __sub__(self, other):
+        new = LegacyVector()
+        new.x = self.x - other.x
+        new.y = self.y - other.y
+        return new
+
+    def __mul__(self, other: float):
+        other = float(other)
+        new = LegacyVector()
+        new.x = self.x * other
+        new.y = self.y * other
+        return new
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def normalize(self, r: float = 1.):
+        norm = self.get_norm()
+        self.x *= r/norm
+        self.y *= r/norm
+
+    def get_norm(self):
+        return np.sqrt(np.square(self.x) + np.square(self.y))
+
+
+def legacy_distance(p1, p2):
+    return np.sqrt(np.square(p1.x-p2.x) + np.square(p1.y-p2.y))
+
+
+def bytes_per_vector(vector_class) -> float:
+    count = 10000
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    vectors = [vector_class(float(i), float(i)) for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del vectors
+    return size / count
+
+
+def main():
+    p, v = LegacyVector(100., 200.), LegacyVector(3., -4.)
+    new_p, new_v = Vector(100., 200.), Vector(3., -4.)
+    dt = 0.01
+    cases = [
+        ("missile step", lambda: p + dt * v, lambda: new_p.add_scaled(new_v, dt)),
+        ("add", lambda: p + v, lambda: new_p + new_v),
+        ("in-place add", lambda: p + v, lambda: new_p.__iadd__(new_v)),
+        ("sub", lambda: p - v, lambda: new_p - new_v),
+        ("scale", lambda: v * dt, lambda: new_v * dt),
+        ("norm", lambda: v.get_norm(), lambda: new_v.get_norm()),
+        ("distance", lambda: legacy_distance(p, v), lambda: distance(new_p, new_v)),
+        ("normalize", lambda: v.normalize(5.), lambda: new_v.normalize(5.)),
+    ]
+    number = 200000
+    print("Per-operation cost, before / after")
+    for name, legacy, current in cases:
+        legacy_time = min(timeit.repeat(legacy, number=number, repeat=5)) / number * 1e9
+        current_time = min(timeit.repeat(current, number=number, repeat=5)) / number * 1e9
+        print(f"{name:>13s}: {legacy_time:7.1f} ns / {current_time:7.1f} ns ({legacy_time / current_time:4.1f}x)")
+
+    print(f"Memory per vector: before {bytes_per_vector(LegacyVector):.0f} bytes, "
+          f"after {bytes_per_vector(Vector):.0f} bytes")
+
+
+if __name__ == "__main__":
+    main()
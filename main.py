@@ -1,44 +1,109 @@
+import argparse
+import shutil
 import sys
 from pathlib import Path
 
 from src.json_loader import JSONLoader
-from src.simulation import Simulation
-from src.spawner import Spawner
+from src.result_cache import ResultCache, scenario_key
+from src.scenario import load_simulation
+from src.sector_simulation import SectorSimulation
+from src.tracker import Tracker
+from src.trajectory import TrajectoryWriter
 from src.viewer import Viewer
 
 
 def main():
-    try:
-        parameter_path = Path(sys.argv[1])
-    except KeyError:
-        print("No argument provided, Please provide path to parameters file")
-        sys.exit(1)
-    except TypeError:
-        print("Invalid argument provided, Please provide path to parameters file")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Runs a missile defence simulation.")
+    parser.add_argument("parameters", type=Path, help="Path to parameters file")
+    parser.add_argument("--output", default="simulation_view.gif",
+                        help="Output file, .gif or .avi (MJPEG). Frames are written while the simulation runs")
+    parser.add_argument("--record", type=Path, default=None,
+                        help="Record the trajectory to this directory instead of drawing frames, "
+                             "render it later with render.py")
+    parser.add_argument("--profile", type=Path, default=None,
+                        help="Record the time of every phase of every frame to this .csv or .json file, "
+                             "overrides the \"profile output\" simulation setting")
+    parser.add_argument("--events", type=Path, default=None,
+                        help="Write every launch, fire, intercept and ground hit to this .npz or .csv file")
+    parser.add_argument("--cache", type=Path, default=None,
+                        help="Result cache directory. Runs with a \"random seed\" are stored in it, a --record run "
+                             "that is in the cache copies the cached trajectory instead of running. A drawing run "
+                             "always runs, the cache doesn't hold its frames")
+    parser.add_argument("--cache-size", type=float, default=1024, help="Size limit of the result cache (MB)")
+    parser.add_argument("--sectors", type=int, default=None,
+                        help="Run without drawing on this many worker processes, each simulating a sector of the "
+                             "x-axis. Gives the same results as a single process run")
+    args = parser.parse_args()
+    if args.sectors and (args.record or args.profile):
+        parser.error("--sectors runs without drawing, recording or profiling")
+    parameter_path: Path = args.parameters
     if not parameter_path.exists():
         print(f"Invalid file path provided: {parameter_path}, Please provide path to parameters file")
         sys.exit(1)
 
     # Load JSONLoadable objects
     loader = JSONLoader(parameter_path)
-    simulation_settings = loader.load_simulation_settings()
     viewer_settings = loader.load_viewer_settings()
-    missile_generators = loader.load_missiles()
-    defences = loader.load_defences()
+    simulation_settings = loader.load_simulation_settings()
+    profile_output = args.profile or simulation_settings.profile_output
+
+    # Only seeded runs are reproducible
+    cache = None
+    cache_key = None
+    if args.cache and simulation_settings.random_seed is not None:
+        cache = ResultCache(args.cache, int(args.cache_size * 2 ** 20))
+        cache_key = scenario_key(loader, simulation_settings.random_seed)
+        # A cached run can replace a recording run, not a drawing or measuring one: the cache holds the totals and
+        # the trajectory, not the frames of --output or the timings of --profile. Drawing runs still store their
+        # totals for later recording, sector and batch runs.
+        if args.record and not args.events and not profile_output:
+            summary = cache.get(cache_key)
+            trajectory = cache.trajectory(cache_key)
+            if summary is not None and trajectory is not None:
+                shutil.copytree(str(trajectory), str(args.record), dirs_exist_ok=True)
+                Tracker.print_summary(summary)
+                return 0
 
-    spawner = Spawner(simulation_settings)
-    viewer = Viewer(viewer_settings)
+    if args.sectors:
+        # The cache holds the totals, not the events
+        if cache and not args.events:
+            summary = cache.get(cache_key)
+            if summary is not None:
+                Tracker.print_summary(summary)
+                return 0
+        sector_simulation = SectorSimulation(loader, args.sectors)
+        sector_simulation.run(time=simulation_settings.simulation_time)
+        if args.events:
+            sector_simulation.tracker.write_events(args.events)
+        if cache:
+            cache.put(cache_key, sector_simulation.tracker.summary())
+        return 0
 
-    # The missile generators require a spawner to function
-    for missile_generator in missile_generators:
-        missile_generator.set_spawner(spawner)
+    viewer = None
+    recorder = None
+    if args.record:
+        recorder = TrajectoryWriter(args.record, simulation_settings.frame_rate,
+                                    metadata={"viewer settings": {"pixels x": viewer_settings.pixels_x,
+                                                                  "pixels y": viewer_settings.pixels_y}})
+    else:
+        viewer = Viewer(viewer_settings)
+        viewer.open_stream(args.output)
 
-    simulation = Simulation(simulation_settings, defences, missile_generators, viewer)
+    simulation = load_simulation(loader, viewer, recorder)
+    if profile_output and not simulation.profiler:
+        simulation.enable_profiling()
     simulation.run(time=simulation_settings.simulation_time)
 
-    viewer.export_gif(file_name='simulation_view.gif',
-                      frame_rate=simulation_settings.frame_rate)
+    if recorder:
+        recorder.close()
+    if viewer:
+        viewer.close_stream()
+    if simulation.profiler:
+        simulation.profiler.write(profile_output)
+    if args.events:
+        simulation.tracker.write_events(args.events)
+    if cache:
+        cache.put(cache_key, simulation.tracker.summary(), args.record)
 
     return 0
 
@@ -0,0 +1,47 @@
+import argparse
+import sys
+from pathlib import Path
+
+from src.trajectory import Trajectory
+from src.viewer import Viewer
+from src.viewer_settings import ViewerSettings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renders a trajectory recorded with main.py --record "
+                                                 "to a GIF or .avi video.")
+    parser.add_argument("trajectory", type=Path, help="Path to the trajectory directory")
+    parser.add_argument("--output", default="simulation_view.gif", help="Output file name")
+    parser.add_argument("--start", type=float, default=0., help="Start of the time window (s)")
+    parser.add_argument("--end", type=float, default=None, help="End of the time window (s), default end of run")
+    parser.add_argument("--pixels-x", type=int, default=None, help="Image width, default as recorded")
+    parser.add_argument("--pixels-y", type=int, default=None, help="Image height, default as recorded")
+    args = parser.parse_args()
+
+    try:
+        trajectory = Trajectory(args.trajectory)
+    except FileNotFoundError as error:
+        print(error)
+        sys.exit(1)
+
+    recorded_settings = trajectory.meta.get("viewer settings", {"pixels x": 1024, "pixels y": 728})
+    viewer_settings = ViewerSettings.load_from_json(recorded_settings)
+    viewer_settings.pixels_x = args.pixels_x or viewer_settings.pixels_x
+    viewer_settings.pixels_y = args.pixels_y or viewer_settings.pixels_y
+    viewer = Viewer(viewer_settings)
+
+    first = trajectory.frame_index(args.start)
+    last = trajectory.frame_index(args.end) if args.end is not None else len(trajectory) - 1
+    viewer.open_stream(args.output)
+    viewer.plan(trajectory.frame_rate, last - first + 1)
+    for index in range(first, last + 1):
+        # Only draw the frames that end up in the output
+        if viewer.wants_frame(index - first):
+            viewer.draw_state(trajectory.frame(index))
+    viewer.close_stream()
+
+    return 0
+
+
+if __name__ == "__main__":
+    main()
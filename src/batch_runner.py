@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .result_cache import ResultCache
+from .scenario import run_headless
+
+
+class BatchResults:
+    """
+    Aggregate statistics over the replicas of a batch run.
+    """
+    PERCENTILES = (5, 25, 50, 75, 95)
+
+    def __init__(self, summaries: List[dict]):
+        """
+
+        :param summaries: Tracker summaries of the replicas, each with the seed of the replica.
+        """
+        self.summaries = summaries
+
+    def values(self, name: str) -> np.ndarray:
+        """
+        Values of a single statistic over all replicas.
+        :param name: Name of a statistic in the Tracker summary, or "intercept ratio".
+        """
+        if name == "intercept ratio":
+            launched = self.values("missiles launched")
+            intercepted = self.values("missiles intercepted")
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return np.where(launched > 0, intercepted / launched, 0.)
+        return np.array([summary[name] for summary in self.summaries], dtype=float)
+
+    def statistics(self, names: Sequence[str] = ("damage received", "intercept ratio")) -> dict:
+        """
+        Mean, variance and percentiles of statistics over all replicas.
+        :param names: Names of the statistics.
+        :return: Dictionary of statistic name to a dictionary of the aggregates
+        """
+        statistics = {}
+        for name in names:
+            values = self.values(name)
+            percentiles = np.percentile(values, self.PERCENTILES)
+            statistics[name] = {"mean": float(np.mean(values)),
+                                "variance": float(np.var(values, ddof=1)) if len(values) > 1 else 0.,
+                                "percentiles": {str(q): float(value)
+                                                for q, value in zip(self.PERCENTILES, percentiles)}}
+        return statistics
+
+    def results(self):
+        """
+        Prints the aggregate statistics to the console.
+        """
+        print(f"Replicas: {len(self.summaries)}")
+        for name, statistic in self.statistics().items():
+            percentiles = ", ".join(f"p{q}: {value:.3f}" for q, value in statistic["percentiles"].items())
+            print(f"{name.capitalize()}: mean {statistic['mean']:.3f}, variance {statistic['variance']:.3f}\n"
+                  f"    {percentiles}")
+
+
+# Parameter file contents and result cache of a worker process, set once per process by _init_worker
+_worker_json_data: Optional[dict] = None
+_worker_cache: Optional[ResultCache] = None
+
+
+def _init_worker(json_data: dict, cache: Optional[ResultCache] = None):
+    global _worker_json_data, _worker_cache
+    _worker_json_data = json_data
+    _worker_cache = cache
+
+
+def run_replica(seed: int) -> dict:
+    """
+    Runs one headless replica of the scenario of this worker process.
+    :param seed: Seed of the random number generator.
+    :return: Tracker summary of the replica, including its seed
+    """
+    summary = dict(run_headless(_worker_json_data, seed, _worker_cache))
+    summary["seed"] = seed
+    return summary
+
+
+def run_batch(json_data: dict, replicas: int, seed: int = 0, processes: Optional[int] = None,
+              cache: Optional[ResultCache] = None) -> BatchResults:
+    """
+    Runs seeded replicas of a scenario over a process pool, without viewer.
+    Replica i uses seed + i, so a batch is reproducible independent of the number of processes.
+    :param json_data: The contents of a parameter file.
+    :param replicas: Number of replicas to run.
+    :param seed: Seed of the first replica.
+    :param processes: Number of worker processes, defaults to the number of cores.
+    :param cache: Optional result cache, replicas that are in the cache are not run.
+    :return: The aggregated results
+    """
+    processes = processes or os.cpu_count() or 1
+    seeds = range(seed, seed + replicas)
+    if processes == 1:
+        _init_worker(json_data, cache)
+        return BatchResults([run_replica(replica_seed) for replica_seed in seeds])
+
+    # Several replicas per task keep the inter-process communication small compared to the simulation
+    chunk_size = max(1, replicas // (4 * processes))
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(json_data, cache)) as pool:
+        summaries = list(pool.imap(run_replica, seeds, chunksize=chunk_size))
+    return BatchResults(summaries)
@@ -1,25 +1,53 @@
+import math
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional, Sequence
 
 import numpy as np
 
 from .drawable import Drawable, Square
 from .json_loadable import JSONLoadable
+from .missile_engine import MissileEngine
 from .missiles import IMissile
-from .util import distance, Vector, intercept
+from .spatial_index import IndexedMissiles
+from .util import closest_approach, distance, Vector, intercept
+
+
+def missiles_in_range(missiles_world: List[IMissile], p: Vector, range_: float) -> Sequence[IMissile]:
+    """
+    Find the missiles closer than range_ to p.
+    :param missiles_world: List of missiles, IndexedMissiles or a MissileEngine
+    :param p: Center of the query.
+    :param range_: Query radius.
+    :return: The missiles in range, in the order of missiles_world
+    """
+    if isinstance(missiles_world, (IndexedMissiles, MissileEngine)):
+        return missiles_world.in_range(p, range_)
+    return [missile for missile in missiles_world if distance(p, missile.p) < range_]
 
 
 class IDefenceProjectile(Drawable, ABC):
     """
     The interface for projectiles fired by defences
     """
-    target: IMissile
+    # The missile the projectile was fired at. When the projectile enters the Simulation it is replaced by target_id
+    # and set to None, the target is looked up by its id every frame, so projectiles don't keep missiles alive.
+    target: Optional[IMissile] = None
+    # Id of the target in the Simulation's missile store, set when the projectile enters the Simulation
+    target_id: Optional[int] = None
+    # Hits are found by a swept test of the path over the step, set when the projectile enters the Simulation
+    swept_collisions: bool = False
+    # Substeps a projectile may split a frame in when it needs a finer step, set when it enters the Simulation
+    max_substeps: int = 1
     p: Vector
     v: Vector
 
     @abstractmethod
-    def update(self, delta_time: float):
-        """Update state of projectile"""
+    def update(self, delta_time: float, target: IMissile):
+        """
+        Update state of projectile
+        :param delta_time: time increment of frame.
+        :param target: The target of the projectile, the missile with target_id.
+        """
         pass
 
     @abstractmethod
@@ -38,6 +66,8 @@ class IDefence(JSONLoadable, Drawable, ABC):
     The interface for the defence systems. Fill fire on missiles in range
     """
     p: Vector
+    count_down: float  # time until the defence can fire again, it can fire when count_down <= 0
+    _random: Optional[np.random.Generator] = None
 
     @abstractmethod
     def update(self, delta_time: float, missiles_world: List[IMissile]) -> List[IDefenceProjectile]:
@@ -46,31 +76,68 @@ class IDefence(JSONLoadable, Drawable, ABC):
         """
         pass
 
+    @property
+    def random(self) -> np.random.Generator:
+        """
+        The random number generator the targets and hit rolls are drawn from. Without set_random it is seeded from
+        the global numpy random state on first use, so np.random.seed still makes a run repeatable.
+        """
+        if self._random is None:
+            self._random = np.random.default_rng(np.random.randint(2 ** 32, dtype=np.uint64))
+        return self._random
+
+    def set_random(self, random: np.random.Generator):
+        """
+        Sets the random number generator the targets and hit rolls are drawn from.
+        """
+        self._random = random
+
 
 class BulletProjectile(IDefenceProjectile):
     """Projectile is launched at a fixed trajectory"""
-    def __init__(self, p: Vector, v: Vector, accuracy: float, target: IMissile):
-        Drawable.__init__(self, Square, rgb=(0, 0, 0), scale=3)
+    RGB = (0, 0, 0)
+    SCALE = 3
+    # Collision radius of a bullet whose defence doesn't set one (m)
+    RADIUS = 0.5
+
+    def __init__(self, p: Vector, v: Vector, accuracy: float, target: IMissile, hit_roll: float = 0.,
+                 radius: float = RADIUS):
+        """
+
+        :param hit_roll: Uniform number in [0, 1), the bullet hits when it reaches its target and hit_roll is below
+            the accuracy. It is drawn when the bullet is fired, so the outcome doesn't depend on the order the
+            projectiles are updated in.
+        :param radius: Collision radius (m), used with swept collisions.
+        """
+        Drawable.__init__(self, Square, rgb=self.RGB, scale=self.SCALE)
         self.p = p
         self.v = v
         self.target = target
         self.accuracy = accuracy
+        self.hit_roll = hit_roll
+        self.radius = radius
         self.hit_flag = False
         self.miss_flag = False
 
-    def update(self, delta_time: float):
-        delta_p: Vector = self.v * delta_time
-        target_distance = distance(self.p, self.target.p)
-        delta_norm = delta_p.get_norm()
-        # TODO there is a bug here, hit based on being close enough, where close enough metric
-        #  depends on numerical settings. Should be replaced hit system based on object sizes
-        if delta_norm > target_distance:
-            self.hit_flag = True
-        self.p = self.p + delta_p
+    def update(self, delta_time: float, target: IMissile):
+        if self.swept_collisions:
+            time, target_distance = closest_approach(self.p - target.p, self.v - target.v, delta_time)
+            if target_distance < self.radius + target.radius:
+                self.hit_flag = True
+            elif time < delta_time:
+                # Past the closest approach, the bullet can't reach its target anymore
+                self.miss_flag = True
+        else:
+            # A hit is based on being closer than the length of the step, so it depends on the frame rate
+            target_distance = distance(self.p, target.p)
+            delta_norm = abs(delta_time) * self.v.get_norm()
+            if delta_norm > target_distance:
+                self.hit_flag = True
+        self.p.add_scaled(self.v, delta_time)
 
     def hit(self) -> bool:
         if self.hit_flag:
-            if np.random.random() < self.accuracy:
+            if self.hit_roll < self.accuracy:
                 return True
             else:
                 self.miss_flag = True
@@ -90,6 +157,7 @@ class BulletDefence(IDefence):
         self.accuracy = 0
         self.range = 0
         self.count_down = 0
+        self.projectile_radius = BulletProjectile.RADIUS
 
     @staticmethod
     def get_json_name() -> str:
@@ -107,48 +175,114 @@ class BulletDefence(IDefence):
             new.range = json_data["range (m)"]
         except KeyError:
             raise Exception(f"Error loading: {cls.get_json_name()}")
+        # Optional settings
+        new.projectile_radius = json_data.get("projectile radius (m)", BulletProjectile.RADIUS)
 
         return new
 
     def update(self, delta_time: float, missiles_world: List[IMissile]) -> List[IDefenceProjectile]:
         if self.count_down <= 0:
-            in_range_missiles = [missile for missile in missiles_world
-                                 if distance(self.p, missile.p) < self.range]
+            in_range_missiles = missiles_in_range(missiles_world, self.p, self.range)
             if len(in_range_missiles) > 0:
                 missile = self.fire(in_range_missiles)
-                self.count_down = self.reload_time - delta_time
-                return [missile]
+                if missile is not None:
+                    self.count_down = self.reload_time - delta_time
+                    return [missile]
 
         self.count_down -= delta_time
         return []
 
-    def fire(self, in_range_missiles: List[IMissile]) -> IDefenceProjectile:
-        missile_target = in_range_missiles[np.random.randint(len(in_range_missiles))]
-        velocity: Vector = intercept(missile_target.p, missile_target.v, self.p, self.projectile_speed)
-        velocity.normalize(self.projectile_speed)
-        bullet = BulletProjectile(self.p, velocity, self.accuracy, missile_target)
+    def fire(self, in_range_missiles: Sequence[IMissile]) -> Optional[IDefenceProjectile]:
+        """
+        Fires at a random missile in range.
+        The firing solution comes from the scalar intercept rather than from one intercept_many call for all the
+        defences of a frame: a defence fires at most one bullet per reload, so a frame has a handful of pairs at
+        most, and one intercept_many call costs about as much as fifteen scalar solves.
+        :return: The bullet, None when the missile is too fast to be intercepted, the defence holds fire and stays
+            ready.
+        """
+        missile_target = in_range_missiles[self.random.integers(len(in_range_missiles))]
+        velocity = intercept(missile_target.p, missile_target.v, self.p, self.projectile_speed)
+        if velocity is None:
+            return None
+        # The projectile moves its position in place, so it gets its own copy
+        bullet = BulletProjectile(self.p.copy(), velocity, self.accuracy, missile_target, self.random.random(),
+                                  self.projectile_radius)
         return bullet
 
 
 class SeekerProjectile(IDefenceProjectile):
     """Projectile that will continuously reorient its velocity to the target"""
+    RGB = (100, 0, 100)
+    SCALE = 5
+    # A substep moves the seeker at most this fraction of the distance to its target, see max_substeps
+    SUBSTEP_FRACTION = 0.2
+
     def __init__(self, p: Vector, v: Vector, explosion_radius: float, target: IMissile):
-        Drawable.__init__(self, Square, rgb=(100, 0, 100), scale=5)
+        Drawable.__init__(self, Square, rgb=self.RGB, scale=self.SCALE)
         self.p = p
         self.v = v
         self.target = target
         self.hit_flag = False
+        self.miss_flag = False
         self.explosion_radius = explosion_radius
 
-    def update(self, delta_time: float):
+    def update(self, delta_time: float, target: IMissile):
+        substeps = self.substeps(delta_time, target) if self.max_substeps > 1 else 1
+        step = delta_time / substeps
+        for substep in range(substeps):
+            if substep == 0:
+                target_p = target.p
+            else:
+                # The target moves on a straight line during the frame
+                offset = substep * step
+                target_p = Vector(target.p.x + target.v.x * offset, target.p.y + target.v.y * offset)
+            self.advance(step, target_p, target)
+            if self.hit_flag:
+                return
+        if target.p.y < 0:
+            # Target hit ground
+            self.miss_flag = True
+
+    def substeps(self, delta_time: float, target: IMissile) -> int:
+        """
+        Number of substeps of the frame: a substep moves the seeker, relative to its target, at most
+        SUBSTEP_FRACTION of the distance between them, so only seekers in terminal approach take more than one.
+        :return: Between 1 and max_substeps
+        """
+        relative_x = self.v.x - target.v.x
+        relative_y = self.v.y - target.v.y
+        closing_speed = math.sqrt(relative_x * relative_x + relative_y * relative_y)
+        dx = self.p.x - target.p.x
+        dy = self.p.y - target.p.y
+        target_distance = math.sqrt(dx * dx + dy * dy)
+        if target_distance == 0.:
+            return self.max_substeps if closing_speed > 0. else 1
+        substeps = math.ceil(closing_speed * delta_time / (self.SUBSTEP_FRACTION * target_distance))
+        return int(min(max(substeps, 1), self.max_substeps))
+
+    def advance(self, step: float, target_p: Vector, target: IMissile):
+        """
+        Turns towards the target and moves for a step.
+        :param step: Length of the step (s).
+        :param target_p: Position of the target at the start of the step.
+        :param target: The target, for its velocity and radius.
+        """
         original_speed = self.v.get_norm()
-        self.v = self.target.p - self.p
+        self.v = target_p - self.p
         self.v.normalize(original_speed)
-        # TODO there is a chance to overshoot (possibly loop) if frame rate is too high.
-        self.p = self.p + self.v * delta_time
-        target_distance = distance(self.p, self.target.p)
-        if self.explosion_radius > target_distance:
-            self.hit_flag = True
+        if self.swept_collisions:
+            # The explosion reaches the target's surface anywhere along the step
+            _, target_distance = closest_approach(self.p - target_p, self.v - target.v, step)
+            self.p.add_scaled(self.v, step)
+            if self.explosion_radius + target.radius > target_distance:
+                self.hit_flag = True
+        else:
+            # TODO there is a chance to overshoot (possibly loop) if frame rate is too low, see swept collisions.
+            self.p.add_scaled(self.v, step)
+            target_distance = distance(self.p, target_p)
+            if self.explosion_radius > target_distance:
+                self.hit_flag = True
 
     def hit(self) -> bool:
         if self.hit_flag:
@@ -156,11 +290,7 @@ class SeekerProjectile(IDefenceProjectile):
         return False
 
     def miss(self) -> bool:
-        if self.target.p.y < 0:
-            # Target hit ground, in future a flag on the target if it is still in existence
-            return True
-        else:
-            return False
+        return self.miss_flag
 
 
 class SeekerDefence(IDefence):
@@ -195,8 +325,7 @@ class SeekerDefence(IDefence):
 
     def update(self, delta_time: float, missiles_world: List[IMissile]) -> List[IDefenceProjectile]:
         if self.count_down <= 0:
-            in_range_missiles = [missile for missile in missiles_world
-                                 if distance(self.p, missile.p) < self.range]
+            in_range_missiles = missiles_in_range(missiles_world, self.p, self.range)
             if len(in_range_missiles) > 0:
                 missile = self.fire(in_range_missiles)
                 self.count_down = self.reload_time - delta_time
@@ -205,9 +334,9 @@ class SeekerDefence(IDefence):
         self.count_down -= delta_time
         return []
 
-    def fire(self, in_range_missiles: List[IMissile]) -> IDefenceProjectile:
-        missile_target = in_range_missiles[np.random.randint(len(in_range_missiles))]
+    def fire(self, in_range_missiles: Sequence[IMissile]) -> IDefenceProjectile:
+        missile_target = in_range_missiles[self.random.integers(len(in_range_missiles))]
         velocity: Vector = missile_target.p - self.p
         velocity.normalize(self.projectile_speed)
-        bullet = SeekerProjectile(self.p, velocity, self.explosion_radius, missile_target)
+        bullet = SeekerProjectile(self.p.copy(), velocity, self.explosion_radius, missile_target)
         return bullet
@@ -1,3 +1,5 @@
+import itertools
+import math
 from abc import abstractmethod
 from typing import Type
 
@@ -14,7 +16,7 @@ class IShape:
         Interface for drawing a shape onto the image object.
         :param image_obj: A three dimensional array representing the image.
         :param position: The center point where to draw the shape
-        :param image_offset: offsets to compensate for image object coordinates being different from world coordinates
+        :param image_offset: pixel position of the world origin. Image rows point down, so world y is subtracted.
         :param rgb: A tuple containing (r,g,b) on a range from 0 to 255
         :param scale: Scaling factor of the shape
         :return:
@@ -24,17 +26,35 @@ class IShape:
 
 class Drawable:
     """Interface for objects to become drawable on an rgb grid"""
+    # Every drawable gets a unique id, so it can be followed over frames
+    _entity_ids = itertools.count()
+
     def __init__(self, shape: Type[IShape], scale=1, rgb=(255, 255, 255)):
         self.scale = scale
         self.rgb = rgb
         self.shape: Type[IShape] = shape
+        self.entity_id: int = next(Drawable._entity_ids)
+
+    @staticmethod
+    def next_entity_id() -> int:
+        """The id the next drawable gets"""
+        next_id = next(Drawable._entity_ids)
+        Drawable._entity_ids = itertools.count(next_id)
+        return next_id
+
+    @staticmethod
+    def skip_entity_ids(next_id: int):
+        """
+        Makes sure new drawables get ids from next_id on, e.g. after restoring drawables made by another process.
+        """
+        Drawable._entity_ids = itertools.count(max(next_id, Drawable.next_entity_id()))
 
     def draw(self, image_obj, p: Vector, image_offset: Vector):
         """
         Draws itself onto the image object
         :param image_obj: A three dimensional array representing the image.
         :param p: a position of drawable object
-        :param image_offset: offsets to compensate for image object coordinates being different from world coordinates
+        :param image_offset: pixel position of the world origin, see IShape.draw
         :return:
         """
         self.shape.draw(image_obj, p, image_offset, self.rgb, self.scale)
@@ -44,7 +64,8 @@ class Circle(IShape):
     @staticmethod
     def draw(image_obj, p: Vector, image_offset: Vector, rgb, scale: float):
         x = int(p.x + image_offset.x)
-        y = int(p.y + image_offset.y)
+        # World coordinates are rounded down before mirroring, as pixels count up from the origin in world orientation
+        y = int(image_offset.y - math.floor(p.y))
         cv2.circle(image_obj, (x, y), scale, rgb, -1)
 
 
@@ -52,6 +73,11 @@ class Square(IShape):
     @staticmethod
     def draw(image_obj, p: Vector, image_offset: Vector, rgb, scale: float):
         x = int(p.x + image_offset.x - scale/2)
-        y = int(p.y + image_offset.y - scale/2)
+        # Top row, the mirror of the bottom row in world orientation
+        y = int(image_offset.y - math.floor(p.y - scale/2) - int(scale))
         scale = int(scale)
-        cv2.rectangle(image_obj, (x, y), (x+scale, y+scale), rgb, -1)
\ No newline at end of file
+        cv2.rectangle(image_obj, (x, y), (x+scale, y+scale), rgb, -1)
+
+
+# Shapes by name, used to draw recorded frames
+SHAPES = {shape.__name__: shape for shape in (Circle, Square)}
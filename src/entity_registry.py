@@ -0,0 +1,110 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .drawable import Drawable
+
+
+class EntityRegistry:
+    """
+    Store for the world objects of one kind, e.g. missiles or projectiles, with O(1) lookup and removal.
+    Every entity gets a generational id: a slot number and the generation of that slot. Slots are reused after
+    removal with a higher generation, so an id of a removed entity never refers to a new one.
+    Removal takes effect immediately for lookups (in, is_alive, get, len), the list of entities is compacted by
+    flush, which the Simulation calls once per phase. Removing while iterating is safe, and the insertion order of
+    the entities is preserved.
+    The registry mimics the parts of the list interface the Simulation uses (extend, remove, in, len, iter).
+    """
+    SLOT_BITS = 32
+    SLOT_MASK = (1 << SLOT_BITS) - 1
+
+    def __init__(self):
+        self._entities: List[Drawable] = []  # in insertion order, including removed entities until flush
+        self._ids: Dict[Drawable, int] = {}  # id of every entity that is alive
+        self._slot_entities: List[Optional[Drawable]] = []
+        self._generations: List[int] = []
+        self._free_slots: List[int] = []
+        self._removed = 0
+
+    def add(self, entity: Drawable) -> int:
+        """
+        Add an entity.
+        :return: The id of the entity
+        """
+        if self._free_slots:
+            slot = self._free_slots.pop()
+            self._slot_entities[slot] = entity
+        else:
+            slot = len(self._slot_entities)
+            self._slot_entities.append(entity)
+            self._generations.append(0)
+        id_ = (self._generations[slot] << self.SLOT_BITS) | slot
+        self._ids[entity] = id_
+        self._entities.append(entity)
+        return id_
+
+    def extend(self, entities: Iterable[Drawable]):
+        for entity in entities:
+            self.add(entity)
+
+    def remove(self, entity: Drawable):
+        """
+        Remove an entity, the entity list is compacted by the next flush.
+        """
+        if entity not in self._ids:
+            raise ValueError("EntityRegistry.remove(x): x not in EntityRegistry")
+        slot = self._ids.pop(entity) & self.SLOT_MASK
+        self._slot_entities[slot] = None
+        self._generations[slot] += 1
+        self._free_slots.append(slot)
+        self._removed += 1
+
+    def flush(self):
+        """
+        Drop the removed entities from the entity list, preserving the order of the others.
+        """
+        if self._removed == 0:
+            return
+        self._entities = [entity for entity in self._entities if entity in self._ids]
+        self._removed = 0
+
+    def id_of(self, entity: Drawable) -> int:
+        """
+        The id of an entity that is alive.
+        """
+        return self._ids[entity]
+
+    def is_alive(self, id_: int) -> bool:
+        """
+        Whether the entity with this id is still in the registry.
+        """
+        slot = id_ & self.SLOT_MASK
+        return slot < len(self._generations) and self._generations[slot] == id_ >> self.SLOT_BITS \
+            and self._slot_entities[slot] is not None
+
+    def get(self, id_: int) -> Drawable:
+        """
+        The entity with this id.
+        :raises KeyError: if the entity has been removed.
+        """
+        if not self.is_alive(id_):
+            raise KeyError(f"Entity {id_} is not in the EntityRegistry")
+        return self._slot_entities[id_ & self.SLOT_MASK]
+
+    def __contains__(self, entity: Drawable) -> bool:
+        return entity in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[Drawable]:
+        """
+        Iterates over the entities in insertion order. Like iterating over a copy of a list, entities removed
+        during the iteration are still visited.
+        """
+        # Flushing replaces the list instead of changing it, so a running iteration is not affected
+        self.flush()
+        return iter(self._entities)
+
+    def __getitem__(self, index):
+        """Entities by position in insertion order"""
+        self.flush()
+        return self._entities[index]
@@ -0,0 +1,37 @@
+import heapq
+from typing import Any, List, Optional
+
+
+class EventScheduler:
+    """
+    Priority queue of events that are due at a simulation frame.
+    Events are not cancelled, the owner of an event checks whether it is still valid when it is due.
+    Events due at the same frame are returned in the order they were scheduled.
+    """
+    def __init__(self):
+        self._queue = []
+        self._order = 0  # tie breaker, keeps events of a frame in scheduling order
+
+    def schedule(self, frame: int, event: Any):
+        """
+        :param frame: Frame at which the event is due.
+        :param event: Anything that identifies the event to its owner.
+        """
+        heapq.heappush(self._queue, (frame, self._order, event))
+        self._order += 1
+
+    def pop_due(self, frame: int) -> List[Any]:
+        """
+        Removes and returns the events that are due at or before frame, in frame order.
+        """
+        due = []
+        while self._queue and self._queue[0][0] <= frame:
+            due.append(heapq.heappop(self._queue)[2])
+        return due
+
+    def next_frame(self) -> Optional[int]:
+        """Frame of the earliest event, None if there are no events"""
+        return self._queue[0][0] if self._queue else None
+
+    def __len__(self) -> int:
+        return len(self._queue)
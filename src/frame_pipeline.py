@@ -0,0 +1,115 @@
+import queue
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+class FramePipeline:
+    """
+    Producer-consumer pipeline of three stages that run at the same time: the producer (the simulation) submits
+    frame states, render threads rasterize them and an encode thread consumes the images in submission order.
+    A producer that is ahead blocks in submit, at most 2 * queue_size + render_threads items are between submit and
+    the end of their encoding, so memory stays bounded whichever stage is the slowest.
+    An error in a stage stops the work: no item is rendered or encoded after it. The error is raised to the producer
+    by the next submit or by close, which stop the threads first.
+    """
+    def __init__(self, render: Callable[[Any], np.ndarray], encode: Callable[[np.ndarray], None],
+                 render_threads: int = 1, queue_size: int = 4):
+        """
+
+        :param render: Turns a submitted item into an image, called on the render threads.
+        :param encode: Consumes an image, called on the encode thread in the order the items were submitted.
+        :param render_threads: Number of render threads.
+        :param queue_size: Number of items waiting for each of the render and encode stages.
+        """
+        self._render = render
+        self._encode = encode
+        # Taken by submit and given back when the item is encoded. The images that wait to be encoded in order
+        # count as well, a render thread that is behind can't make the others run ahead without bound.
+        self._in_flight = threading.Semaphore(2 * queue_size + render_threads)
+        self._items = queue.Queue()
+        self._images = queue.Queue()
+        self._submitted = 0
+        self._error: Optional[BaseException] = None
+        self._error_raised = False
+        self._stopped = False
+        self._render_threads: List[threading.Thread] = [
+            threading.Thread(target=self._render_loop, name=f"pipeline render {i}", daemon=True)
+            for i in range(render_threads)]
+        self._encode_thread = threading.Thread(target=self._encode_loop, name="pipeline encode", daemon=True)
+        for thread in self._render_threads + [self._encode_thread]:
+            thread.start()
+
+    def submit(self, item: Any):
+        """
+        Hands an item to the render stage, blocks while the pipeline holds its maximum number of items.
+        """
+        if self._stopped:
+            raise Exception("FramePipeline is closed")
+        if self._error is not None:
+            self._stop()
+            self._raise_error()
+        self._in_flight.acquire()
+        self._items.put((self._submitted, item))
+        self._submitted += 1
+
+    def close(self):
+        """
+        Waits until all submitted items are encoded and stops the threads. Closing again does nothing.
+        """
+        self._stop()
+        self._raise_error()
+
+    def _stop(self):
+        """Lets the render threads finish the queued items and joins all threads"""
+        if self._stopped:
+            return
+        self._stopped = True
+        for _ in self._render_threads:
+            self._items.put(None)
+        for thread in self._render_threads + [self._encode_thread]:
+            thread.join()
+
+    def _raise_error(self):
+        """Raises the error of a stage, once. The error stays set, so nothing is rendered or encoded after it."""
+        if self._error is not None and not self._error_raised:
+            self._error_raised = True
+            raise self._error
+
+    def _render_loop(self):
+        while True:
+            job = self._items.get()
+            if job is None:
+                self._images.put(None)
+                return
+            index, item = job
+            image = None
+            # After an error items are still taken from the queue, so the producer is never blocked forever
+            if self._error is None:
+                try:
+                    image = self._render(item)
+                except BaseException as error:
+                    self._error = error
+            self._images.put((index, image))
+
+    def _encode_loop(self):
+        # Images that are done before an image submitted earlier wait here
+        waiting: Dict[int, np.ndarray] = {}
+        next_index = 0
+        running = len(self._render_threads)
+        while running > 0:
+            job = self._images.get()
+            if job is None:
+                running -= 1
+                continue
+            waiting[job[0]] = job[1]
+            while next_index in waiting:
+                image = waiting.pop(next_index)
+                next_index += 1
+                if self._error is None:
+                    try:
+                        self._encode(image)
+                    except BaseException as error:
+                        self._error = error
+                self._in_flight.release()
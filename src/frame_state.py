@@ -0,0 +1,74 @@
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from .drawable import Drawable
+
+# How an entity is drawn: class name, shape name, rgb and scale
+Style = Tuple[str, str, Tuple[int, int, int], float]
+
+
+def style_of(drawable: Drawable) -> Style:
+    return drawable.__class__.__name__, drawable.shape.__name__, tuple(drawable.rgb), drawable.scale
+
+
+class FrameState:
+    """
+    Columnar snapshot of the drawable entities of one frame: their ids, positions and styles.
+    Styles are stored once per state, each entity refers to its style by index.
+    """
+    def __init__(self, ids: np.ndarray, style_codes: np.ndarray, x: np.ndarray, y: np.ndarray,
+                 styles: List[Style]):
+        """
+
+        :param ids: Entity ids
+        :param style_codes: Index into styles of each entity
+        :param x: x coordinates of the entities
+        :param y: y coordinates of the entities
+        :param styles: The styles referred to by style_codes
+        """
+        self.ids = ids
+        self.style_codes = style_codes
+        self.x = x
+        self.y = y
+        self.styles = styles
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_drawables(cls, drawables: Iterable[Drawable]) -> 'FrameState':
+        """
+        Collects the state of drawable world objects, which must have a position p.
+        :param drawables: Missiles, projectiles or defences.
+        """
+        drawables = list(drawables)
+        styles: List[Style] = []
+        style_index = {}
+        style_codes = np.empty(len(drawables), dtype=np.int64)
+        for i, drawable in enumerate(drawables):
+            style = style_of(drawable)
+            if style not in style_index:
+                style_index[style] = len(styles)
+                styles.append(style)
+            style_codes[i] = style_index[style]
+        ids = np.fromiter((drawable.entity_id for drawable in drawables), dtype=np.int64, count=len(drawables))
+        x = np.fromiter((drawable.p.x for drawable in drawables), dtype=float, count=len(drawables))
+        y = np.fromiter((drawable.p.y for drawable in drawables), dtype=float, count=len(drawables))
+        return FrameState(ids, style_codes, x, y, styles)
+
+    @classmethod
+    def concatenate(cls, states: Sequence['FrameState']) -> 'FrameState':
+        """
+        Joins states into a single state, keeping their order.
+        """
+        styles: List[Style] = []
+        style_codes = []
+        for state in states:
+            style_codes.append(state.style_codes + len(styles))
+            styles += state.styles
+        return FrameState(np.concatenate([state.ids for state in states]),
+                          np.concatenate(style_codes),
+                          np.concatenate([state.x for state in states]),
+                          np.concatenate([state.y for state in states]),
+                          styles)
@@ -1,7 +1,29 @@
 from abc import ABC, abstractmethod
+from typing import Dict, List, Type
 
 
 class JSONLoadable(ABC):
+    # JSON name to class of every subclass that implements get_json_name, in the order the classes are defined.
+    # Filled when the subclasses are defined, so a new class only has to be imported to be loadable.
+    registry: Dict[str, Type['JSONLoadable']] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if getattr(cls.get_json_name, '__isabstractmethod__', False):
+            return
+        name = cls.get_json_name()
+        registered = JSONLoadable.registry.get(name)
+        if registered is not None and registered.__qualname__ != cls.__qualname__:
+            raise Exception(f"JSON name {name} of {cls.__qualname__} is used by {registered.__qualname__}")
+        JSONLoadable.registry[name] = cls
+
+    @staticmethod
+    def registered(base: type) -> List[Type['JSONLoadable']]:
+        """
+        The registered classes derived from base, e.g. all IDefence classes.
+        """
+        return [class_ for class_ in JSONLoadable.registry.values() if issubclass(class_, base)]
+
     @classmethod
     @abstractmethod
     def load_from_json(cls, json_data: dict):
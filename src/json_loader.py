@@ -1,10 +1,13 @@
 import json
+import re
 from pathlib import Path
-from typing import List, Type
+from typing import Dict, List, Type
 
-from .defences import IDefence, BulletDefence, SeekerDefence
+import numpy as np
+
+from .defences import IDefence
 from .json_loadable import JSONLoadable
-from .missiles import IMissileGenerator, DefaultMissileGenerator, BoostMissileGenerator
+from .missiles import IMissileGenerator
 from .simulation_settings import SimulationSettings
 from .viewer_settings import ViewerSettings
 
@@ -25,6 +28,16 @@ class JSONLoader:
             json_data = json.load(file_obj)
         self.data = json_data
 
+    @classmethod
+    def from_dict(cls, json_data: dict) -> 'JSONLoader':
+        """
+        Creates a loader for JSON data that is already in memory.
+        :param json_data: The contents of a parameter file.
+        """
+        new = cls.__new__(cls)
+        new.data = json_data
+        return new
+
     def load_simulation_settings(self) -> SimulationSettings:
         return self._unique_loader(SimulationSettings)
 
@@ -32,13 +45,31 @@ class JSONLoader:
         return self._unique_loader(ViewerSettings)
 
     def load_missiles(self) -> List[IMissileGenerator]:
-        # TODO Has a small code weakness, each new instance must also be added to available_classes to work
-        available_classes = [DefaultMissileGenerator, BoostMissileGenerator]
-        return self._multiple_instance_loader(available_classes)
+        return self._multiple_instance_loader(JSONLoadable.registered(IMissileGenerator))
 
     def load_defences(self) -> List[IDefence]:
-        available_classes = [BulletDefence, SeekerDefence]
-        return self._multiple_instance_loader(available_classes)
+        return self._multiple_instance_loader(JSONLoadable.registered(IDefence))
+
+    def load_arrays(self, class_: Type[JSONLoadable]) -> Dict[str, np.ndarray]:
+        """
+        Loads all nodes of a class as typed columns, without building an object per node.
+        The nodes must have the same entries.
+        :param class_: The class of the nodes, e.g. BulletDefence.
+        :return: Dictionary of entry name, e.g. "range (m)", to an array with the value of every node, in file
+            order. The "node" column holds the node names.
+        """
+        keys = self._matching_keys([class_])[class_.get_json_name()]
+        nodes = [self.data[key] for key in keys]
+        entries = list(nodes[0].keys()) if nodes else []
+        entry_set = set(entries)
+        for key, node in zip(keys, nodes):
+            if node.keys() != entry_set:
+                raise Exception(f"Error loading: {class_.get_json_name()}, the entries of {key} differ from "
+                                f"those of {keys[0]}")
+        columns = {"node": np.array(keys, dtype=str)}
+        for entry in entries:
+            columns[entry] = np.array([node[entry] for node in nodes])
+        return columns
 
     def _unique_loader(self, class_: Type[JSONLoadable]):
         """
@@ -64,12 +95,28 @@ class JSONLoader:
         """
         for class_ in classes:
             assert issubclass(class_, JSONLoadable)
-        class_keys = [class_.get_json_name() for class_ in classes]
+        matching_keys = self._matching_keys(classes)
 
         instances = []
-        for class_key, class_ in zip(class_keys, classes):
-            matching_keys = [key for key in self.data.keys() if class_key in key]
-            for matching_key in matching_keys:
+        for class_ in classes:
+            for matching_key in matching_keys[class_.get_json_name()]:
                 instance = class_.load_from_json(self.data[matching_key])
                 instances.append(instance)
         return instances
+
+    def _matching_keys(self, classes: List[Type[JSONLoadable]]) -> Dict[str, List[str]]:
+        """
+        Finds the nodes of classes in a single pass over the node names.
+        A node belongs to the class whose JSON name it contains, the longest name if several are at the same place.
+        :return: Dictionary of JSON name to the names of its nodes, in file order
+        """
+        class_keys = sorted((class_.get_json_name() for class_ in classes), key=len, reverse=True)
+        matching_keys = {class_key: [] for class_key in class_keys}
+        if not class_keys:
+            return matching_keys
+        pattern = re.compile("|".join(re.escape(class_key) for class_key in class_keys))
+        for key in self.data.keys():
+            match = pattern.search(key)
+            if match:
+                matching_keys[match.group()].append(key)
+        return matching_keys
@@ -0,0 +1,265 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .drawable import Circle
+from .frame_state import FrameState, Style
+from .missiles import IMissile, DefaultMissile, BoostMissile
+from .spatial_index import QueryStats, SpatialIndex
+from .util import Vector
+
+
+class MissileEngine:
+    """
+    Structure-of-arrays store for the missiles in flight.
+    Positions, velocities and boost state of all missiles are kept in numpy arrays, so a frame is
+    advanced with a handful of array operations instead of one IMissile.update call per missile.
+    IMissile objects are only built when a consumer (a defence, a projectile or the Viewer) asks for them.
+    The engine mimics the parts of the list interface the Simulation uses (extend, remove, in, len, iter).
+    """
+    DEFAULT = 0
+    BOOST = 1
+    # The per-missile arrays, see _compact and _reserve
+    COLUMNS = ('ids', 'entity_ids', 'kind', 'p', 'v', 'radius', 'boost', 'countdown', 'boost_triggered', 'alive')
+    # Styles of the frame states, by style code: 0 default missile, 1 boost missile, 2 boost missile with triggered
+    # boost. The same as style_of of such missiles, without making missiles that would use up entity ids.
+    STYLES: List[Style] = [(DefaultMissile.__name__, Circle.__name__, DefaultMissile.RGB, DefaultMissile.SCALE),
+                           (BoostMissile.__name__, Circle.__name__, BoostMissile.RGB, BoostMissile.SCALE),
+                           (BoostMissile.__name__, Circle.__name__, BoostMissile.BOOSTED_RGB, BoostMissile.SCALE)]
+
+    def __init__(self, capacity: int = 256, query_stats: Optional[QueryStats] = None):
+        """
+
+        :param capacity: Initial number of missile rows to allocate, the arrays grow when needed.
+        :param query_stats: Optional counter of the work done by range queries.
+        """
+        self.size = 0  # number of used rows, including dead rows awaiting compaction
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.entity_ids = np.zeros(capacity, dtype=np.int64)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.p = np.zeros((capacity, 2))
+        self.v = np.zeros((capacity, 2))
+        self.radius = np.zeros(capacity)
+        self.boost = np.zeros(capacity)
+        self.countdown = np.zeros(capacity)
+        self.boost_triggered = np.zeros(capacity, dtype=bool)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+        self.query_stats = query_stats
+        self._index: Optional[SpatialIndex] = None  # built on the first range query after a change
+
+        self._next_id = 0
+        self._dead = 0
+        # Materialized missiles, these are kept in sync with the arrays until they are removed
+        self._views: Dict[int, IMissile] = {}
+        self._view_ids: Dict[IMissile, int] = {}
+
+    def extend(self, missiles: Iterable[IMissile]):
+        """
+        Add new missiles to the engine. The state of the missiles is copied, the objects are not kept.
+        :param missiles: DefaultMissiles or BoostMissiles
+        """
+        missiles = list(missiles)
+        self._reserve(self.size + len(missiles))
+        self._index = None
+        for missile in missiles:
+            row = self.size
+            if isinstance(missile, BoostMissile):
+                self.kind[row] = self.BOOST
+                self.boost[row] = missile.boost
+                self.countdown[row] = missile.countdown
+                self.boost_triggered[row] = missile.boost_triggered_flag
+            elif isinstance(missile, DefaultMissile):
+                self.kind[row] = self.DEFAULT
+                self.boost[row] = 0
+                self.countdown[row] = 0
+                self.boost_triggered[row] = False
+            else:
+                raise Exception(f"MissileEngine does not support: {missile.__class__.__name__}")
+            self.ids[row] = self._next_id
+            self.entity_ids[row] = missile.entity_id
+            self.p[row] = missile.p.x, missile.p.y
+            self.v[row] = missile.v.x, missile.v.y
+            self.radius[row] = missile.radius
+            self.alive[row] = True
+            self._next_id += 1
+            self.size += 1
+
+    def update(self, delta_time: float) -> List[IMissile]:
+        """
+        Advance all missiles by one frame.
+        :param delta_time: time increment of frame.
+        :return: Missiles that are below ground after the update. They are not removed.
+        """
+        self._compact()
+        self._index = None
+        n = self.size
+        p = self.p[:n]
+        v = self.v[:n]
+
+        p += delta_time * v
+        countdown = self.countdown[:n]
+        countdown -= delta_time
+        boost_triggered = self.boost_triggered[:n]
+        trigger = (self.kind[:n] == self.BOOST) & (countdown < 0) & ~boost_triggered
+        if trigger.any():
+            speed = np.sqrt(np.square(v[trigger, 0]) + np.square(v[trigger, 1]))
+            v[trigger] *= ((speed + self.boost[:n][trigger]) / speed)[:, np.newaxis]
+            boost_triggered[trigger] = True
+
+        if self._views:
+            view_ids = np.fromiter(self._views.keys(), dtype=np.int64, count=len(self._views))
+            for id_, row in zip(view_ids, np.searchsorted(self.ids[:n], view_ids)):
+                self._sync(self._views[id_], row)
+
+        return [self._get_view(row) for row in np.flatnonzero(p[:, 1] < 0)]
+
+    def in_range(self, p: Vector, range_: float) -> Sequence[IMissile]:
+        """
+        Find the missiles closer than range_ to p.
+        :param p: Center of the query.
+        :param range_: Query radius.
+        :return: The missiles in range, in launch order. They are built on access.
+        """
+        if self._index is None:
+            self._compact()
+            positions = self._positions(np.arange(self.size))
+            self._index = SpatialIndex(positions[:, 0].copy(), positions[:, 1].copy(), self.query_stats)
+        rows = self._index.query(p, range_)
+        rows = rows[self.alive[rows]]
+        return _LazyMissiles(self, self.ids[rows])
+
+    def frame_state(self) -> FrameState:
+        """
+        Columnar snapshot of the missiles, without building missile objects.
+        """
+        rows = np.flatnonzero(self.alive[:self.size])
+        # Style codes, see STYLES
+        style_codes = self.kind[rows].astype(np.int64) + self.boost_triggered[rows]
+        positions = self._positions(rows)
+        return FrameState(self.entity_ids[rows], style_codes, positions[:, 0], positions[:, 1], self.STYLES)
+
+    def get_missile(self, id_: int) -> IMissile:
+        """
+        Get the missile object belonging to a missile id, building it when it doesn't exist yet.
+        :param id_: id of a missile that is in the engine.
+        """
+        if id_ in self._views:
+            return self._views[id_]
+        row = int(np.searchsorted(self.ids[:self.size], id_))
+        if row >= self.size or self.ids[row] != id_ or not self.alive[row]:
+            raise KeyError(f"Missile {id_} is not in the MissileEngine")
+        return self._get_view(row)
+
+    def state_of(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Positions, velocities and radii of missiles, gathered from the arrays without building missile objects.
+        :param ids: ids of missiles that are in the engine.
+        """
+        rows = np.searchsorted(self.ids[:self.size], ids)
+        return self._positions(rows), self.v[rows], self.radius[rows]
+
+    def id_of(self, missile: IMissile) -> int:
+        """
+        The missile id of a missile object built by the engine that is still in the engine.
+        """
+        return self._view_ids[missile]
+
+    def is_alive(self, id_: int) -> bool:
+        """
+        Whether the missile with this id is still in the engine. Missile ids are never reused.
+        """
+        row = int(np.searchsorted(self.ids[:self.size], id_))
+        return row < self.size and self.ids[row] == id_ and bool(self.alive[row])
+
+    def remove(self, missile: IMissile):
+        if missile not in self._view_ids:
+            raise ValueError("MissileEngine.remove(x): x not in MissileEngine")
+        id_ = self._view_ids.pop(missile)
+        del self._views[id_]
+        row = np.searchsorted(self.ids[:self.size], id_)
+        self.alive[row] = False
+        self._dead += 1
+
+    def __contains__(self, missile: IMissile) -> bool:
+        return missile in self._view_ids
+
+    def __len__(self) -> int:
+        return self.size - self._dead
+
+    def __iter__(self):
+        rows = np.flatnonzero(self.alive[:self.size])
+        return iter([self._get_view(row) for row in rows])
+
+    def _get_view(self, row: int) -> IMissile:
+        id_ = int(self.ids[row])
+        if id_ in self._views:
+            return self._views[id_]
+
+        p = Vector()
+        v = Vector(self.v[row, 0], self.v[row, 1])
+        if self.kind[row] == self.BOOST:
+            missile = BoostMissile(p, v, self.boost[row], 0., self.radius[row])
+        else:
+            missile = DefaultMissile(p, v, self.radius[row])
+        missile.entity_id = int(self.entity_ids[row])
+        self._sync(missile, row)
+        self._views[id_] = missile
+        self._view_ids[missile] = id_
+        return missile
+
+    def _sync(self, missile: IMissile, row: int):
+        """Copy the array state of a row into its missile object"""
+        x, y = self._positions(row)
+        missile.p = Vector(x, y)
+        missile.v = Vector(self.v[row, 0], self.v[row, 1])
+        if isinstance(missile, BoostMissile):
+            missile.countdown = self._countdowns(row)
+            if self.boost_triggered[row] and not missile.boost_triggered_flag:
+                missile.boost_triggered_flag = True
+                missile.rgb = BoostMissile.BOOSTED_RGB
+
+    def _positions(self, rows) -> np.ndarray:
+        """Current positions of rows, a row index or an index array"""
+        return self.p[rows]
+
+    def _countdowns(self, rows) -> np.ndarray:
+        """Current boost countdowns of rows, a row index or an index array"""
+        return self.countdown[rows]
+
+    def _compact(self):
+        """Drop removed rows. Row order, and therefore launch order, is preserved."""
+        if self._dead == 0:
+            return
+        keep = np.flatnonzero(self.alive[:self.size])
+        n = len(keep)
+        for name in self.COLUMNS:
+            array = getattr(self, name)
+            array[:n] = array[keep]
+        self.size = n
+        self._dead = 0
+
+    def _reserve(self, capacity: int):
+        if capacity <= len(self.ids):
+            return
+        capacity = max(capacity, 2 * len(self.ids))
+        for name in self.COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+
+class _LazyMissiles(Sequence):
+    """A read-only sequence of missiles in a MissileEngine, a missile object is only built when indexed."""
+    def __init__(self, engine: MissileEngine, ids: np.ndarray):
+        self.engine = engine
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.engine.get_missile(int(id_)) for id_ in self.ids[index]]
+        return self.engine.get_missile(int(self.ids[index]))
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 
 import numpy as np
 
@@ -16,6 +16,7 @@ class IMissile(ABC, Drawable):
     """
     p: Vector  # position
     v: Vector  # velocity
+    radius: float  # collision radius (m)
 
     @abstractmethod
     def update(self, delta_time: float):
@@ -37,8 +38,19 @@ class IMissileGenerator(JSONLoadable, ABC):
     """
     Interface for MissileGenerators. MissileGenerators generate missiles of their respective type.
     Requires a spawner to be set to function.
+    Missiles are launched as a Poisson process: the arrival times are pre-sampled from exponential inter-arrival
+    times, a block at a time, with the generator's own random number generator.
     """
     spawner: Spawner
+    frequency: float
+    # Number of arrival times sampled at once
+    ARRIVAL_BLOCK = 256
+
+    def __init__(self):
+        self._random: Optional[np.random.Generator] = None
+        self._time = 0.
+        self._arrivals = np.zeros(0)
+        self._next_arrival = 0
 
     @abstractmethod
     def update(self, delta_time: float) -> List[IMissile]:
@@ -52,18 +64,68 @@ class IMissileGenerator(JSONLoadable, ABC):
     def set_spawner(self, spawner: Spawner):
         self.spawner = spawner
 
+    @property
+    def random(self) -> np.random.Generator:
+        """
+        The random number generator the launch times and spawn locations are drawn from. Without set_random it is
+        seeded from the global numpy random state on first use, so np.random.seed still makes a run repeatable. It is
+        not made when loading, as that is slow for many generators.
+        """
+        if self._random is None:
+            self._random = np.random.default_rng(np.random.randint(2 ** 32, dtype=np.uint64))
+        return self._random
+
+    def set_random(self, random: np.random.Generator):
+        """
+        Sets the random number generator the launch times and spawn locations are drawn from.
+        """
+        self._random = random
+        self._arrivals = np.zeros(0)
+        self._next_arrival = 0
+
+    def launch_count(self, delta_time: float) -> int:
+        """
+        Advances the launch clock by a frame.
+        :param delta_time: time increment of frame.
+        :return: The number of missiles launched in the frame
+        """
+        self._time += delta_time
+        if self.frequency <= 0:
+            return 0
+        count = 0
+        while True:
+            if self._next_arrival == len(self._arrivals):
+                start = self._arrivals[-1] if len(self._arrivals) > 0 else self._time - delta_time
+                self._arrivals = start + np.cumsum(self.random.exponential(1 / self.frequency, self.ARRIVAL_BLOCK))
+                self._next_arrival = 0
+            if self._arrivals[self._next_arrival] > self._time:
+                return count
+            launched = int(np.searchsorted(self._arrivals, self._time, side='right'))
+            count += launched - self._next_arrival
+            self._next_arrival = launched
+
 
 class DefaultMissile(IMissile):
     """
     A missile that will move on a straight line with constant speed.
     """
-    def __init__(self, p: Vector, v: Vector):
-        Drawable.__init__(self, shape=Circle, rgb=(255, 0, 0), scale=4)
+    RGB = (255, 0, 0)
+    SCALE = 4
+    # Collision radius of a missile whose generator doesn't set one (m)
+    RADIUS = 1.
+
+    def __init__(self, p: Vector, v: Vector, radius: float = RADIUS):
+        """
+
+        :param radius: Collision radius (m), used with swept collisions.
+        """
+        Drawable.__init__(self, shape=Circle, rgb=self.RGB, scale=self.SCALE)
         self.p = p
         self.v = v
+        self.radius = radius
 
     def update(self, delta_time: float):
-        self.p = self.p + delta_time * self.v
+        self.p.add_scaled(self.v, delta_time)
 
     def get_damage(self):
         return 1.0
@@ -74,22 +136,21 @@ class DefaultMissileGenerator(IMissileGenerator):
     Creates default missiles.
     """
     def __init__(self):
+        IMissileGenerator.__init__(self)
         self.frequency = 0
         self.velocity = 0
+        self.radius = DefaultMissile.RADIUS
         self.spawner: Spawner = None
 
     def update(self, delta_time: float) -> List[IMissile]:
         assert isinstance(self.spawner, Spawner)
-        lambda_ = self.frequency * delta_time
-        new_missiles_num = np.random.poisson(lambda_)
-        new_missiles = []
-
-        for _ in range(new_missiles_num):
-
-            missile = DefaultMissile(*(self.spawner.generate(self.velocity)))
-            new_missiles.append(missile)
+        new_missiles_num = self.launch_count(delta_time)
+        if new_missiles_num == 0:
+            return []
 
-        return new_missiles
+        positions, velocities = self.spawner.generate_many(self.velocity, new_missiles_num, self.random)
+        return [DefaultMissile(Vector(*p), Vector(*v), self.radius)
+                for p, v in zip(positions.tolist(), velocities.tolist())]
 
     @classmethod
     def load_from_json(cls, json_data: dict):
@@ -99,6 +160,8 @@ class DefaultMissileGenerator(IMissileGenerator):
             new.velocity = json_data["speed (m/s)"]
         except KeyError:
             raise Exception(f"Error loading: {cls.get_json_name()}")
+        # Optional settings
+        new.radius = json_data.get("radius (m)", DefaultMissile.RADIUS)
 
         return new
 
@@ -111,22 +174,34 @@ class BoostMissile(IMissile):
     """
     Missile that will receive a speed boost at set time before impact.
     """
-    def __init__(self, p: Vector, v: Vector, boost: float, countdown: float):
-        Drawable.__init__(self, shape=Circle, rgb=(120, 120, 0), scale=5)
+    RGB = (120, 120, 0)
+    SCALE = 5
+    # Colour of the missile once the boost is triggered
+    BOOSTED_RGB = (255, 255, 255)
+    # Collision radius of a missile whose generator doesn't set one (m)
+    RADIUS = 1.
+
+    def __init__(self, p: Vector, v: Vector, boost: float, countdown: float, radius: float = RADIUS):
+        """
+
+        :param radius: Collision radius (m), used with swept collisions.
+        """
+        Drawable.__init__(self, shape=Circle, rgb=self.RGB, scale=self.SCALE)
         self.p = p
         self.v = v
+        self.radius = radius
         self.boost = boost
         self.countdown = countdown
         self.boost_triggered_flag = False
 
     def update(self, delta_time: float):
-        self.p = self.p + delta_time * self.v
+        self.p.add_scaled(self.v, delta_time)
         self.countdown -= delta_time
         if self.countdown < 0 and not self.boost_triggered_flag:
             original_speed = self.v.get_norm()
             self.v.normalize(original_speed + self.boost)
             self.boost_triggered_flag = True
-            self.rgb = (255, 255, 255)
+            self.rgb = self.BOOSTED_RGB
 
     def get_damage(self):
         return 1.0
@@ -137,28 +212,26 @@ class BoostMissileGenerator(IMissileGenerator):
     Creates BoostMissiles.
     """
     def __init__(self):
+        IMissileGenerator.__init__(self)
         self.frequency = 0
         self.velocity = 0
         self.boost = 0
         self.boost_timer = 0
+        self.radius = BoostMissile.RADIUS
         self.spawner: Spawner = None
 
     def update(self, delta_time: float) -> List[IMissile]:
         assert isinstance(self.spawner, Spawner)
-        lambda_ = self.frequency * delta_time
-        new_missiles_num = np.random.poisson(lambda_)
-        new_missiles = []
-
-        for _ in range(new_missiles_num):
-
-            p, v = self.spawner.generate(self.velocity)
-            # TODO currently boost timer is seconds before impact with original speed.
-            #  It is possible to compute the timer such that the boost timer will be actual seconds to impact.
-            time_before_impact = -p.y / v.y
-            missile = BoostMissile(p, v, self.boost, time_before_impact - self.boost_timer)
-            new_missiles.append(missile)
+        new_missiles_num = self.launch_count(delta_time)
+        if new_missiles_num == 0:
+            return []
 
-        return new_missiles
+        positions, velocities = self.spawner.generate_many(self.velocity, new_missiles_num, self.random)
+        # TODO currently boost timer is seconds before impact with original speed.
+        #  It is possible to compute the timer such that the boost timer will be actual seconds to impact.
+        countdowns = -positions[:, 1] / velocities[:, 1] - self.boost_timer
+        return [BoostMissile(Vector(*p), Vector(*v), self.boost, countdown, self.radius)
+                for p, v, countdown in zip(positions.tolist(), velocities.tolist(), countdowns.tolist())]
 
     @classmethod
     def load_from_json(cls, json_data: dict):
@@ -171,6 +244,8 @@ class BoostMissileGenerator(IMissileGenerator):
 
         except KeyError:
             raise Exception(f"Error loading: {cls.get_json_name()}")
+        # Optional settings
+        new.radius = json_data.get("radius (m)", BoostMissile.RADIUS)
 
         return new
 
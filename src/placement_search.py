@@ -0,0 +1,264 @@
+import copy
+import itertools
+import json
+import multiprocessing
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .result_cache import ResultCache
+from .scenario import run_headless
+
+
+class SearchDimension:
+    """
+    One searched parameter: an entry of a node of the parameter file, e.g. "location (m)" of "bullet defence 1".
+    The parameter either takes values between a minimum and a maximum, or one of a list of values.
+    """
+    def __init__(self, node: str, key: str, low: float, high: float, grid: Sequence[float],
+                 choices: Optional[Sequence[float]] = None):
+        """
+
+        :param node: Name of the node in the parameter file.
+        :param key: Name of the entry in the node.
+        :param low: Smallest value.
+        :param high: Largest value.
+        :param grid: Values tried by a grid search.
+        :param choices: The only allowed values, None if any value between low and high is allowed.
+        """
+        self.node = node
+        self.key = key
+        self.low = low
+        self.high = high
+        self.grid = list(grid)
+        self.choices = list(choices) if choices is not None else None
+
+    @classmethod
+    def load_from_json(cls, node: str, key: str, json_data, grid_steps: int) -> 'SearchDimension':
+        """
+        :param json_data: A list of allowed values, or a dictionary with "min", "max" and optionally "steps",
+            the number of grid values.
+        :param grid_steps: Number of grid values when "steps" is not given.
+        """
+        if isinstance(json_data, list):
+            if len(json_data) == 0:
+                raise Exception(f"Error loading: search space of {node}: {key}, no values")
+            return cls(node, key, min(json_data), max(json_data), json_data, choices=json_data)
+        try:
+            low = json_data["min"]
+            high = json_data["max"]
+        except (KeyError, TypeError):
+            raise Exception(f"Error loading: search space of {node}: {key}")
+        # Optional settings
+        steps = json_data.get("steps", grid_steps)
+        return cls(node, key, low, high, np.linspace(low, high, steps).tolist())
+
+    def sample(self, random: np.random.Generator) -> float:
+        if self.choices is not None:
+            return self.choices[random.integers(len(self.choices))]
+        return float(random.uniform(self.low, self.high))
+
+    def mutate(self, value: float, random: np.random.Generator, scale: float) -> float:
+        """
+        A value near value.
+        :param scale: Standard deviation of the change, relative to the width of the dimension.
+        """
+        if self.choices is not None:
+            index = self.choices.index(value) + int(np.round(random.normal(0., scale * len(self.choices))))
+            return self.choices[int(np.clip(index, 0, len(self.choices) - 1))]
+        return float(np.clip(value + random.normal(0., scale * (self.high - self.low)), self.low, self.high))
+
+
+class SearchSpace:
+    """
+    The parameters of a placement search, loaded from a JSON file with the layout of the parameter file:
+    every node maps its searched entries to their range, e.g.
+    {"bullet defence 1": {"location (m)": {"min": -300, "max": 300}, "range (m)": [150, 250]}}
+    A point of the space is a tuple with a value for every dimension.
+    """
+    def __init__(self, dimensions: List[SearchDimension]):
+        self.dimensions = dimensions
+
+    @classmethod
+    def load_from_json(cls, json_data: dict, grid_steps: int = 5) -> 'SearchSpace':
+        """
+        :param grid_steps: Number of grid values of the dimensions that don't set "steps".
+        """
+        dimensions = [SearchDimension.load_from_json(node, key, value, grid_steps)
+                      for node, entries in json_data.items() for key, value in entries.items()]
+        if not dimensions:
+            raise Exception("Error loading: search space, no parameters to search")
+        return cls(dimensions)
+
+    def grid(self) -> List[Tuple[float, ...]]:
+        return list(itertools.product(*(dimension.grid for dimension in self.dimensions)))
+
+    def sample(self, random: np.random.Generator) -> Tuple[float, ...]:
+        return tuple(dimension.sample(random) for dimension in self.dimensions)
+
+    def mutate(self, point: Tuple[float, ...], random: np.random.Generator, scale: float) -> Tuple[float, ...]:
+        return tuple(dimension.mutate(value, random, scale) for dimension, value in zip(self.dimensions, point))
+
+    def apply(self, json_data: dict, point: Tuple[float, ...]) -> dict:
+        """
+        A copy of the contents of a parameter file with the values of a point filled in.
+        """
+        new = copy.deepcopy(json_data)
+        for dimension, value in zip(self.dimensions, point):
+            if dimension.node not in new:
+                raise Exception(f"Could not find in JSON: {dimension.node}")
+            new[dimension.node][dimension.key] = value
+        return new
+
+    def describe(self, point: Tuple[float, ...]) -> Dict[str, float]:
+        """Readable form of a point, "node: key" to value"""
+        return {f"{dimension.node}: {dimension.key}": value for dimension, value in zip(self.dimensions, point)}
+
+
+# Base parameter file, search space, replica seeds and result cache of a worker process, set once per process by
+# _init_worker
+_worker_state: Optional[tuple] = None
+
+
+def _init_worker(json_data: dict, space: SearchSpace, seeds: Sequence[int], cache: Optional[ResultCache] = None):
+    global _worker_state
+    _worker_state = (json_data, space, seeds, cache)
+
+
+def evaluate_point(point: Tuple[float, ...]) -> dict:
+    """
+    Runs the headless replicas of one point of the search space in this worker process.
+    :return: Mean damage received and intercept ratio over the replicas
+    """
+    json_data, space, seeds, cache = _worker_state
+    candidate = space.apply(json_data, point)
+    damage = []
+    intercept_ratio = []
+    for seed in seeds:
+        summary = run_headless(candidate, seed, cache)
+        damage.append(summary["damage received"])
+        launched = summary["missiles launched"]
+        intercept_ratio.append(summary["missiles intercepted"] / launched if launched > 0 else 0.)
+    return {"damage received": float(np.mean(damage)), "intercept ratio": float(np.mean(intercept_ratio))}
+
+
+class PlacementSearch:
+    """
+    Searches the defence parameters that minimize the damage received, over a process pool.
+    Every point is scored by the mean damage received over the same seeded replicas, so the points are compared
+    under the same missile attacks. Points are evaluated once, the results of all evaluated points are kept.
+    Use as a context manager, the worker processes live as long as the search.
+    """
+    def __init__(self, json_data: dict, space: SearchSpace, replicas: int = 5, seed: int = 0,
+                 processes: Optional[int] = None, cache: Optional[ResultCache] = None):
+        """
+
+        :param json_data: The contents of the base parameter file.
+        :param space: The searched parameters.
+        :param replicas: Number of seeded replicas per point.
+        :param seed: Seed of the first replica, and of the random and evolutionary searches.
+        :param processes: Number of worker processes, defaults to the number of cores.
+        :param cache: Optional result cache, replicas that are in the cache are not run.
+        """
+        self.json_data = json_data
+        self.space = space
+        self.seeds = list(range(seed, seed + replicas))
+        self.random = np.random.default_rng(seed)
+        self.processes = processes or os.cpu_count() or 1
+        self.cache = cache
+        self.results: Dict[Tuple[float, ...], dict] = {}
+        self._pool = None
+
+    def __enter__(self) -> 'PlacementSearch':
+        if self.processes > 1:
+            self._pool = multiprocessing.Pool(self.processes, initializer=_init_worker,
+                                              initargs=(self.json_data, self.space, self.seeds, self.cache))
+        else:
+            _init_worker(self.json_data, self.space, self.seeds, self.cache)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    def evaluate(self, points: Sequence[Tuple[float, ...]]) -> List[dict]:
+        """
+        Scores points, points that were evaluated before are not run again.
+        :return: The results of the points, in the same order
+        """
+        new_points = list(dict.fromkeys(point for point in points if point not in self.results))
+        if self._pool is not None:
+            scores = self._pool.map(evaluate_point, new_points, chunksize=1)
+        else:
+            scores = [evaluate_point(point) for point in new_points]
+        for point, score in zip(new_points, scores):
+            self.results[point] = score
+        return [self.results[point] for point in points]
+
+    def grid_search(self):
+        """Evaluates every combination of the grid values of the dimensions"""
+        self.evaluate(self.space.grid())
+
+    def random_search(self, samples: int):
+        """Evaluates points drawn uniformly from the space"""
+        self.evaluate([self.space.sample(self.random) for _ in range(samples)])
+
+    def evolutionary_search(self, population: int, generations: int, mutation_scale: float = 0.1):
+        """
+        (mu + lambda) evolution: every generation the better half of the population are the parents of as many
+        children as the population size, made by uniform crossover of two parents and a mutation. The best of parents
+        and children form the next population.
+        :param population: Number of points per generation.
+        :param generations: Number of generations after the random initial population.
+        :param mutation_scale: Standard deviation of a mutation, relative to the width of a dimension.
+        """
+        if population < 2:
+            raise Exception(f"Population of the evolutionary search must be at least 2, got {population}")
+        points = [self.space.sample(self.random) for _ in range(population)]
+        self.evaluate(points)
+        for _ in range(generations):
+            parents = self._ranked(points)[:max(2, population // 2)]
+            children = []
+            # A small space can leave a single distinct parent, it then crosses with itself
+            replace = len(parents) < 2
+            for _ in range(population):
+                first, second = self.random.choice(len(parents), 2, replace=replace)
+                mask = self.random.random(len(self.space.dimensions)) < 0.5
+                child = tuple(a if take_first else b
+                              for a, b, take_first in zip(parents[first], parents[second], mask))
+                children.append(self.space.mutate(child, self.random, mutation_scale))
+            self.evaluate(children)
+            points = self._ranked(list(dict.fromkeys(parents + children)))[:population]
+
+    def best(self, count: int = 1) -> List[Tuple[Tuple[float, ...], dict]]:
+        """
+        The best evaluated points with their results, lowest damage first.
+        """
+        return [(point, self.results[point]) for point in self._ranked(list(self.results))[:count]]
+
+    def write_best(self, directory: Path, count: int = 1) -> List[Path]:
+        """
+        Writes the best points as ready to run parameter files, placement_1.json being the best.
+        :return: The paths of the written files
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for rank, (point, _) in enumerate(self.best(count), start=1):
+            path = directory / f"placement_{rank}.json"
+            with open(str(path), 'w') as file_obj:
+                json.dump(self.space.apply(self.json_data, point), file_obj, indent=2)
+            paths.append(path)
+        return paths
+
+    def report(self) -> List[dict]:
+        """All evaluated points with their results, best first"""
+        return [{"parameters": self.space.describe(point), **result} for point, result in self.best(len(self.results))]
+
+    def _ranked(self, points: List[Tuple[float, ...]]) -> List[Tuple[float, ...]]:
+        """Points sorted on damage received, then on intercept ratio"""
+        return sorted(points, key=lambda point: (self.results[point]["damage received"],
+                                                 -self.results[point]["intercept ratio"]))
@@ -0,0 +1,120 @@
+import csv
+import json
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+
+class PhaseProfiler:
+    """
+    Records the wall time of every phase of every frame, and the number of entities at the start of the frame.
+    The measurements are kept in numpy arrays that grow when needed, one row per frame.
+    """
+    PERCENTILES = (50, 90, 99)
+    COUNTS = ('missiles', 'projectiles', 'active defences')
+
+    def __init__(self, phases: Sequence[str], capacity: int = 1024):
+        """
+
+        :param phases: Names of the phases that are timed.
+        :param capacity: Initial number of frames to allocate, the arrays grow when needed.
+        """
+        self.phases = tuple(phases)
+        self.size = 0  # number of recorded frames
+        self.frames = np.zeros(capacity, dtype=np.int64)
+        self.times = np.zeros((capacity, len(self.phases)))
+        self.counts = np.zeros((capacity, len(self.COUNTS)), dtype=np.int64)
+
+    def reserve(self, capacity: int):
+        """Make room for at least capacity frames"""
+        if capacity <= len(self.frames):
+            return
+        capacity = max(capacity, 2 * len(self.frames))
+        for name in ('frames', 'times', 'counts'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def start_frame(self, frame: int, missiles: int, projectiles: int, active_defences: int):
+        """
+        Starts the row of a frame, the phases of the frame are recorded into it.
+        :param frame: Frame number.
+        :param missiles: Number of missiles in flight.
+        :param projectiles: Number of projectiles in flight.
+        :param active_defences: Number of defences that are not reloading.
+        """
+        self.reserve(self.size + 1)
+        self.frames[self.size] = frame
+        self.times[self.size] = 0.
+        self.counts[self.size] = missiles, projectiles, active_defences
+        self.size += 1
+
+    def record(self, phase: int, seconds: float):
+        """
+        Adds the wall time of a phase to the current frame.
+        :param phase: Index of the phase in phases.
+        :param seconds: Wall time.
+        """
+        self.times[self.size - 1, phase] += seconds
+
+    def summary(self) -> dict:
+        """
+        Total, mean, percentiles and maximum of the time per frame of every phase, and of the whole frame.
+        :return: Dictionary of phase name to a dictionary of the aggregates, times in milliseconds except the total
+        """
+        times = self.times[:self.size] * 1e3
+        columns = {phase: times[:, i] for i, phase in enumerate(self.phases)}
+        columns["frame"] = np.sum(times, axis=1)
+        summary = {}
+        for name, values in columns.items():
+            if len(values) == 0:
+                values = np.zeros(1)
+            percentiles = np.percentile(values, self.PERCENTILES)
+            summary[name] = {"total (s)": float(np.sum(values)) / 1e3,
+                             "mean (ms)": float(np.mean(values)),
+                             **{f"p{q} (ms)": float(value) for q, value in zip(self.PERCENTILES, percentiles)},
+                             "max (ms)": float(np.max(values))}
+        return summary
+
+    def columns(self) -> dict:
+        """
+        The per frame measurements, column name to values.
+        """
+        columns = {"frame": self.frames[:self.size].tolist()}
+        for i, phase in enumerate(self.phases):
+            columns[f"{phase} (ms)"] = (self.times[:self.size, i] * 1e3).tolist()
+        for i, name in enumerate(self.COUNTS):
+            columns[name] = self.counts[:self.size, i].tolist()
+        return columns
+
+    def results(self):
+        """
+        Prints the summary to the console.
+        """
+        percentiles = "".join(f"{f'p{q}':>9s}" for q in self.PERCENTILES)
+        print(f"Frames profiled: {self.size}\n"
+              f"{'phase':>12s}{'total (s)':>11s}{'mean':>9s}{percentiles}{'max':>9s}  (ms per frame)")
+        for name, statistic in self.summary().items():
+            values = "".join(f"{value:9.3f}" for value in list(statistic.values())[1:])
+            print(f"{name:>12s}{statistic['total (s)']:11.3f}{values}")
+        print()
+
+    def write(self, path: Path):
+        """
+        Writes the measurements to a file.
+        :param path: A .csv file gets one row per frame, a .json file the columns and the summary.
+        """
+        path = Path(path)
+        columns = self.columns()
+        if path.suffix == ".csv":
+            with open(str(path), 'w', newline='') as file_obj:
+                writer = csv.writer(file_obj)
+                writer.writerow(columns.keys())
+                writer.writerows(zip(*columns.values()))
+        elif path.suffix == ".json":
+            with open(str(path), 'w') as file_obj:
+                json.dump({"summary": self.summary(), "frames": columns}, file_obj, indent=2)
+        else:
+            raise Exception(f"Unsupported profile output: {path}, use .csv or .json")
@@ -0,0 +1,252 @@
+from typing import Callable, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .defences import IDefenceProjectile, BulletProjectile, SeekerProjectile
+from .drawable import Square
+from .frame_state import FrameState, Style
+from .entity_registry import EntityRegistry
+from .missile_engine import MissileEngine
+from .util import closest_approach_many, Vector
+
+
+class ProjectileEngine:
+    """
+    Structure-of-arrays store for the projectiles in flight.
+    All BulletProjectiles and SeekerProjectiles are moved, re-steered and checked for hits and misses
+    together with array operations, instead of one IDefenceProjectile.update call per projectile.
+    The engine mimics the parts of the list interface the Simulation uses (extend, len, iter).
+    """
+    BULLET = 0
+    SEEKER = 1
+    # Styles of the frame states, the style code is the kind. The same as style_of of such projectiles, without
+    # making projectiles that would use up entity ids.
+    STYLES: List[Style] = [(BulletProjectile.__name__, Square.__name__, BulletProjectile.RGB, BulletProjectile.SCALE),
+                           (SeekerProjectile.__name__, Square.__name__, SeekerProjectile.RGB, SeekerProjectile.SCALE)]
+
+    def __init__(self, capacity: int = 64, swept_collisions: bool = False, max_substeps: int = 1):
+        """
+
+        :param capacity: Initial number of projectile rows to allocate, the arrays grow when needed.
+        :param swept_collisions: Find hits with a swept test of the path over the step, see
+            IDefenceProjectile.swept_collisions.
+        :param max_substeps: Substeps a seeker may split a frame in, see SeekerProjectile.substeps.
+        """
+        self.swept_collisions = swept_collisions
+        self.max_substeps = max_substeps
+        self.size = 0
+        self.entity_ids = np.zeros(capacity, dtype=np.int64)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.p = np.zeros((capacity, 2))
+        self.v = np.zeros((capacity, 2))
+        self.accuracy = np.zeros(capacity)
+        self.hit_roll = np.zeros(capacity)
+        self.radius = np.zeros(capacity)
+        self.explosion_radius = np.zeros(capacity)
+        self.target_ids = np.zeros(capacity, dtype=np.int64)
+
+    def extend(self, projectiles: Iterable[IDefenceProjectile]):
+        """
+        Add new projectiles to the engine. The state of the projectiles is copied, the objects are not kept.
+        :param projectiles: BulletProjectiles or SeekerProjectiles
+        """
+        projectiles = list(projectiles)
+        self._reserve(self.size + len(projectiles))
+        for projectile in projectiles:
+            row = self.size
+            if isinstance(projectile, BulletProjectile):
+                self.kind[row] = self.BULLET
+                self.accuracy[row] = projectile.accuracy
+                self.hit_roll[row] = projectile.hit_roll
+                self.radius[row] = projectile.radius
+                self.explosion_radius[row] = 0
+            elif isinstance(projectile, SeekerProjectile):
+                self.kind[row] = self.SEEKER
+                self.accuracy[row] = 0
+                self.hit_roll[row] = 0
+                self.radius[row] = 0
+                self.explosion_radius[row] = projectile.explosion_radius
+            else:
+                raise Exception(f"ProjectileEngine does not support: {projectile.__class__.__name__}")
+            self.entity_ids[row] = projectile.entity_id
+            self.p[row] = projectile.p.x, projectile.p.y
+            self.v[row] = projectile.v.x, projectile.v.y
+            self.target_ids[row] = projectile.target_id
+            self.size += 1
+
+    def retire(self, is_alive: Callable[[int], bool]):
+        """
+        Removes the projectiles whose target is gone, as misses.
+        :param is_alive: Whether the missile with a target id is still alive.
+        """
+        keep = [row for row in range(self.size) if is_alive(int(self.target_ids[row]))]
+        if len(keep) < self.size:
+            self._keep(np.array(keep, dtype=np.int64))
+
+    def update(self, delta_time: float, missiles: Union[EntityRegistry, MissileEngine]) -> List[int]:
+        """
+        Advance all projectiles by one frame and remove the projectiles that hit or missed their target.
+        :param delta_time: time increment of frame.
+        :param missiles: The missiles the target ids refer to, all targets must be alive, see retire.
+        :return: The target ids of the projectiles that hit, one entry per hit.
+        """
+        n = self.size
+        if n == 0:
+            return []
+        p = self.p[:n]
+        v = self.v[:n]
+        target_p, target_v, target_radius = self._target_state(missiles)
+        bullet = self.kind[:n] == self.BULLET
+        seeker = ~bullet
+
+        # Bullets fly straight
+        step = v[bullet] * delta_time
+        if self.swept_collisions:
+            time, target_distance = closest_approach_many(p[bullet] - target_p[bullet], v[bullet] - target_v[bullet],
+                                                          delta_time)
+            bullet_close = target_distance < self.radius[:n][bullet] + target_radius[bullet]
+            # Past the closest approach without a hit, see BulletProjectile.update
+            bullet_passed = ~bullet_close & (time < delta_time)
+        else:
+            # A hit is registered once the step is longer than the distance to the target
+            target_distance = np.sqrt(np.square(p[bullet, 0] - target_p[bullet, 0]) +
+                                      np.square(p[bullet, 1] - target_p[bullet, 1]))
+            step_norm = np.sqrt(np.square(step[:, 0]) + np.square(step[:, 1]))
+            bullet_close = step_norm > target_distance
+            bullet_passed = np.zeros(len(bullet_close), dtype=bool)
+        p[bullet] = p[bullet] + step
+
+        # Seekers turn towards their target keeping their speed, the ones close to it in several substeps
+        seekers = np.flatnonzero(seeker)
+        if self.max_substeps > 1:
+            substeps = self._substeps(seekers, target_p, target_v, delta_time)
+        else:
+            substeps = np.ones(len(seekers), dtype=np.int64)
+        substep_time = delta_time / substeps
+        seeker_hit = np.zeros(len(seekers), dtype=bool)
+        for substep in range(int(substeps.max(initial=0))):
+            advancing = (substep < substeps) & ~seeker_hit
+            rows = seekers[advancing]
+            if substep == 0:
+                substep_target_p = target_p[rows]
+            else:
+                # The target moves on a straight line during the frame
+                substep_target_p = target_p[rows] + target_v[rows] * (substep * substep_time[advancing])[:, np.newaxis]
+            seeker_hit[advancing] = self._advance_seekers(rows, substep_target_p, substep_time[advancing],
+                                                          target_v[rows] if self.swept_collisions else None,
+                                                          target_radius[rows] if self.swept_collisions else None)
+
+        hit = np.zeros(n, dtype=bool)
+        miss = np.zeros(n, dtype=bool)
+        hit[seeker] = seeker_hit
+        # Target hit ground
+        miss[seeker] = ~seeker_hit & (target_p[seeker, 1] < 0)
+        miss[np.flatnonzero(bullet)[bullet_passed]] = True
+
+        rolled = np.flatnonzero(bullet)[bullet_close]
+        accurate = self.hit_roll[rolled] < self.accuracy[rolled]
+        hit[rolled] = accurate
+        miss[rolled] = ~accurate
+
+        hits = [int(self.target_ids[row]) for row in np.flatnonzero(hit)]
+        self._keep(np.flatnonzero(~(hit | miss)))
+        return hits
+
+    def _target_state(self, missiles: Union[EntityRegistry, MissileEngine]) \
+            -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Positions, velocities and radii of the targets of all projectiles, by target id"""
+        target_ids = self.target_ids[:self.size]
+        if isinstance(missiles, MissileEngine):
+            return missiles.state_of(target_ids)
+        targets = [missiles.get(int(id_)) for id_ in target_ids]
+        return (np.array([(target.p.x, target.p.y) for target in targets], dtype=float),
+                np.array([(target.v.x, target.v.y) for target in targets], dtype=float),
+                np.array([target.radius for target in targets], dtype=float))
+
+    def _substeps(self, rows: np.ndarray, target_p: np.ndarray, target_v: np.ndarray,
+                  delta_time: float) -> np.ndarray:
+        """Substeps of the seekers in rows, as SeekerProjectile.substeps"""
+        relative_v = self.v[rows] - target_v[rows]
+        closing_speed = np.sqrt(np.square(relative_v[:, 0]) + np.square(relative_v[:, 1]))
+        relative_p = self.p[rows] - target_p[rows]
+        target_distance = np.sqrt(np.square(relative_p[:, 0]) + np.square(relative_p[:, 1]))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            substeps = np.ceil(closing_speed * delta_time / (SeekerProjectile.SUBSTEP_FRACTION * target_distance))
+        substeps = np.nan_to_num(substeps, nan=1., posinf=self.max_substeps)
+        return np.clip(substeps, 1, self.max_substeps).astype(np.int64)
+
+    def _advance_seekers(self, rows: np.ndarray, target_p: np.ndarray, step: np.ndarray,
+                         target_v: Optional[np.ndarray], target_radius: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Turns the seekers in rows towards their target and moves them for a step, as SeekerProjectile.advance.
+        :param target_p: Positions of the targets at the start of the step.
+        :param step: Length of the step of every seeker.
+        :param target_v: Velocities of the targets, with swept collisions.
+        :param target_radius: Radii of the targets, with swept collisions.
+        :return: Mask of the seekers that hit their target
+        """
+        p = self.p
+        v = self.v
+        speed = np.sqrt(np.square(v[rows, 0]) + np.square(v[rows, 1]))
+        direction = target_p - p[rows]
+        direction_norm = np.sqrt(np.square(direction[:, 0]) + np.square(direction[:, 1]))
+        # A seeker on top of its target has no direction to turn to, it keeps a zero velocity like Vector.normalize
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scale = np.where(direction_norm > 0, speed / direction_norm, 0.)
+        v[rows] = direction * scale[:, np.newaxis]
+        if self.swept_collisions:
+            _, target_distance = closest_approach_many(p[rows] - target_p, v[rows] - target_v, step)
+            p[rows] = p[rows] + v[rows] * step[:, np.newaxis]
+            return self.explosion_radius[rows] + target_radius > target_distance
+        p[rows] = p[rows] + v[rows] * step[:, np.newaxis]
+        target_distance = np.sqrt(np.square(p[rows, 0] - target_p[:, 0]) + np.square(p[rows, 1] - target_p[:, 1]))
+        return self.explosion_radius[rows] > target_distance
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        """Builds projectile objects of the current state, e.g. for drawing"""
+        projectiles = []
+        for row in range(self.size):
+            p = Vector(self.p[row, 0], self.p[row, 1])
+            v = Vector(self.v[row, 0], self.v[row, 1])
+            if self.kind[row] == self.BULLET:
+                projectile = BulletProjectile(p, v, self.accuracy[row], None, self.hit_roll[row], self.radius[row])
+            else:
+                projectile = SeekerProjectile(p, v, self.explosion_radius[row], None)
+            projectile.entity_id = int(self.entity_ids[row])
+            projectile.target_id = int(self.target_ids[row])
+            projectile.swept_collisions = self.swept_collisions
+            projectile.max_substeps = self.max_substeps
+            projectiles.append(projectile)
+        return iter(projectiles)
+
+    def frame_state(self) -> FrameState:
+        """
+        Columnar snapshot of the projectiles, without building projectile objects.
+        """
+        n = self.size
+        return FrameState(self.entity_ids[:n].copy(), self.kind[:n].astype(np.int64),
+                          self.p[:n, 0].copy(), self.p[:n, 1].copy(), self.STYLES)
+
+    def _keep(self, rows: np.ndarray):
+        """Keep only the given rows, preserving their order"""
+        n = len(rows)
+        if n == self.size:
+            return
+        for array in (self.entity_ids, self.kind, self.p, self.v, self.accuracy, self.hit_roll, self.radius,
+                      self.explosion_radius, self.target_ids):
+            array[:n] = array[rows]
+        self.size = n
+
+    def _reserve(self, capacity: int):
+        if capacity <= len(self.kind):
+            return
+        capacity = max(capacity, 2 * len(self.kind))
+        for name in ('entity_ids', 'kind', 'p', 'v', 'accuracy', 'hit_roll', 'radius', 'explosion_radius',
+                     'target_ids'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
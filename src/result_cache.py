@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .json_loader import JSONLoader
+from .util import Vector
+
+SUMMARY_FILE = "summary.json"
+TRAJECTORY_DIRECTORY = "trajectory"
+# Attributes of the loaded objects that don't change the results of a run
+IGNORED_ATTRIBUTES = {"entity_id", "random", "spawner", "random_seed", "profile_output"}
+
+_code_version: Optional[str] = None
+
+
+def code_version() -> str:
+    """
+    Hash of the simulation source code and the numpy version, a change of either invalidates the cache.
+    """
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256(np.__version__.encode())
+        for path in sorted(Path(__file__).parent.glob("*.py")):
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+def _canonical(value):
+    """JSON compatible form of a loaded attribute value, None if it is not part of the scenario"""
+    if isinstance(value, bool) or isinstance(value, str) or value is None:
+        return value
+    if isinstance(value, (int, float, np.number)):
+        return float(value)
+    if isinstance(value, Vector):
+        return [float(value.x), float(value.y)]
+    if isinstance(value, (tuple, list)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, type):
+        return value.__name__
+    return None
+
+
+def _canonical_object(obj) -> dict:
+    attributes = {name: _canonical(value) for name, value in vars(obj).items()
+                  if not name.startswith('_') and name not in IGNORED_ATTRIBUTES}
+    return {"class": obj.__class__.__name__, **attributes}
+
+
+def scenario_key(loader: JSONLoader, seed: int) -> str:
+    """
+    Content hash of a run: the loaded simulation settings, missile generators and defences, the seed and the
+    code version. Formatting, node names and key order of the parameter file don't change the key, the order of
+    the generators does, as it decides their random streams.
+    :param loader: Loader of the parameter file.
+    :param seed: Random seed of the run.
+    :return: Hexadecimal key
+    """
+    scenario = {"simulation settings": _canonical_object(loader.load_simulation_settings()),
+                "missile generators": [_canonical_object(generator) for generator in loader.load_missiles()],
+                "defences": [_canonical_object(defence) for defence in loader.load_defences()],
+                "seed": seed,
+                "code version": code_version()}
+    return hashlib.sha256(json.dumps(scenario, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    On-disk cache of the results of seeded runs, keyed by scenario_key.
+    Every entry is a directory with the Tracker summary and optionally the recorded trajectory. Entries are written
+    to a temporary directory and renamed, so processes can share a cache. When the cache grows beyond its size
+    limit the least recently used entries are removed, a read marks an entry as used.
+    """
+    def __init__(self, directory: Path, max_bytes: int = 1 << 30):
+        """
+
+        :param directory: Cache directory, created if it does not exist.
+        :param max_bytes: Size limit of the cache.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        The cached Tracker summary of a run, None if the run is not in the cache.
+        """
+        entry = self.directory / key
+        try:
+            with open(str(entry / SUMMARY_FILE)) as file_obj:
+                summary = json.load(file_obj)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        self._touch(entry)
+        return summary
+
+    def trajectory(self, key: str) -> Optional[Path]:
+        """
+        The directory of the cached trajectory of a run, None if the run or its trajectory is not in the cache.
+        """
+        path = self.directory / key / TRAJECTORY_DIRECTORY
+        if not path.is_dir():
+            return None
+        self._touch(self.directory / key)
+        return path
+
+    def put(self, key: str, summary: dict, trajectory: Optional[Path] = None):
+        """
+        Stores the results of a run, replacing an entry without trajectory when a trajectory is given.
+        :param summary: Tracker summary of the run.
+        :param trajectory: Optional directory of the recorded trajectory, it is copied.
+        """
+        entry = self.directory / key
+        if entry.exists():
+            if trajectory is None or (entry / TRAJECTORY_DIRECTORY).is_dir():
+                self._touch(entry)
+                return
+            shutil.rmtree(str(entry), ignore_errors=True)
+        staging = Path(tempfile.mkdtemp(dir=str(self.directory), prefix=".staging-"))
+        with open(str(staging / SUMMARY_FILE), 'w') as file_obj:
+            json.dump(summary, file_obj)
+        if trajectory is not None:
+            shutil.copytree(str(trajectory), str(staging / TRAJECTORY_DIRECTORY))
+        try:
+            os.rename(str(staging), str(entry))
+        except OSError:
+            # Another process stored the same run first
+            shutil.rmtree(str(staging), ignore_errors=True)
+        self.evict()
+
+    def size(self) -> int:
+        """Size of all entries in bytes"""
+        return sum(size for _, _, size in self._entries())
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache is within its size limit.
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        for _, entry, size in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(str(entry), ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for _, entry, _ in self._entries():
+            shutil.rmtree(str(entry), ignore_errors=True)
+
+    def _entries(self):
+        """(last use, path, size in bytes) of every entry"""
+        entries = []
+        for entry in self.directory.iterdir():
+            if entry.name.startswith('.') or not entry.is_dir():
+                continue
+            try:
+                size = sum(path.stat().st_size for path in entry.rglob('*') if path.is_file())
+                entries.append((entry.stat().st_mtime, entry, size))
+            except FileNotFoundError:
+                # Removed by another process
+                continue
+        return entries
+
+    @staticmethod
+    def _touch(entry: Path):
+        try:
+            now = time.time()
+            os.utime(str(entry), (now, now))
+        except FileNotFoundError:
+            pass
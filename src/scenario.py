@@ -0,0 +1,68 @@
+from typing import Optional
+
+import numpy as np
+
+from .json_loader import JSONLoader
+from .result_cache import ResultCache, scenario_key
+from .simulation import Simulation
+from .spawner import Spawner
+from .trajectory import TrajectoryWriter
+from .viewer import Viewer
+
+
+def load_simulation(loader: JSONLoader, viewer: Optional[Viewer] = None,
+                    recorder: Optional[TrajectoryWriter] = None, seed: Optional[int] = None) -> Simulation:
+    """
+    Builds a ready to run simulation from the nodes of a parameter file.
+    :param loader: Loader of the parameter file.
+    :param viewer: Optional viewer, the simulation runs headless without one.
+    :param recorder: Optional trajectory recorder.
+    :param seed: Random seed of the run, defaults to the "random seed" simulation setting.
+        Every missile generator and every defence gets its own random number generator derived from the seed,
+        the global numpy random state is seeded as well. Without a seed every run is different.
+    :return: A new simulation
+    """
+    simulation_settings = loader.load_simulation_settings()
+    missile_generators = loader.load_missiles()
+    defences = loader.load_defences()
+
+    if seed is None:
+        seed = simulation_settings.random_seed
+    if seed is not None:
+        np.random.seed(seed)
+    # Independent streams, so adding a generator doesn't change the missiles of the others. The defences' streams
+    # come after the generators', adding a defence doesn't change the missiles either.
+    seeds = np.random.SeedSequence(seed).spawn(len(missile_generators) + len(defences))
+    generator_seeds = seeds[:len(missile_generators)]
+
+    spawner = Spawner(simulation_settings)
+    # The missile generators require a spawner to function
+    for missile_generator, generator_seed in zip(missile_generators, generator_seeds):
+        missile_generator.set_spawner(spawner)
+        missile_generator.set_random(np.random.default_rng(generator_seed))
+    for defence, defence_seed in zip(defences, seeds[len(missile_generators):]):
+        defence.set_random(np.random.default_rng(defence_seed))
+
+    return Simulation(simulation_settings, defences, missile_generators, viewer, recorder)
+
+
+def run_headless(json_data: dict, seed: int, cache: Optional[ResultCache] = None) -> dict:
+    """
+    Runs a seeded scenario without viewer, or takes its results from the cache.
+    :param json_data: The contents of a parameter file.
+    :param seed: Random seed of the run.
+    :param cache: Optional cache of the results, consulted before and updated after the run.
+    :return: Tracker summary of the run
+    """
+    loader = JSONLoader.from_dict(json_data)
+    key = scenario_key(loader, seed) if cache is not None else None
+    if cache is not None:
+        summary = cache.get(key)
+        if summary is not None:
+            return summary
+    simulation = load_simulation(loader, seed=seed)
+    simulation.run(time=simulation.simulation_settings.simulation_time, verbose=False)
+    summary = simulation.tracker.summary()
+    if cache is not None:
+        cache.put(key, summary)
+    return summary
@@ -0,0 +1,230 @@
+import math
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .event_scheduler import EventScheduler
+from .missile_engine import MissileEngine, _LazyMissiles
+from .missiles import IMissile
+from .spatial_index import QueryStats
+from .util import Vector
+
+# Frame number standing for "never"
+NEVER = np.iinfo(np.int64).max // 2
+
+
+class ScheduledMissileEngine(MissileEngine):
+    """
+    MissileEngine that does not move the missiles every frame.
+    Missiles fly in straight lines, so their position is a closed form of the frame number: the position at an
+    anchor frame plus the velocity times the time since. Positions are only evaluated when something asks for them:
+    a range query, a missile object or a frame snapshot.
+    Ground impacts and boost triggers are known in advance and are handled as events of an EventScheduler.
+    Range queries remember the earliest frame at which any missile can be in range, until then they return
+    nothing without looking at the missiles.
+    All frames must have the same duration. The closed form rounds differently from adding the step every frame, so
+    positions can differ from those of a MissileEngine in the last bits, and a missile that reaches the ground or the
+    end of its boost countdown exactly at a frame can fall or boost one frame later.
+    """
+    IMPACT = 0
+    BOOST_TRIGGER = 1
+    COLUMNS = MissileEngine.COLUMNS + ('anchor', 'spawn', 'event_frame', 'event_kind')
+
+    def __init__(self, delta_time: float, capacity: int = 256, query_stats: Optional[QueryStats] = None):
+        """
+
+        :param delta_time: Duration of a frame.
+        :param capacity: Initial number of missile rows to allocate, the arrays grow when needed.
+        :param query_stats: Optional counter of the work done by range queries.
+        """
+        # p and countdown hold the state at the anchor frame and the spawn frame of a missile
+        self.anchor = np.zeros(capacity, dtype=np.int64)
+        self.spawn = np.zeros(capacity, dtype=np.int64)
+        self.event_frame = np.zeros(capacity, dtype=np.int64)
+        self.event_kind = np.zeros(capacity, dtype=np.int8)
+        MissileEngine.__init__(self, capacity, query_stats)
+        self.delta_time = delta_time
+        self.frame = 0  # number of updates so far
+        self.events = EventScheduler()
+        # Range query (x, y, range) to the earliest frame at which a missile can be in range
+        self._watches: Dict[Tuple[float, float, float], int] = {}
+
+    def extend(self, missiles: Iterable[IMissile]):
+        first = self.size
+        MissileEngine.extend(self, missiles)
+        if self.size == first:
+            return
+        rows = np.arange(first, self.size)
+        self.anchor[rows] = self.frame
+        self.spawn[rows] = self.frame
+        for row in rows:
+            self._schedule(row)
+        for key in self._watches:
+            self._watches[key] = min(self._watches[key],
+                                     min(self._entry_frame(row, key, self.frame) for row in rows))
+
+    def update(self, delta_time: float) -> List[IMissile]:
+        """
+        Advance to the next frame, only the missiles with an event in this frame are touched.
+        :param delta_time: time increment of frame, must equal the delta_time of the engine.
+        :return: Missiles that hit the ground in this frame. They are not removed.
+        """
+        if delta_time != self.delta_time:
+            raise Exception(f"ScheduledMissileEngine runs at a fixed frame time of {self.delta_time} s")
+        self._compact()
+        self._index = None
+        self.frame += 1
+
+        fallen = []
+        for id_ in self.events.pop_due(self.frame):
+            row = int(np.searchsorted(self.ids[:self.size], id_))
+            if row >= self.size or self.ids[row] != id_ or not self.alive[row] \
+                    or self.event_frame[row] != self.frame:
+                continue
+            if self.event_kind[row] == self.IMPACT:
+                fallen.append(row)
+            else:
+                self._trigger_boost(row)
+
+        if self._views:
+            view_ids = np.fromiter(self._views.keys(), dtype=np.int64, count=len(self._views))
+            for id_, row in zip(view_ids, np.searchsorted(self.ids[:self.size], view_ids)):
+                self._sync(self._views[id_], row)
+
+        return [self._get_view(row) for row in sorted(fallen)]
+
+    def in_range(self, p: Vector, range_: float) -> Sequence[IMissile]:
+        """
+        Find the missiles closer than range_ to p.
+        :param p: Center of the query.
+        :param range_: Query radius.
+        :return: The missiles in range, in launch order. They are built on access.
+        """
+        key = (p.x, p.y, range_)
+        if key not in self._watches:
+            self._compact()
+            self._watches[key] = self._next_in_range(np.arange(self.size), key, self.frame)
+        if self._watches[key] > self.frame:
+            return _LazyMissiles(self, self.ids[:0])
+
+        in_range = MissileEngine.in_range(self, p, range_)
+        if len(in_range) == 0:
+            rows = np.flatnonzero(self.alive[:self.size])
+            self._watches[key] = self._next_in_range(rows, key, self.frame + 1)
+        return in_range
+
+    def _positions(self, rows) -> np.ndarray:
+        elapsed = (self.frame - self.anchor[rows]) * self.delta_time
+        if np.ndim(rows):
+            elapsed = elapsed[:, np.newaxis]
+        return self.p[rows] + elapsed * self.v[rows]
+
+    def _countdowns(self, rows) -> np.ndarray:
+        return self.countdown[rows] - (self.frame - self.spawn[rows]) * self.delta_time
+
+    def _schedule(self, row: int):
+        """Schedules the next event of a missile, its ground impact or its boost trigger if that comes first"""
+        impact = self._impact_frame(row)
+        if self.kind[row] == self.BOOST and not self.boost_triggered[row]:
+            trigger = self._trigger_frame(row)
+            # The boost is applied after the move of the trigger frame, a missile can't be boosted below ground
+            if trigger < impact:
+                self.event_frame[row] = trigger
+                self.event_kind[row] = self.BOOST_TRIGGER
+                self.events.schedule(trigger, int(self.ids[row]))
+                return
+        self.event_frame[row] = impact
+        self.event_kind[row] = self.IMPACT
+        if impact < NEVER:
+            self.events.schedule(impact, int(self.ids[row]))
+
+    def _impact_frame(self, row: int) -> int:
+        """First frame after the anchor at which the missile is below ground"""
+        p_y, v_y = self.p[row, 1], self.v[row, 1]
+        if v_y >= 0:
+            return NEVER if p_y >= 0 else int(self.anchor[row]) + 1
+        frames = max(1, int(np.floor(p_y / (-v_y * self.delta_time))) + 1)
+        # Agree with the rounding of _positions
+        while frames > 1 and p_y + (frames - 1) * self.delta_time * v_y < 0:
+            frames -= 1
+        while not p_y + frames * self.delta_time * v_y < 0:
+            frames += 1
+        return int(self.anchor[row]) + frames
+
+    def _trigger_frame(self, row: int) -> int:
+        """First frame after the spawn at which the boost countdown is negative"""
+        countdown = self.countdown[row]
+        frames = max(1, int(np.floor(countdown / self.delta_time)) + 1)
+        while frames > 1 and countdown - (frames - 1) * self.delta_time < 0:
+            frames -= 1
+        while not countdown - frames * self.delta_time < 0:
+            frames += 1
+        return int(self.spawn[row]) + frames
+
+    def _trigger_boost(self, row: int):
+        self.p[row] = self._positions(row)
+        self.anchor[row] = self.frame
+        speed = np.sqrt(np.square(self.v[row, 0]) + np.square(self.v[row, 1]))
+        self.v[row] *= (speed + self.boost[row]) / speed
+        self.boost_triggered[row] = True
+        self._schedule(row)
+
+    def _entry_frame(self, row: int, key: Tuple[float, float, float], frame: int) -> int:
+        """
+        Scalar version of _next_in_range for a single row, plain float arithmetic is much faster than numpy
+        for the few missiles that are launched in a frame.
+        """
+        x, y, range_ = key
+        d_x, d_y = self.p[row, 0] - x, self.p[row, 1] - y
+        v_x, v_y = self.v[row, 0], self.v[row, 1]
+        a = v_x * v_x + v_y * v_y
+        b = 2. * (d_x * v_x + d_y * v_y)
+        c = d_x * d_x + d_y * d_y - range_ * range_
+        if a > 0:
+            discriminant = b * b - 4. * a * c
+            if discriminant < 0:
+                return NEVER
+            root = math.sqrt(discriminant)
+            s_enter, s_leave = (-b - root) / (2. * a), (-b + root) / (2. * a)
+            enter = int(self.anchor[row]) + math.floor(s_enter / self.delta_time) - 1
+            leave = int(self.anchor[row]) + math.ceil(s_leave / self.delta_time) + 1
+        elif c < 0:
+            enter, leave = frame, NEVER
+        else:
+            return NEVER
+        if leave < frame:
+            return NEVER
+        enter = max(enter, frame)
+        if self.event_kind[row] == self.BOOST_TRIGGER:
+            enter = min(enter, int(self.event_frame[row]))
+        return enter
+
+    def _next_in_range(self, rows: np.ndarray, key: Tuple[float, float, float], frame: int) -> int:
+        """
+        Earliest frame from frame on at which one of the rows may be within range of a point, a lower bound.
+        """
+        rows = rows[self.alive[rows]]
+        if len(rows) == 0:
+            return NEVER
+        x, y, range_ = key
+        d = self.p[rows] - (x, y)
+        v = self.v[rows]
+        # Within range when |d + v s| < range_ at time s after the anchor frame
+        a = np.einsum('ij,ij->i', v, v)
+        b = 2. * np.einsum('ij,ij->i', d, v)
+        c = np.einsum('ij,ij->i', d, d) - range_ * range_
+        with np.errstate(divide='ignore', invalid='ignore'):
+            root = np.sqrt(np.maximum(np.square(b) - 4. * a * c, 0.))
+            s_enter = np.where(a > 0, (-b - root) / (2. * a), np.where(c < 0, -np.inf, np.inf))
+            s_leave = np.where(a > 0, (-b + root) / (2. * a), np.where(c < 0, np.inf, -np.inf))
+        never = (a > 0) & (np.square(b) - 4. * a * c < 0)
+        anchor = self.anchor[rows].astype(float)
+        # One frame of margin on both sides against rounding
+        enter = anchor + np.floor(s_enter / self.delta_time) - 1
+        leave = anchor + np.ceil(s_leave / self.delta_time) + 1
+        enter = np.where(never | (leave < frame), np.inf, np.maximum(enter, frame))
+        # The boost changes the speed, the query is answered again from the trigger frame on
+        pending_boost = (self.event_kind[rows] == self.BOOST_TRIGGER)
+        enter = np.where(pending_boost, np.minimum(enter, self.event_frame[rows]), enter)
+        earliest = np.min(enter)
+        return NEVER if not np.isfinite(earliest) else int(max(earliest, frame))
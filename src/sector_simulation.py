@@ -0,0 +1,507 @@
+import multiprocessing
+import queue
+import threading
+import traceback
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .defences import IDefence, IDefenceProjectile
+from .json_loader import JSONLoader
+from .missiles import BoostMissile, DefaultMissile, IMissile
+from .scenario import load_simulation
+from .simulation_settings import SimulationSettings
+from .spatial_index import IndexedMissiles, SpatialIndex
+from .tracker import Tracker
+from .util import ground_impact_x, Vector
+
+
+class SharedArrays:
+    """
+    Named numpy arrays in one block of shared memory. Passed to another process the arrays map the same memory,
+    what one process writes the others read, without copies or messages.
+    """
+    # Every array starts at a multiple of this many bytes
+    ALIGNMENT = 8
+
+    def __init__(self, layout: Dict[str, Tuple[tuple, type]]):
+        """
+
+        :param layout: Array name to its shape and dtype. The arrays are zero filled.
+        """
+        self.layout = layout
+        size = sum(self._aligned(int(np.prod(shape)) * np.dtype(dtype).itemsize) for shape, dtype in layout.values())
+        self._memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self._map()
+        for array in self.arrays.values():
+            array.fill(0)
+
+    def _aligned(self, size: int) -> int:
+        return -(-size // self.ALIGNMENT) * self.ALIGNMENT
+
+    def _map(self):
+        self.arrays: Dict[str, np.ndarray] = {}
+        offset = 0
+        for name, (shape, dtype) in self.layout.items():
+            self.arrays[name] = np.ndarray(shape, dtype=dtype, buffer=self._memory.buf, offset=offset)
+            offset += self._aligned(self.arrays[name].nbytes)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def __getstate__(self) -> dict:
+        # Another process attaches to the memory by its name
+        return {"layout": self.layout, "name": self._memory.name}
+
+    def __setstate__(self, state: dict):
+        self.layout = state["layout"]
+        self._memory = shared_memory.SharedMemory(name=state["name"])
+        self._map()
+
+    def release(self):
+        """
+        Frees the shared memory, called once by the process that created the arrays, after the other processes are
+        done. Views of the arrays must not be used afterwards.
+        """
+        self.arrays = {}
+        self._memory.close()
+        self._memory.unlink()
+
+
+def missile_table_layout(missiles: int, sectors: int) -> Dict[str, Tuple[tuple, type]]:
+    """
+    Layout of the shared state of a SectorSimulation: one row per missile, in launch order, and the number of
+    projectiles every sector hands to every other sector in a frame.
+    intercepted_by is the sector + 1 of a projectile that hit the missile, 0 while it is not hit.
+    """
+    return {"px": ((missiles,), np.float64), "py": ((missiles,), np.float64),
+            "vx": ((missiles,), np.float64), "vy": ((missiles,), np.float64), "radius": ((missiles,), np.float64),
+            "boost": ((missiles,), np.float64), "countdown": ((missiles,), np.float64),
+            "launch_frame": ((missiles,), np.int64), "kind": ((missiles,), np.int8),
+            "boost_triggered": ((missiles,), np.bool_), "alive": ((missiles,), np.bool_),
+            "intercepted_by": ((missiles,), np.int64),
+            "handoffs": ((sectors, sectors), np.int64)}
+
+
+class SectorMissiles(IndexedMissiles):
+    """
+    The missiles a sector's defences can reach, rows of the shared missile table. Missile objects are only made for
+    the missiles a range query returns.
+    """
+    def __init__(self, rows: np.ndarray, xs: np.ndarray, ys: np.ndarray, worker: 'SectorWorker'):
+        """
+
+        :param rows: Rows of the missiles in the table, ascending, so in launch order.
+        :param xs: x positions of the missiles.
+        :param ys: y positions of the missiles.
+        :param worker: Worker that makes the missile objects.
+        """
+        IndexedMissiles.__init__(self, [])
+        self.rows = rows
+        self.xs = xs
+        self.ys = ys
+        self.worker = worker
+
+    def in_range(self, p: Vector, range_: float) -> List[IMissile]:
+        if self._index is None:
+            self._index = SpatialIndex(self.xs, self.ys)
+        return [self.worker.missile(row) for row in self.rows[self._index.query(p, range_)]]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        return self.worker.missile(self.rows[index])
+
+
+class SectorWorker:
+    """
+    Simulates one sector of a SectorSimulation, x from lower to upper, in its own process.
+    A frame has the phases of Simulation.update, the workers wait for each other between them:
+    - projectiles: the worker moves the projectiles it owns, a hit marks the target dead in the shared table.
+      When projectiles of several sectors hit a missile in the same frame, one of the sectors registers the
+      intercept, once the phase is over.
+    - missiles: the worker moves the live missiles that were in its sector at the start of the frame. A missile that
+      crosses the boundary is moved by the neighbour from the next frame on, so handing it off takes no message.
+    - defences: the worker's defences fire at the missiles in reach, which can be in a neighbouring sector.
+      Projectiles that left the sector are then sent to the worker of the sector they are in.
+    """
+    # Extra width of the strip of missiles the defences look at, so rounding can't drop a missile in range (m)
+    HALO_MARGIN = 1.
+
+    def __init__(self, sector: int, boundaries: np.ndarray, defences: List[IDefence],
+                 simulation_settings: SimulationSettings, frames: int, shared: SharedArrays,
+                 barrier: threading.Barrier, inboxes: Sequence[multiprocessing.Queue]):
+        """
+
+        :param sector: Index of the sector.
+        :param boundaries: The x values between the sectors, increasing.
+        :param defences: The defences in the sector.
+        :param simulation_settings: Settings of the simulation.
+        :param frames: Number of frames to run.
+        :param shared: The missile table, see missile_table_layout.
+        :param barrier: Barrier of all workers.
+        :param inboxes: Queue of every sector for the projectiles handed to it.
+        """
+        self.sector = sector
+        self.boundaries = boundaries
+        self.lower = boundaries[sector - 1] if sector > 0 else -np.inf
+        self.upper = boundaries[sector] if sector < len(boundaries) else np.inf
+        self.defences = defences
+        self.simulation_settings = simulation_settings
+        self.frames = frames
+        self.shared = shared
+        self.barrier = barrier
+        self.inboxes = inboxes
+        self.projectiles: List[IDefenceProjectile] = []
+        self.tracker = Tracker()
+        self.handed_off = 0
+        # Missile objects of the rows that were targeted or hit something, by row and by entity id
+        self._missiles: Dict[int, IMissile] = {}
+        self._rows: Dict[int, int] = {}
+        # Rows of the launched missiles that were alive at the start of the frame, ascending, so the phases don't
+        # look at every missile ever launched
+        self._live = np.zeros(0, dtype=np.int64)
+        self._launched = 0
+        if defences:
+            self._reach = (min(defence.p.x - defence.range for defence in defences) - self.HALO_MARGIN,
+                           max(defence.p.x + defence.range for defence in defences) + self.HALO_MARGIN)
+
+    def run(self) -> Tracker:
+        """
+        Runs all frames.
+        :return: The tracker of the events in the sector
+        """
+        delta_time = 1/self.simulation_settings.frame_rate
+        launch_frame = self.shared["launch_frame"]
+        for frame in range(1, self.frames + 1):
+            self.tracker.set_frame(frame, frame * delta_time)
+            self.update_live(int(np.searchsorted(launch_frame, frame, side='left')))
+            # Positions don't change until the missile phase
+            px = self.shared["px"][self._live]
+            candidates = self._live[(px >= self.lower) & (px < self.upper)]
+
+            hits = self.update_projectiles(delta_time)
+            self.barrier.wait()
+            self.register_intercepts(hits)
+            self.update_missiles(candidates, delta_time)
+            self.barrier.wait()
+            self.update_defences(delta_time)
+            self.hand_off()
+        return self.tracker
+
+    def update_live(self, launched: int):
+        """
+        Adds the missiles launched since the previous frame to the live rows and drops the rows of dead missiles.
+        :param launched: Number of missiles launched before this frame.
+        """
+        alive = self.shared["alive"]
+        if launched > self._launched:
+            self._live = np.concatenate((self._live, np.arange(self._launched, launched)))
+            self._launched = launched
+        self._live = self._live[alive[self._live]]
+
+    def missile(self, row: int) -> IMissile:
+        """
+        The missile of a row of the table with its current position and velocity.
+        """
+        shared = self.shared
+        missile = self._missiles.get(row)
+        if missile is None:
+            p = Vector(float(shared["px"][row]), float(shared["py"][row]))
+            v = Vector(float(shared["vx"][row]), float(shared["vy"][row]))
+            if shared["kind"][row] == SectorSimulation.BOOST:
+                missile = BoostMissile(p, v, float(shared["boost"][row]), float(shared["countdown"][row]),
+                                       float(shared["radius"][row]))
+            else:
+                missile = DefaultMissile(p, v, float(shared["radius"][row]))
+            self._missiles[row] = missile
+            self._rows[missile.entity_id] = row
+        else:
+            missile.p.x = float(shared["px"][row])
+            missile.p.y = float(shared["py"][row])
+            missile.v.x = float(shared["vx"][row])
+            missile.v.y = float(shared["vy"][row])
+        return missile
+
+    def update_projectiles(self, delta_time: float) -> List[int]:
+        """
+        Moves the projectiles, removes the projectiles that hit or missed and marks the missiles they hit dead.
+        A projectile whose target is dead is removed as a miss without moving, as in Simulation.update_projectiles.
+        :return: Rows of the missiles hit in this sector, see register_intercepts
+        """
+        alive = self.shared["alive"]
+        intercepted_by = self.shared["intercepted_by"]
+        for row in {projectile.target_id for projectile in self.projectiles}:
+            self.missile(row)
+        hits = []
+        flying = []
+        for projectile in self.projectiles:
+            # The target may have been hit by a projectile of another sector in this frame already, it was alive at
+            # the start of the frame then and the hit is counted once by register_intercepts either way
+            if not alive[projectile.target_id]:
+                continue
+            projectile.update(delta_time, self._missiles[projectile.target_id])
+            if projectile.hit():
+                alive[projectile.target_id] = False
+                intercepted_by[projectile.target_id] = self.sector + 1
+                hits.append(projectile.target_id)
+            elif not projectile.miss():
+                flying.append(projectile)
+        self.projectiles = flying
+        return hits
+
+    def register_intercepts(self, hits: List[int]):
+        """
+        Registers the intercepts of the missiles hit in this frame, after all sectors moved their projectiles. A
+        missile hit in several sectors is registered by the sector that wrote intercepted_by last.
+        :param hits: Rows of the missiles hit in this sector.
+        """
+        intercepted_by = self.shared["intercepted_by"]
+        for row in hits:
+            if intercepted_by[row] == self.sector + 1:
+                self.tracker.register_missile_intercept(self.missile(row))
+
+    def update_missiles(self, candidates: np.ndarray, delta_time: float):
+        """
+        Moves the live missiles of the sector, with the arithmetic of DefaultMissile.update and BoostMissile.update,
+        and removes the missiles that hit the ground.
+        :param candidates: Rows of the missiles that were in the sector at the start of the frame.
+        """
+        shared = self.shared
+        px, py, vx, vy = shared["px"], shared["py"], shared["vx"], shared["vy"]
+        rows = candidates[shared["alive"][candidates]]
+        px[rows] += delta_time * vx[rows]
+        py[rows] += delta_time * vy[rows]
+
+        boosted = rows[shared["kind"][rows] == SectorSimulation.BOOST]
+        shared["countdown"][boosted] -= delta_time
+        triggered = boosted[(shared["countdown"][boosted] < 0) & ~shared["boost_triggered"][boosted]]
+        for row in triggered:
+            # Once per missile, the Vector arithmetic gives the same speed as the missile object
+            v = Vector(float(vx[row]), float(vy[row]))
+            original_speed = v.get_norm()
+            v.normalize(original_speed + float(shared["boost"][row]))
+            vx[row] = v.x
+            vy[row] = v.y
+            shared["boost_triggered"][row] = True
+
+        for row in rows[py[rows] < 0]:
+            shared["alive"][row] = False
+            missile = self.missile(row)
+            x = ground_impact_x(missile.p, missile.v) if self.simulation_settings.swept_collisions else missile.p.x
+            if abs(x) < self.simulation_settings.target_radius:
+                self.tracker.register_missile_hit_target(missile)
+            else:
+                self.tracker.register_missile_ground_hit(missile)
+
+    def update_defences(self, delta_time: float):
+        """
+        Lets the defences target the missiles in reach and adds the projectiles they fire.
+        """
+        if not self.defences:
+            return
+        live = self._live
+        px = self.shared["px"][live]
+        in_reach = (px >= self._reach[0]) & (px <= self._reach[1]) & self.shared["alive"][live]
+        rows = live[in_reach]
+        missiles_world = SectorMissiles(rows, px[in_reach], self.shared["py"][rows], self)
+        for defence in self.defences:
+            for new in defence.update(delta_time, missiles_world):
+                new.target_id = self._rows[new.target.entity_id]
+                new.target = None
+                new.swept_collisions = self.simulation_settings.swept_collisions
+                new.max_substeps = self.simulation_settings.max_substeps
+                self.tracker.register_projectile_fire(new)
+                self.projectiles.append(new)
+
+    def hand_off(self):
+        """
+        Sends the projectiles that left the sector to the workers of their sector and receives the projectiles
+        that entered it. All workers have finished the frame when this returns.
+        """
+        handoffs = self.shared["handoffs"]
+        sectors = np.searchsorted(self.boundaries, [projectile.p.x for projectile in self.projectiles], side='right')
+        leaving: Dict[int, List[IDefenceProjectile]] = {}
+        staying = []
+        for projectile, sector in zip(self.projectiles, sectors):
+            if sector == self.sector:
+                staying.append(projectile)
+            else:
+                leaving.setdefault(int(sector), []).append(projectile)
+        self.projectiles = staying
+        handoffs[self.sector] = 0
+        for sector, projectiles in leaving.items():
+            handoffs[self.sector, sector] = len(projectiles)
+            self.inboxes[sector].put(projectiles)
+            self.handed_off += len(projectiles)
+        self.barrier.wait()
+
+        for _ in range(np.count_nonzero(handoffs[:, self.sector])):
+            self.projectiles.extend(self.inboxes[self.sector].get())
+
+
+def _run_sector(worker: SectorWorker, results: multiprocessing.Queue):
+    """Process target of a SectorWorker, puts the sector, its tracker, handed off count and error in results"""
+    try:
+        tracker = worker.run()
+        results.put((worker.sector, tracker, worker.handed_off, None))
+    except BaseException as error:
+        # Wake the other workers, they stop with a BrokenBarrierError
+        worker.barrier.abort()
+        results.put((worker.sector, None, 0, (isinstance(error, threading.BrokenBarrierError),
+                                              traceback.format_exc())))
+
+
+class SectorSimulation:
+    """
+    Runs one large scenario on several processes. The world is split along the x-axis into sectors with about the
+    same number of defences, every sector is simulated by its own worker process, see SectorWorker.
+    The missiles live in shared memory arrays that all workers read, a missile is moved by the worker of the sector
+    it is in. Projectiles belong to the worker of the sector they are in and are sent to a neighbour when they cross
+    a boundary. The workers meet at barriers between the phases of every frame.
+    The missiles don't depend on the defences, they are generated up front in this process. Together with the per
+    defence random number generators that makes the Tracker totals equal to those of a Simulation with the same
+    seed, for any number of sectors.
+    Only DefaultMissiles and BoostMissiles are supported. A SectorSimulation is run once.
+    """
+    DEFAULT = 0
+    BOOST = 1
+
+    def __init__(self, loader: JSONLoader, sectors: int, seed: Optional[int] = None):
+        """
+
+        :param loader: Loader of the parameter file.
+        :param sectors: Number of sectors, and of worker processes.
+        :param seed: Random seed of the run, defaults to the "random seed" simulation setting, see load_simulation.
+        """
+        if sectors < 1:
+            raise Exception(f"Invalid number of sectors: {sectors}")
+        simulation = load_simulation(loader, seed=seed)
+        self.simulation_settings = simulation.simulation_settings
+        self.defences = simulation.defences
+        self.missile_generators = simulation.missile_generators
+        self.sectors = sectors
+        self.boundaries = self.sector_boundaries([defence.p.x for defence in self.defences], sectors,
+                                                 self.simulation_settings.missile_spawn_radius)
+        self.tracker = Tracker()
+
+    @staticmethod
+    def sector_boundaries(xs: Sequence[float], sectors: int, width: float) -> np.ndarray:
+        """
+        The x values between the sectors, chosen so every sector has about the same number of defences.
+        :param xs: x positions of the defences.
+        :param sectors: Number of sectors.
+        :param width: Half the width of the world, used to split it evenly when there are no defences.
+        :return: Increasing array of sectors - 1 values, sector i covers [boundaries[i - 1], boundaries[i])
+        """
+        if len(xs) == 0:
+            return np.linspace(-width, width, sectors + 1)[1:-1]
+        return np.quantile(np.asarray(xs, dtype=float), np.arange(1, sectors) / sectors)
+
+    def run(self, time: float, verbose: bool = True):
+        """
+        Run the simulation, the Tracker of all sectors is self.tracker afterwards.
+        :param time: Simulated time in seconds.
+        :param verbose: Print the results to the console at the end of the run.
+        """
+        frames = int(time * self.simulation_settings.frame_rate)
+        shared = self._launch_missiles(frames, 1/self.simulation_settings.frame_rate)
+        try:
+            handed_off = self._run_workers(shared, frames)
+        finally:
+            shared.release()
+
+        if verbose:
+            self.tracker.results()
+            sectors = np.searchsorted(self.boundaries, [defence.p.x for defence in self.defences], side='right')
+            for sector in range(self.sectors):
+                lower = self.boundaries[sector - 1] if sector > 0 else -np.inf
+                upper = self.boundaries[sector] if sector < len(self.boundaries) else np.inf
+                print(f"Sector {sector}, x in [{lower:.1f}, {upper:.1f}): "
+                      f"{np.count_nonzero(sectors == sector)} defences, "
+                      f"{handed_off[sector]} projectiles handed off")
+
+    def _launch_missiles(self, frames: int, delta_time: float) -> SharedArrays:
+        """
+        Runs the missile generators for all frames and writes the missiles to a new shared table, in launch order.
+        """
+        missiles = []
+        launch_frames = []
+        for frame in range(1, frames + 1):
+            self.tracker.set_frame(frame, frame * delta_time)
+            for generator in self.missile_generators:
+                for missile in generator.update(delta_time):
+                    self.tracker.register_missile_launch(missile)
+                    missiles.append(missile)
+                    launch_frames.append(frame)
+
+        shared = SharedArrays(missile_table_layout(len(missiles), self.sectors))
+        for row, missile in enumerate(missiles):
+            if isinstance(missile, BoostMissile):
+                shared["kind"][row] = self.BOOST
+                shared["boost"][row] = missile.boost
+                shared["countdown"][row] = missile.countdown
+            elif not isinstance(missile, DefaultMissile):
+                shared.release()
+                raise Exception(f"SectorSimulation does not support: {missile.__class__.__name__}")
+            shared["px"][row] = missile.p.x
+            shared["py"][row] = missile.p.y
+            shared["vx"][row] = missile.v.x
+            shared["vy"][row] = missile.v.y
+            shared["radius"][row] = missile.radius
+        shared["launch_frame"][:] = launch_frames
+        shared["alive"][:] = True
+        return shared
+
+    def _run_workers(self, shared: SharedArrays, frames: int) -> List[int]:
+        """
+        Runs a worker process per sector and merges their trackers into self.tracker.
+        :return: Number of projectiles every sector handed off
+        """
+        barrier = multiprocessing.Barrier(self.sectors)
+        inboxes = [multiprocessing.Queue() for _ in range(self.sectors)]
+        results = multiprocessing.Queue()
+        defence_sectors = np.searchsorted(self.boundaries, [defence.p.x for defence in self.defences], side='right')
+        processes = []
+        for sector in range(self.sectors):
+            defences = [defence for defence, defence_sector in zip(self.defences, defence_sectors)
+                        if defence_sector == sector]
+            worker = SectorWorker(sector, self.boundaries, defences, self.simulation_settings, frames, shared,
+                                  barrier, inboxes)
+            processes.append(multiprocessing.Process(target=_run_sector, args=(worker, results), daemon=True))
+        for process in processes:
+            process.start()
+
+        trackers: List[Optional[Tracker]] = [None] * self.sectors
+        handed_off = [0] * self.sectors
+        errors = []
+        received = 0
+        try:
+            while received < self.sectors:
+                try:
+                    sector, tracker, count, error = results.get(timeout=1.)
+                except queue.Empty:
+                    for sector, process in enumerate(processes):
+                        if process.exitcode not in (None, 0):
+                            raise Exception(f"Sector {sector} worker stopped with exit code {process.exitcode}")
+                    continue
+                received += 1
+                trackers[sector] = tracker
+                handed_off[sector] = count
+                if error is not None:
+                    errors.append((sector, error))
+        finally:
+            for process in processes:
+                if received < self.sectors:
+                    process.terminate()
+                process.join()
+        if errors:
+            # The worker that failed first, not the ones it stopped
+            sector, (_, trace) = min(errors, key=lambda item: item[1][0])
+            raise Exception(f"Error in sector {sector}:\n{trace}")
+
+        for tracker in trackers:
+            self.tracker.merge(tracker)
+        return handed_off
@@ -1,9 +1,24 @@
-from typing import List, Optional
+from time import perf_counter
+from typing import List, Optional, Union
 
-from .defences import IDefence, IDefenceProjectile
+import numpy as np
+
+from .defences import IDefence
+from .drawable import Drawable
+from .entity_registry import EntityRegistry
+from .event_scheduler import EventScheduler
+from .frame_state import FrameState
+from .missile_engine import MissileEngine
 from .missiles import IMissile, IMissileGenerator
+from .profiler import PhaseProfiler
+from .projectile_engine import ProjectileEngine
+from .scheduled_missile_engine import ScheduledMissileEngine
 from .simulation_settings import SimulationSettings
+from .snapshot import SimulationSnapshot
+from .spatial_index import IndexedMissiles, QueryStats
 from .tracker import Tracker
+from .trajectory import TrajectoryWriter
+from .util import ground_impact_x
 from .viewer import Viewer
 
 
@@ -11,68 +26,290 @@ class Simulation:
     def __init__(self, simulation_settings: SimulationSettings,
                  defences: List[IDefence],
                  missile_generators: List[IMissileGenerator],
-                 viewer: Optional[Viewer] = None):
+                 viewer: Optional[Viewer] = None,
+                 recorder: Optional[TrajectoryWriter] = None):
         """
         Setup simulation environment.
+        :param viewer: Optional viewer drawing every frame.
+        :param recorder: Optional trajectory recorder storing the state of every frame, to be drawn later.
         """
         self.simulation_settings = simulation_settings
         self.defences = defences
         self.missile_generators = missile_generators
-        self.missiles: List[IMissile] = []
-        self.projectiles: List[IDefenceProjectile] = []
+        # Work done by the defences' range queries
+        self.range_query_stats = QueryStats()
+        # The MissileEngine advances all missiles with array operations, the registry updates them one by one,
+        # the ScheduledMissileEngine only evaluates positions when they are needed
+        self.missiles: Union[EntityRegistry, MissileEngine]
+        if simulation_settings.event_driven_missiles:
+            self.missiles = ScheduledMissileEngine(1/simulation_settings.frame_rate,
+                                                   query_stats=self.range_query_stats)
+        elif simulation_settings.vectorized_missiles:
+            self.missiles = MissileEngine(query_stats=self.range_query_stats)
+        else:
+            self.missiles = EntityRegistry()
+        self.projectiles: Union[EntityRegistry, ProjectileEngine] = \
+            ProjectileEngine(swept_collisions=simulation_settings.swept_collisions,
+                             max_substeps=simulation_settings.max_substeps) \
+            if simulation_settings.batched_projectiles else EntityRegistry()
         self.tracker = Tracker()
+        self.frame = 0
+        # With event driven missiles, reloading defences sleep until the frame they can fire again
+        self.defence_events: Optional[EventScheduler] = \
+            EventScheduler() if simulation_settings.event_driven_missiles else None
+        self._reloading = set()
         self.viewer = viewer
+        self.recorder = recorder
+        # Records the time of every phase of every frame when profiling is on
+        self.profiler: Optional[PhaseProfiler] = None
+        if simulation_settings.profile_output:
+            self.enable_profiling()
+
+    # The phases of a frame, in order, see update
+    PHASES = ('projectiles', 'missiles', 'defences', 'generators')
+    # The timed phases of a frame when profiling, the update phases and the output of the frame
+    PROFILED_PHASES = PHASES + ('draw', 'record')
+
+    def enable_profiling(self):
+        """
+        Turns on the per frame profiling of the phases, see profiler.
+        """
+        self.profiler = PhaseProfiler(self.PROFILED_PHASES)
 
     def update(self, delta_time: float):
         """
         Run a single frame of the simulation.
         :param delta_time: real time increment of the frame.
         """
-        for projectile in self.projectiles:
-            projectile.update(delta_time)
+        self.frame += 1
+        self.tracker.set_frame(self.frame, self.frame * delta_time)
+        if self.defence_events is not None:
+            self._reloading.difference_update(self.defence_events.pop_due(self.frame))
+
+        if self.profiler is None:
+            self.update_projectiles(delta_time)
+            self.update_missiles(delta_time)
+            self.update_defences(delta_time)
+            self.update_generators(delta_time)
+        else:
+            self._profiled_update(delta_time)
+
+    def _profiled_update(self, delta_time: float):
+        """
+        Runs the phases of a frame like update, recording the time of every phase.
+        """
+        self.profiler.start_frame(self.frame, len(self.missiles), len(self.projectiles),
+                                  len(self.defences) - len(self._reloading))
+        for index, phase in enumerate(self.PHASES):
+            update = getattr(self, f"update_{phase}")
+            start = perf_counter()
+            update(delta_time)
+            self.profiler.record(index, perf_counter() - start)
+
+    def update_projectiles(self, delta_time: float):
+        """
+        Moves the projectiles, removes the projectiles that hit or missed and the missiles they hit.
+        A projectile whose target is gone, intercepted by another projectile or fallen to the ground, is removed as a
+        miss without moving.
+        """
+        if isinstance(self.projectiles, ProjectileEngine):
+            self.projectiles.retire(self.missiles.is_alive)
+            hits = self.projectiles.update(delta_time, self.missiles)
+        else:
+            hits = []
+            for projectile in self.projectiles:
+                if not self.missiles.is_alive(projectile.target_id):
+                    self.projectiles.remove(projectile)
+                    continue
+                projectile.update(delta_time, self._missile(projectile.target_id))
+
+                if projectile.hit():
+                    self.projectiles.remove(projectile)
+                    hits.append(projectile.target_id)
+                elif projectile.miss():
+                    self.projectiles.remove(projectile)
+            self.projectiles.flush()
 
-            if projectile.hit():
-                if projectile.target in self.missiles:
-                    self.missiles.remove(projectile.target)
-                self.projectiles.remove(projectile)
-                self.tracker.register_missile_intercept(projectile.target)
-            if projectile.miss():
-                self.projectiles.remove(projectile)
+        for target_id in hits:
+            # The target may be gone already, hit by another projectile in this frame
+            if self.missiles.is_alive(target_id):
+                target = self._missile(target_id)
+                self.missiles.remove(target)
+                self.tracker.register_missile_intercept(target)
 
-        for missile in self.missiles:
-            missile.update(delta_time)
+    def _missile(self, id_: int) -> IMissile:
+        """The missile object of a missile id that is alive"""
+        if isinstance(self.missiles, MissileEngine):
+            return self.missiles.get_missile(id_)
+        return self.missiles.get(id_)
 
-            if missile.p.y < 0:
+    def update_missiles(self, delta_time: float):
+        """
+        Moves the missiles and removes the missiles that hit the ground.
+        """
+        if isinstance(self.missiles, MissileEngine):
+            for missile in self.missiles.update(delta_time):
                 self.ground_hit_program(missile)
+        else:
+            for missile in self.missiles:
+                missile.update(delta_time)
 
+                if missile.p.y < 0:
+                    self.ground_hit_program(missile)
+            self.missiles.flush()
+
+    def update_defences(self, delta_time: float):
+        """
+        Lets the defences target missiles in range and adds the projectiles they fire.
+        """
+        if isinstance(self.missiles, MissileEngine):
+            missiles_world = self.missiles
+        else:
+            missiles_world = IndexedMissiles(self.missiles, self.range_query_stats)
         for defence in self.defences:
-            new_projectiles = defence.update(delta_time, self.missiles)
+            if defence in self._reloading:
+                continue
+            new_projectiles = defence.update(delta_time, missiles_world)
+            if new_projectiles and self.defence_events is not None:
+                self._sleep_while_reloading(defence, delta_time)
 
             for new in new_projectiles:
+                new.target_id = self.missiles.id_of(new.target)
+                new.target = None
+                new.swept_collisions = self.simulation_settings.swept_collisions
+                new.max_substeps = self.simulation_settings.max_substeps
                 self.tracker.register_projectile_fire(new)
-            self.projectiles += new_projectiles
+            self.projectiles.extend(new_projectiles)
 
+    def update_generators(self, delta_time: float):
+        """
+        Adds the missiles launched in this frame.
+        """
         for generator in self.missile_generators:
             new_missiles = generator.update(delta_time)
 
             for new in new_missiles:
                 self.tracker.register_missile_launch(new)
-            self.missiles += new_missiles
+            self.missiles.extend(new_missiles)
 
-    def run(self, time: float):
+    def _sleep_while_reloading(self, defence: IDefence, delta_time: float):
+        """
+        Skips the updates of a defence that has just fired until it can fire again.
+        The count down is reduced frame by frame as the defence's own update would, so the defence wakes in
+        the same frame.
+        """
+        frames = 0
+        count_down = defence.count_down
+        while count_down > 0:
+            count_down -= delta_time
+            frames += 1
+        if frames > 0:
+            defence.count_down = count_down
+            self._reloading.add(defence)
+            self.defence_events.schedule(self.frame + frames + 1, defence)
+
+    def run(self, time: float, verbose: bool = True):
         """
         Run the simulation.
-        :param time: End time of the simulation in seconds.
+        :param time: Simulated time in seconds, from the current frame on, e.g. after a restore.
+        :param verbose: Print the results to the console at the end of the run.
         """
         frames = int(time * self.simulation_settings.frame_rate)
         time_delta = 1/self.simulation_settings.frame_rate
-        for _ in range(frames):
+        if self.viewer:
+            self.viewer.plan(self.simulation_settings.frame_rate, frames)
+        if self.profiler:
+            self.profiler.reserve(self.profiler.size + frames)
+        draw_phase = self.PROFILED_PHASES.index('draw')
+        record_phase = self.PROFILED_PHASES.index('record')
+        for frame_index in range(frames):
             self.update(time_delta)
 
-            if self.viewer:
-                self.viewer.draw_frame(self.missiles, self.projectiles, self.defences)
+            # Frames that would be dropped from the output are not drawn
+            if self.viewer and self.viewer.wants_frame(frame_index):
+                # The clock is only read when profiling
+                start = perf_counter() if self.profiler else None
+                if self.viewer.draws_states():
+                    # Rasterized on the viewer's threads from a snapshot while the simulation continues
+                    self.viewer.draw_state(self.frame_state())
+                else:
+                    self.viewer.draw_frame(self.missiles, self.projectiles, self.defences)
+                if self.profiler:
+                    self.profiler.record(draw_phase, perf_counter() - start)
+            if self.recorder:
+                start = perf_counter() if self.profiler else None
+                self.recorder.write_frame(self.frame_state())
+                if self.profiler:
+                    self.profiler.record(record_phase, perf_counter() - start)
+        if self.viewer:
+            start = perf_counter() if self.profiler else None
+            self.viewer.flush()
+            if self.profiler and self.profiler.size > 0:
+                # Frames still being rasterized are finished here, that time belongs to the last frame
+                self.profiler.record(draw_phase, perf_counter() - start)
+
+        if verbose:
+            self.tracker.results()
+            self.range_query_stats.results()
+            if self.profiler:
+                self.profiler.results()
+
+    def snapshot(self) -> SimulationSnapshot:
+        """
+        Captures the state of the simulation: missiles, projectiles, defences and their count downs, generators and
+        their random number generators, the tracker and the global numpy random state.
+        The viewer, recorder and profiler are not part of the state.
+        """
+        return SimulationSnapshot.of({"simulation": self,
+                                      "global random state": np.random.get_state(),
+                                      "next entity id": Drawable.next_entity_id()})
 
-        self.tracker.results()
+    @staticmethod
+    def restore(snapshot: SimulationSnapshot, viewer: Optional[Viewer] = None,
+                recorder: Optional[TrajectoryWriter] = None) -> 'Simulation':
+        """
+        Builds a simulation from a snapshot, it continues where the snapshotted simulation was. Every restore is
+        independent, so one snapshot can be forked into any number of branches, e.g. to change a defence in each.
+        Restoring sets the global numpy random state, so branches must be run one after the other.
+        :param snapshot: A snapshot taken by Simulation.snapshot.
+        :param viewer: Optional viewer of the restored simulation.
+        :param recorder: Optional trajectory recorder of the restored simulation.
+        :return: A new simulation
+        """
+        state = snapshot.state()
+        np.random.set_state(state["global random state"])
+        Drawable.skip_entity_ids(state["next entity id"])
+        simulation: Simulation = state["simulation"]
+        simulation.viewer = viewer
+        simulation.recorder = recorder
+        return simulation
+
+    def fork(self) -> 'Simulation':
+        """
+        An independent copy of the simulation in its current state, without viewer and recorder.
+        """
+        return self.restore(self.snapshot())
+
+    def __getstate__(self) -> dict:
+        # Outputs are attached to a run, not to the state of the world
+        state = self.__dict__.copy()
+        state["viewer"] = None
+        state["recorder"] = None
+        state["profiler"] = None
+        return state
+
+    def frame_state(self) -> FrameState:
+        """
+        Columnar snapshot of the positions and styles of all missiles, projectiles and defences.
+        """
+        states = []
+        for entities in (self.missiles, self.projectiles):
+            if isinstance(entities, (MissileEngine, ProjectileEngine)):
+                states.append(entities.frame_state())
+            else:
+                states.append(FrameState.from_drawables(entities))
+        states.append(FrameState.from_drawables(self.defences))
+        return FrameState.concatenate(states)
 
     def ground_hit_program(self, missile: IMissile):
         """
@@ -80,10 +317,21 @@ class Simulation:
         :param missile: Missile hitting the ground
         """
         # TODO currently a small stub, may be expanded to have a more complex model of the area to be protected.
-        if abs(missile.p.x) < self.simulation_settings.target_radius:
+        if abs(self.impact_x(missile)) < self.simulation_settings.target_radius:
             missile.get_damage()
             self.tracker.register_missile_hit_target(missile)
+        else:
+            self.tracker.register_missile_ground_hit(missile)
 
         self.missiles.remove(missile)
 
+    def impact_x(self, missile: IMissile) -> float:
+        """
+        The x where a missile below the ground hit it. With swept collisions this is where its path crossed the
+        ground, not the position at the end of the frame, so it doesn't depend on the frame rate.
+        """
+        if self.simulation_settings.swept_collisions:
+            return ground_impact_x(missile.p, missile.v)
+        return missile.p.x
+
 
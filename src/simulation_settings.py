@@ -1,3 +1,5 @@
+from typing import Optional
+
 from .json_loadable import JSONLoadable
 
 
@@ -11,6 +13,13 @@ class SimulationSettings(JSONLoadable):
         self.target_radius: float = 0
         self.missile_spawn_radius: float = 0
         self.minimum_incoming_missile_angle: float = 0
+        self.vectorized_missiles: bool = False
+        self.batched_projectiles: bool = False
+        self.event_driven_missiles: bool = False
+        self.swept_collisions: bool = False
+        self.max_substeps: int = 1
+        self.random_seed: Optional[int] = None
+        self.profile_output: Optional[str] = None
 
     @staticmethod
     def get_json_name() -> str:
@@ -27,6 +36,14 @@ class SimulationSettings(JSONLoadable):
             new.minimum_incoming_missile_angle = json_data["minimum incoming missile angle (deg)"]
         except KeyError:
             raise Exception(f"Error loading: {cls.get_json_name()}")
+        # Optional settings
+        new.vectorized_missiles = json_data.get("vectorized missiles", False)
+        new.batched_projectiles = json_data.get("batched projectiles", False)
+        new.event_driven_missiles = json_data.get("event driven missiles", False)
+        new.swept_collisions = json_data.get("swept collisions", False)
+        new.max_substeps = json_data.get("max substeps", 1)
+        new.random_seed = json_data.get("random seed")
+        new.profile_output = json_data.get("profile output")
 
         return new
 
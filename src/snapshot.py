@@ -0,0 +1,39 @@
+import pickle
+from pathlib import Path
+
+
+class SimulationSnapshot:
+    """
+    The complete state of a Simulation at the end of a frame, see Simulation.snapshot and Simulation.restore.
+    The state is serialized once when the snapshot is taken, so the snapshot is not affected by the simulation
+    continuing, and every restore builds an independent copy from the same bytes.
+    """
+    def __init__(self, data: bytes):
+        """
+
+        :param data: Serialized state.
+        """
+        self.data = data
+
+    def __len__(self) -> int:
+        """Size of the serialized state in bytes"""
+        return len(self.data)
+
+    def save(self, path: Path):
+        with open(str(path), 'wb') as file_obj:
+            file_obj.write(self.data)
+
+    @classmethod
+    def load(cls, path: Path) -> 'SimulationSnapshot':
+        """
+        Loads a snapshot saved by save. Only load snapshots from trusted sources, they are pickles.
+        """
+        with open(str(path), 'rb') as file_obj:
+            return cls(file_obj.read())
+
+    @classmethod
+    def of(cls, state) -> 'SimulationSnapshot':
+        return cls(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def state(self):
+        return pickle.loads(self.data)
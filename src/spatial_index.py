@@ -0,0 +1,103 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from .missiles import IMissile
+from .util import Vector
+
+
+class QueryStats:
+    """
+    Counts the work done by range queries on SpatialIndex objects, to see how well the index prunes.
+    """
+    def __init__(self):
+        self.queries = 0
+        self.population = 0  # summed number of indexed points over all queries
+        self.candidates = 0  # summed number of points of which the distance was computed
+        self.matches = 0  # summed number of points in range
+
+    def register(self, population: int, candidates: int, matches: int):
+        self.queries += 1
+        self.population += population
+        self.candidates += candidates
+        self.matches += matches
+
+    def results(self):
+        """
+        Prints query statistics to the console.
+        """
+        if self.queries == 0:
+            return
+        pruned = 1. - self.candidates / self.population if self.population > 0 else 0.
+        print(f"Range queries: {self.queries}\n"
+              f"Candidates per query: {self.candidates / self.queries:.1f} "
+              f"of {self.population / self.queries:.1f} ({100 * pruned:.1f}% pruned)\n"
+              f"Matches per query: {self.matches / self.queries:.1f}\n")
+
+
+class SpatialIndex:
+    """
+    Sort-and-sweep index on the x-axis of a set of points.
+    Defences stand on a line along the x-axis, so sorting on x prunes most points outside of a defence's range.
+    The index is built for a single frame, it does not follow moving points.
+    """
+    def __init__(self, xs: np.ndarray, ys: np.ndarray, stats: Optional[QueryStats] = None):
+        """
+
+        :param xs: x coordinates of the points
+        :param ys: y coordinates of the points
+        :param stats: Optional counter of the work done by queries.
+        """
+        self.xs = xs
+        self.ys = ys
+        self.order = np.argsort(xs, kind='stable')
+        self.sorted_xs = xs[self.order]
+        self.stats = stats
+
+    def query(self, p: Vector, radius: float) -> np.ndarray:
+        """
+        Find the points closer than radius to p.
+        :param p: Center of the query.
+        :param radius: Query radius.
+        :return: Indices of the points in range, in ascending order.
+        """
+        # The window is slightly wider than radius so rounding can't drop a point the exact test accepts
+        window = radius * (1. + 1e-9)
+        lo = np.searchsorted(self.sorted_xs, p.x - window, side='left')
+        hi = np.searchsorted(self.sorted_xs, p.x + window, side='right')
+        candidates = np.sort(self.order[lo:hi])
+        distances = np.sqrt(np.square(p.x - self.xs[candidates]) + np.square(p.y - self.ys[candidates]))
+        matches = candidates[distances < radius]
+        if self.stats is not None:
+            self.stats.register(len(self.xs), len(candidates), len(matches))
+        return matches
+
+
+class IndexedMissiles(Sequence):
+    """
+    A list of missiles together with a SpatialIndex of their current positions.
+    The index is built on the first range query, so frames without queries don't pay for it.
+    """
+    def __init__(self, missiles: List[IMissile], stats: Optional[QueryStats] = None):
+        self.missiles = missiles
+        self.stats = stats
+        self._index: Optional[SpatialIndex] = None
+
+    def in_range(self, p: Vector, range_: float) -> List[IMissile]:
+        """
+        Find the missiles closer than range_ to p.
+        :param p: Center of the query.
+        :param range_: Query radius.
+        :return: The missiles in range, in list order.
+        """
+        if self._index is None:
+            xs = np.array([missile.p.x for missile in self.missiles], dtype=float)
+            ys = np.array([missile.p.y for missile in self.missiles], dtype=float)
+            self._index = SpatialIndex(xs, ys, self.stats)
+        return [self.missiles[i] for i in self._index.query(p, range_)]
+
+    def __len__(self) -> int:
+        return len(self.missiles)
+
+    def __getitem__(self, index):
+        return self.missiles[index]
@@ -1,7 +1,8 @@
+from typing import Tuple
+
 import numpy as np
 
 from .simulation_settings import SimulationSettings
-from .util import Vector
 
 
 class Spawner:
@@ -13,22 +14,22 @@ class Spawner:
         self.target_area_radius = simulation_settings.target_radius
         self.minimum_theta = np.deg2rad(simulation_settings.minimum_incoming_missile_angle)
 
-    def generate(self, velocity: float) -> (Vector, Vector):
+    def generate_many(self, velocity: float, count: int,
+                      random: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Generates a position and velocity for a Missile such that it targets a certain target on the ground.
-        :param velocity: Absolute velocity of the missile.
-        :return: A tuple of two vectors, position and velocity
+        Generates positions and velocities for a batch of Missiles such that each targets a certain target on the
+        ground.
+        :param velocity: Absolute velocity of the missiles.
+        :param count: Number of missiles.
+        :param random: Random number generator to draw the spawn angles and ground targets from.
+        :return: A tuple of two arrays of shape (count, 2), positions and velocities
         """
-        theta = self.minimum_theta + np.random.random() * (np.pi - 2 * self.minimum_theta)
-        p = Vector()
-        p.x = np.cos(theta) * self.spawn_radius
-        p.y = np.sin(theta) * self.spawn_radius
+        theta = self.minimum_theta + random.random(count) * (np.pi - 2 * self.minimum_theta)
+        p = np.stack((np.cos(theta), np.sin(theta)), axis=1) * self.spawn_radius
 
-        target_x = (1. - 2. * np.random.random()) * self.target_area_radius
+        target_x = (1. - 2. * random.random(count)) * self.target_area_radius
 
-        v = Vector()
-        v.x = target_x - p.x
-        v.y = 0. - p.y
-        v.normalize(velocity)
+        v = np.stack((target_x - p[:, 0], 0. - p[:, 1]), axis=1)
+        v *= (velocity / np.sqrt(np.square(v[:, 0]) + np.square(v[:, 1])))[:, np.newaxis]
 
         return p, v
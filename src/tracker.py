@@ -1,45 +1,243 @@
+import csv
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
 from .defences import IDefenceProjectile
+from .drawable import Drawable
 from .missiles import IMissile
 
+# Event column name to the dtype it is stored with
+EVENT_COLUMNS = {"kind": np.int8, "frame": np.int64, "time": np.float64, "class": np.int16,
+                 "x": np.float32, "y": np.float32, "damage": np.float32}
+
 
 class Tracker:
     """
     Tracks various statistics during the simulation.
+    Next to the running totals, every event (launch, fire, intercept, target hit, ground hit) is recorded with its
+    frame, time, class and position. The events are stored in numpy columns that grow when needed, a few tens of
+    bytes per event, and can be queried with array operations or exported to .npz or CSV.
     """
-    def __init__(self):
+    LAUNCH = 0
+    FIRE = 1
+    INTERCEPT = 2
+    TARGET_HIT = 3
+    GROUND_HIT = 4  # a missile that hit the ground outside of the target
+    EVENT_NAMES = ("launch", "fire", "intercept", "target hit", "ground hit")
+
+    def __init__(self, capacity: int = 1024):
+        """
+
+        :param capacity: Initial number of events to allocate, the columns grow when needed.
+        """
         self.missiles_launched = {}
         self.projectiles_fired = {}
         self.missiles_hit_target = {}
         self.missiles_intercepted = {}
         self.damage_received = 0
 
+        self.frame = 0
+        self.time = 0.
+        self.size = 0  # number of recorded events
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in EVENT_COLUMNS.items()}
+        # Class names of the events, the class column holds the index in this list
+        self.class_names: List[str] = []
+        self._class_codes = {}
+
+    def set_frame(self, frame: int, time: float):
+        """
+        Sets the frame and time of the events that are registered next.
+        """
+        self.frame = frame
+        self.time = time
+
     def register_missile_launch(self, missile: IMissile):
         name = missile.__class__.__name__
         self.default_register(self.missiles_launched, name)
+        self.record_event(self.LAUNCH, missile)
 
     def register_projectile_fire(self, projectile: IDefenceProjectile):
         name = projectile.__class__.__name__
         self.default_register(self.projectiles_fired, name)
+        self.record_event(self.FIRE, projectile)
 
     def register_missile_hit_target(self, missile: IMissile):
         name = missile.__class__.__name__
         self.default_register(self.missiles_hit_target, name)
-        self.damage_received += missile.get_damage()
+        damage = missile.get_damage()
+        self.damage_received += damage
+        self.record_event(self.TARGET_HIT, missile, damage)
 
     def register_missile_intercept(self, missile: IMissile):
         name = missile.__class__.__name__
         self.default_register(self.missiles_intercepted, name)
+        self.record_event(self.INTERCEPT, missile)
+
+    def register_missile_ground_hit(self, missile: IMissile):
+        """
+        A missile that hit the ground outside of the target, it only adds an event.
+        """
+        self.record_event(self.GROUND_HIT, missile)
+
+    def record_event(self, kind: int, entity: Drawable, damage: float = 0.):
+        """
+        Appends an event at the current frame.
+        :param kind: One of the event constants, e.g. Tracker.LAUNCH.
+        :param entity: The missile or projectile of the event, its class and position are stored.
+        :param damage: Damage done by the event.
+        """
+        if self.size == len(self.columns["kind"]):
+            self._reserve(max(1, 2 * self.size))
+        name = entity.__class__.__name__
+        code = self._class_codes.get(name)
+        if code is None:
+            code = self._class_codes[name] = len(self.class_names)
+            self.class_names.append(name)
+        row = self.size
+        columns = self.columns
+        columns["kind"][row] = kind
+        columns["frame"][row] = self.frame
+        columns["time"][row] = self.time
+        columns["class"][row] = code
+        columns["x"][row] = entity.p.x
+        columns["y"][row] = entity.p.y
+        columns["damage"][row] = damage
+        self.size += 1
+
+    def merge(self, other: 'Tracker'):
+        """
+        Adds the totals and events of another tracker, e.g. one of a part of the world run by another process.
+        The events stay sorted on frame, events of the same frame keep their order within each tracker.
+        """
+        for register, other_register in ((self.missiles_launched, other.missiles_launched),
+                                         (self.projectiles_fired, other.projectiles_fired),
+                                         (self.missiles_hit_target, other.missiles_hit_target),
+                                         (self.missiles_intercepted, other.missiles_intercepted)):
+            for name, count in other_register.items():
+                register[name] = register.get(name, 0) + count
+        self.damage_received += other.damage_received
+
+        if other.size == 0:
+            return
+        for name in other.class_names:
+            if name not in self._class_codes:
+                self._class_codes[name] = len(self.class_names)
+                self.class_names.append(name)
+        codes = np.array([self._class_codes[name] for name in other.class_names], dtype=np.int16)
+        size = self.size + other.size
+        if size > len(self.columns["kind"]):
+            self._reserve(size)
+        for name, column in self.columns.items():
+            values = other.columns[name][:other.size]
+            column[self.size:size] = codes[values] if name == "class" else values
+        order = np.argsort(self.columns["frame"][:size], kind='stable')
+        for column in self.columns.values():
+            column[:size] = column[:size][order]
+        self.size = size
+
+    def _reserve(self, capacity: int):
+        for name, column in self.columns.items():
+            new = np.zeros(capacity, dtype=column.dtype)
+            new[:self.size] = column[:self.size]
+            self.columns[name] = new
+
+    def events(self, kind: Optional[int] = None, class_name: Optional[str] = None) -> dict:
+        """
+        The recorded events, optionally filtered.
+        :param kind: Only events of this kind, e.g. Tracker.INTERCEPT.
+        :param class_name: Only events of entities of this class, e.g. "BoostMissile".
+        :return: Dictionary of column name to the values of the events, in the order they were recorded
+        """
+        mask = np.ones(self.size, dtype=bool)
+        if kind is not None:
+            mask &= self.columns["kind"][:self.size] == kind
+        if class_name is not None:
+            code = self._class_codes.get(class_name, -1)
+            mask &= self.columns["class"][:self.size] == code
+        return {name: column[:self.size][mask] for name, column in self.columns.items()}
+
+    def rate(self, kind: int, interval: float = 1., end_time: Optional[float] = None) -> np.ndarray:
+        """
+        Number of events of a kind per time interval, e.g. the intercepts per second.
+        :param kind: One of the event constants.
+        :param interval: Length of an interval (s).
+        :param end_time: Time of the last counted events, default the time of the last event. Events at exactly
+            end_time are counted, in the interval that starts at or before it.
+        :return: Count per interval, interval i covers [i * interval, (i + 1) * interval)
+        """
+        times = self.events(kind)["time"]
+        if end_time is None:
+            end_time = float(np.max(self.columns["time"][:self.size])) if self.size else 0.
+        bins = int(end_time // interval) + 1
+        counts = np.bincount((times // interval).astype(np.int64), minlength=bins)
+        return counts[:bins]
+
+    def cumulative(self, kind: int) -> tuple:
+        """
+        Running total of the events of a kind.
+        :return: Times of the events and the number of events up to and including each of them
+        """
+        times = self.events(kind)["time"]
+        return times, np.arange(1, len(times) + 1)
+
+    def counts_by_class(self, kind: int) -> dict:
+        """
+        Number of events of a kind per class name.
+        """
+        counts = np.bincount(self.events(kind)["class"], minlength=len(self.class_names))
+        return {name: int(count) for name, count in zip(self.class_names, counts) if count > 0}
+
+    def write_events(self, path: Path):
+        """
+        Writes the recorded events to a file.
+        :param path: A .npz file gets the columns as arrays with the event and class names, a .csv file gets one
+            row per event with the names written out.
+        """
+        path = Path(path)
+        columns = {name: column[:self.size] for name, column in self.columns.items()}
+        if path.suffix == ".npz":
+            np.savez(str(path), event_names=np.array(self.EVENT_NAMES), class_names=np.array(self.class_names),
+                     **columns)
+        elif path.suffix == ".csv":
+            event_names = np.array(self.EVENT_NAMES)[columns.pop("kind")]
+            class_names = np.array(self.class_names or [""])[columns.pop("class")]
+            with open(str(path), 'w', newline='') as file_obj:
+                writer = csv.writer(file_obj)
+                writer.writerow(("event", "class") + tuple(columns.keys()))
+                writer.writerows(zip(event_names, class_names, *(column.tolist() for column in columns.values())))
+        else:
+            raise Exception(f"Unsupported event output: {path}, use .npz or .csv")
 
     def results(self):
         """
         Prints statistics results to the console.
         :return:
         """
-        print(f"Missile launches: {self.sum_register(self.missiles_launched)}\n"
-              f"Projectiles fired: {self.sum_register(self.projectiles_fired)}\n"
-              f"Missiles hit target: {self.sum_register(self.missiles_hit_target)}\n"
-              f"Missiles intercepted: {self.sum_register(self.missiles_intercepted)}\n"
-              f"Damage received: {self.damage_received:.2f}\n")
+        self.print_summary(self.summary())
+
+    @staticmethod
+    def print_summary(summary: dict):
+        """
+        Prints a summary, e.g. one that was stored, like results does.
+        """
+        print(f"Missile launches: {summary['missiles launched']}\n"
+              f"Projectiles fired: {summary['projectiles fired']}\n"
+              f"Missiles hit target: {summary['missiles hit target']}\n"
+              f"Missiles intercepted: {summary['missiles intercepted']}\n"
+              f"Damage received: {summary['damage received']:.2f}\n")
+
+    def summary(self) -> dict:
+        """
+        Totals of the statistics, summed over the missile and projectile types.
+        :return: Dictionary of statistic name to total
+        """
+        return {"missiles launched": self.sum_register(self.missiles_launched),
+                "projectiles fired": self.sum_register(self.projectiles_fired),
+                "missiles hit target": self.sum_register(self.missiles_hit_target),
+                "missiles intercepted": self.sum_register(self.missiles_intercepted),
+                "damage received": self.damage_received}
 
     @staticmethod
     def sum_register(register: dict):
@@ -0,0 +1,139 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .frame_state import FrameState, Style
+
+# Column name to the dtype it is stored with
+COLUMNS = {"id": np.int64, "type": np.uint16, "x": np.float32, "y": np.float32, "alive": np.uint8}
+META_FILE = "meta.json"
+FRAME_OFFSETS_FILE = "frame_offsets.bin"
+
+
+class TrajectoryWriter:
+    """
+    Records the entity state of every frame to a trajectory directory, so frames can be rendered later.
+    Every column is an append-only binary file, rows of a frame are contiguous. The row offsets of the frames
+    and a table of the entity types are written when the writer is closed.
+    An entity that disappeared gets one last row with alive 0 in the frame it disappeared.
+    """
+    def __init__(self, directory: Path, frame_rate: float, metadata: Optional[dict] = None):
+        """
+
+        :param directory: Output directory, created if it does not exist.
+        :param frame_rate: Simulation frame rate.
+        :param metadata: Optional extra information stored with the trajectory, e.g. viewer settings.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.frame_rate = frame_rate
+        self.metadata = metadata or {}
+        self.styles: List[Style] = []
+        self._style_codes: Dict[Style, int] = {}
+        self._files = {name: open(str(self.directory / f"{name}.bin"), 'wb') for name in COLUMNS}
+        self._frame_offsets = [0]
+        self._previous: Optional[FrameState] = None
+        self._previous_types = np.zeros(0, dtype=np.uint16)
+
+    def write_frame(self, state: FrameState):
+        """
+        Appends the state of one frame.
+        :param state: State of all entities of the frame.
+        """
+        # Map the style codes of the state onto the type table of the file
+        lookup = np.array([self._type_code(style) for style in state.styles], dtype=np.uint16)
+        types = lookup[state.style_codes] if len(state) > 0 else np.zeros(0, dtype=np.uint16)
+
+        columns = {"id": [state.ids], "type": [types], "x": [state.x], "y": [state.y],
+                   "alive": [np.ones(len(state), dtype=np.uint8)]}
+        if self._previous is not None:
+            gone = ~np.isin(self._previous.ids, state.ids)
+            if gone.any():
+                columns["id"].append(self._previous.ids[gone])
+                columns["type"].append(self._previous_types[gone])
+                columns["x"].append(self._previous.x[gone])
+                columns["y"].append(self._previous.y[gone])
+                columns["alive"].append(np.zeros(np.count_nonzero(gone), dtype=np.uint8))
+
+        rows = 0
+        for name, parts in columns.items():
+            column = np.concatenate(parts).astype(COLUMNS[name], copy=False)
+            column.tofile(self._files[name])
+            rows = len(column)
+        self._frame_offsets.append(self._frame_offsets[-1] + rows)
+        self._previous = state
+        self._previous_types = types
+
+    def close(self):
+        """
+        Flushes the columns and writes the frame offsets and the metadata.
+        """
+        for file_obj in self._files.values():
+            file_obj.close()
+        np.array(self._frame_offsets, dtype=np.int64).tofile(str(self.directory / FRAME_OFFSETS_FILE))
+        meta = {"frame rate": self.frame_rate,
+                "frames": len(self._frame_offsets) - 1,
+                "types": [{"class": class_name, "shape": shape, "rgb": list(rgb), "scale": scale}
+                          for class_name, shape, rgb, scale in self.styles],
+                **self.metadata}
+        with open(str(self.directory / META_FILE), 'w') as file_obj:
+            json.dump(meta, file_obj, indent=2)
+
+    def _type_code(self, style: Style) -> int:
+        if style not in self._style_codes:
+            self._style_codes[style] = len(self.styles)
+            self.styles.append(style)
+        return self._style_codes[style]
+
+
+class Trajectory:
+    """
+    Read access to a trajectory directory written by a TrajectoryWriter.
+    The columns are memory mapped, so only the frames that are used are read from disk.
+    """
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        if not (self.directory / META_FILE).exists():
+            raise FileNotFoundError(f"Could not find trajectory: {str(self.directory)}")
+        with open(str(self.directory / META_FILE)) as file_obj:
+            self.meta = json.load(file_obj)
+        self.frame_rate: float = self.meta["frame rate"]
+        self.styles: List[Style] = [(type_["class"], type_["shape"], tuple(type_["rgb"]), type_["scale"])
+                                    for type_ in self.meta["types"]]
+        self.frame_offsets = np.fromfile(str(self.directory / FRAME_OFFSETS_FILE), dtype=np.int64)
+        self.columns = {}
+        for name, dtype in COLUMNS.items():
+            path = self.directory / f"{name}.bin"
+            # np.memmap can't map empty files
+            if path.stat().st_size > 0:
+                self.columns[name] = np.memmap(str(path), dtype=dtype, mode='r')
+            else:
+                self.columns[name] = np.zeros(0, dtype=dtype)
+
+    def __len__(self) -> int:
+        """Number of frames"""
+        return len(self.frame_offsets) - 1
+
+    def frame_index(self, time: float) -> int:
+        """
+        Index of the frame at a simulation time, frame i is recorded after i + 1 updates.
+        """
+        return int(np.clip(round(time * self.frame_rate) - 1, 0, len(self) - 1))
+
+    def frame(self, index: int, alive_only: bool = True) -> FrameState:
+        """
+        The state of a single frame.
+        :param index: Frame index.
+        :param alive_only: Leave out the rows of entities that disappeared in this frame.
+        """
+        rows = slice(self.frame_offsets[index], self.frame_offsets[index + 1])
+        ids = np.asarray(self.columns["id"][rows])
+        types = np.asarray(self.columns["type"][rows]).astype(np.int64)
+        x = np.asarray(self.columns["x"][rows], dtype=float)
+        y = np.asarray(self.columns["y"][rows], dtype=float)
+        if alive_only:
+            alive = np.asarray(self.columns["alive"][rows]).astype(bool)
+            ids, types, x, y = ids[alive], types[alive], x[alive], y[alive]
+        return FrameState(ids, types, x, y, self.styles)
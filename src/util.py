@@ -1,42 +1,65 @@
+import math
+from typing import Optional, Tuple
+
 import numpy as np
 
 
 class Vector:
     """
     A helper class for storing world information.
+    The in-place operators (+=, -=, *=) and add_scaled change the vector itself instead of creating a new one,
+    beware that other objects may hold a reference to the same vector.
     """
+    __slots__ = ('x', 'y')
+
     def __init__(self, x=0, y=0):
         self.x: float = x
         self.y: float = y
 
-    def __add__(self, other):
-        new = Vector()
-        new.x = self.x + other.x
-        new.y = self.y + other.y
-        return new
+    def __add__(self, other: 'Vector'):
+        return Vector(self.x + other.x, self.y + other.y)
 
-    def __iadd__(self, other):
-        assert isinstance(other, Vector)
+    def __iadd__(self, other: 'Vector'):
         self.x += other.x
         self.y += other.y
+        return self
 
     def __sub__(self, other: 'Vector'):
-        assert isinstance(other, Vector)
-        new = Vector()
-        new.x = self.x - other.x
-        new.y = self.y - other.y
-        return new
+        return Vector(self.x - other.x, self.y - other.y)
+
+    def __isub__(self, other: 'Vector'):
+        self.x -= other.x
+        self.y -= other.y
+        return self
 
     def __mul__(self, other: float):
         other = float(other)
-        new = Vector()
-        new.x = self.x * other
-        new.y = self.y * other
-        return new
+        return Vector(self.x * other, self.y * other)
 
     def __rmul__(self, other):
         return self.__mul__(other)
 
+    def __imul__(self, other: float):
+        other = float(other)
+        self.x *= other
+        self.y *= other
+        return self
+
+    def __repr__(self):
+        return f"Vector({self.x}, {self.y})"
+
+    def add_scaled(self, other: 'Vector', scale: float):
+        """
+        Add a scaled vector in place, self += scale * other without creating an intermediate vector.
+        :param other: Vector to add.
+        :param scale: Factor other is multiplied with.
+        """
+        self.x += scale * other.x
+        self.y += scale * other.y
+
+    def copy(self) -> 'Vector':
+        return Vector(self.x, self.y)
+
     def normalize(self, r: float = 1.):
         """
         Normalize the absolute value Vector.
@@ -44,49 +67,153 @@ class Vector:
         :return:
         """
         norm = self.get_norm()
-        self.x *= r/norm
-        self.y *= r/norm
-
-    def get_norm(self):
+        if norm == 0:
+            # A zero vector has no direction, leave it as it is
+            return
+        factor = r/norm
+        self.x *= factor
+        self.y *= factor
+
+    def get_norm(self) -> float:
         """Get the absolute value of the Vector."""
-        return np.sqrt(np.square(self.x) + np.square(self.y))
+        return math.hypot(self.x, self.y)
 
 
-def distance(p1: Vector, p2: Vector):
+def distance(p1: Vector, p2: Vector) -> float:
     """Calculate the distance between two points."""
-    return np.sqrt(np.square(p1.x-p2.x) + np.square(p1.y-p2.y))
+    return math.hypot(p1.x - p2.x, p1.y - p2.y)
 
 
-def intercept(target_p: Vector, target_v: Vector, intercept_p: Vector, intercept_speed: float) ->Vector:
+def intercept_many(target_p: np.ndarray, target_v: np.ndarray, intercept_p: np.ndarray,
+                   intercept_speed) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Creates interception trajectories for many (shooter, target) pairs at once.
+    The projectile meets the target at time t when |target_p - intercept_p + target_v * t| = intercept_speed * t,
+    which is a quadratic in t that is solved in closed form. The earliest positive solution is taken.
+    :param target_p: Target positions, array of shape (n, 2)
+    :param target_v: Target velocities, array of shape (n, 2)
+    :param intercept_p: Starting locations of the interception projectiles, array of shape (n, 2)
+    :param intercept_speed: Absolute speed of the interception projectiles, scalar or array of shape (n,)
+    :return: A tuple of the velocities (n, 2) that result in interception, a mask of the pairs for which
+        interception is possible (n,) and the times to intercept (n,).
+        Velocities are nan and times are inf for pairs that can not be intercepted.
+    """
+    target_p = np.asarray(target_p, dtype=float).reshape(-1, 2)
+    target_v = np.asarray(target_v, dtype=float).reshape(-1, 2)
+    intercept_p = np.asarray(intercept_p, dtype=float).reshape(-1, 2)
+    speed = np.broadcast_to(np.asarray(intercept_speed, dtype=float), (len(target_p),))
+
+    d = target_p - intercept_p
+    a = np.einsum('ij,ij->i', target_v, target_v) - np.square(speed)
+    b = 2. * np.einsum('ij,ij->i', d, target_v)
+    c = np.einsum('ij,ij->i', d, d)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        discriminant = np.square(b) - 4. * a * c
+        root = np.sqrt(np.maximum(discriminant, 0.))
+        # Numerically stable form of the "ABC" formula, t1 * t2 = c / a
+        q = -0.5 * (b + np.copysign(root, b))
+        t1 = q / a
+        t2 = c / q
+        # Target as fast as the projectile, the equation is linear: b * t + c = 0
+        linear = np.abs(a) <= 1e-12 * np.maximum(np.square(speed), 1.)
+        t_linear = -c / b
+        t1 = np.where(linear, t_linear, t1)
+        t2 = np.where(linear, t_linear, t2)
+
+        t1 = np.where((t1 > 0) & np.isfinite(t1), t1, np.inf)
+        t2 = np.where((t2 > 0) & np.isfinite(t2), t2, np.inf)
+        time = np.minimum(t1, t2)
+        time = np.where(linear | (discriminant >= 0), time, np.inf)
+        feasible = np.isfinite(time) & (speed > 0)
+
+        velocities = d / time[:, np.newaxis] + target_v
+    velocities[~feasible] = np.nan
+    time[~feasible] = np.inf
+    return velocities, feasible, time
+
+
+def intercept(target_p: Vector, target_v: Vector, intercept_p: Vector, intercept_speed: float) -> Optional[Vector]:
     """
     Creates an interception trajectory for the target.
+    Scalar version of intercept_many, plain float arithmetic is much faster than numpy for a single pair. The two
+    give the same solutions, see tst/test_util.py.
     :param target_p: Target position
     :param target_v: Target velocity
     :param intercept_p: Starting location of interception projectile.
     :param intercept_speed: Absolute speed of interception projectile.
-    :return: A velocity that results in interception with the target.
+    :return: A velocity that results in interception with the target, None if the target can not be intercepted.
+    """
+    dx = target_p.x - intercept_p.x
+    dy = target_p.y - intercept_p.y
+    a = target_v.x * target_v.x + target_v.y * target_v.y - intercept_speed * intercept_speed
+    b = 2. * (dx * target_v.x + dy * target_v.y)
+    c = dx * dx + dy * dy
+
+    times = []
+    if abs(a) <= 1e-12 * max(intercept_speed * intercept_speed, 1.):
+        if b != 0.:
+            times.append(-c / b)
+    else:
+        discriminant = b * b - 4. * a * c
+        if discriminant >= 0.:
+            q = -0.5 * (b + math.copysign(math.sqrt(discriminant), b))
+            times.append(q / a)
+            if q != 0.:
+                times.append(c / q)
+    times = [time for time in times if time > 0. and math.isfinite(time)]
+
+    if len(times) == 0 or intercept_speed <= 0:
+        return None
+    time = min(times)
+    return Vector(dx / time + target_v.x, dy / time + target_v.y)
+
+
+def closest_approach_many(relative_p: np.ndarray, relative_v: np.ndarray,
+                          delta_time: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Swept collision test of many pairs of moving objects over a time step.
+    In the frame of the second object the first moves along the segment relative_p + relative_v * t, t in
+    [0, delta_time], the pair collides when the segment comes closer to the origin than the sum of their radii.
+    Unlike comparing positions at the end of the step, this doesn't depend on the size of the step.
+    :param relative_p: Positions of the first objects relative to the second at the start of the step, shape (n, 2)
+    :param relative_v: Velocities of the first objects relative to the second, shape (n, 2)
+    :param delta_time: Length of the step, scalar or array of shape (n,)
+    :return: A tuple of the times in [0, delta_time] the pairs are closest (n,) and their distances then (n,).
+        A time below delta_time means the pair passed its closest approach within the step, or before it.
+    """
+    relative_p = np.asarray(relative_p, dtype=float).reshape(-1, 2)
+    relative_v = np.asarray(relative_v, dtype=float).reshape(-1, 2)
+    speed_squared = np.einsum('ij,ij->i', relative_v, relative_v)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        time = np.where(speed_squared > 0., -np.einsum('ij,ij->i', relative_p, relative_v) / speed_squared, 0.)
+    time = np.clip(time, 0., delta_time)
+    closest = relative_p + relative_v * time[:, np.newaxis]
+    return time, np.sqrt(np.square(closest[:, 0]) + np.square(closest[:, 1]))
+
+
+def closest_approach(relative_p: Vector, relative_v: Vector, delta_time: float) -> Tuple[float, float]:
+    """
+    Swept collision test of a pair of moving objects over a time step.
+    Scalar version of closest_approach_many.
+    :param relative_p: Position of the first object relative to the second at the start of the step.
+    :param relative_v: Velocity of the first object relative to the second.
+    :param delta_time: Length of the step.
+    :return: A tuple of the time in [0, delta_time] the pair is closest and their distance then
+    """
+    speed_squared = relative_v.x * relative_v.x + relative_v.y * relative_v.y
+    time = 0.
+    if speed_squared > 0.:
+        time = min(max(-(relative_p.x * relative_v.x + relative_p.y * relative_v.y) / speed_squared, 0.), delta_time)
+    return time, math.hypot(relative_p.x + relative_v.x * time, relative_p.y + relative_v.y * time)
+
+
+def ground_impact_x(p: Vector, v: Vector) -> float:
+    """
+    The x where an object that moved in a straight line to p, below the ground, crossed y = 0.
+    :param p: Position below the ground.
+    :param v: Velocity.
     """
-    p = intercept_p - target_p
-    # This code is implementing solution to numerical equation done on paper.
-    # find roots of interception equation using "ABC" formula
-    firing_solution = Vector()
-    firing_solution.y = intercept_speed
-    if p.y != 0.0:
-        Q = target_v.x - p.x/p.y * target_v.y
-        A = 1 + np.square(p.x/p.y)
-        B = 2 * Q * p.y/p.x
-        C = np.square(Q) - np.square(intercept_speed)
-        roots = np.roots([A, B, C])
-        roots = [root for root in roots if root > 0 and np.isreal(root)]
-
-        if len(roots) > 0:
-            v_y = roots[0]
-            v_x = Q + p.x/p.y * v_y
-            firing_solution.x = v_x
-            firing_solution.y = v_y
-
-    # TODO p.y==0  This also has a possible firing solution
-    # TODO not all targets may be intercepted with the intercept_speed given,
-    #  but taking this into account would require some code rework, so now a projectile is launched in up y
-
-    return firing_solution
+    if v.y >= 0.:
+        return p.x
+    return p.x - v.x * p.y / v.y
@@ -1,22 +1,85 @@
-from typing import List
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Deque, List, Optional, Tuple
 
 import cv2
 import imageio
 import numpy as np
 
 from .defences import IDefenceProjectile, IDefence
+from .drawable import SHAPES
+from .frame_pipeline import FramePipeline
+from .frame_state import FrameState
 from .missiles import IMissile
 from .util import Vector
 from .viewer_settings import ViewerSettings
 
 
+class FrameWriter:
+    """
+    Writes frames to a file one by one as they are produced.
+    .avi files are written as MJPEG by OpenCV, which encodes every frame as it arrives, so the frames don't have to
+    be kept in memory. GIF and other image formats are written by imageio, whose pillow writer keeps all frames
+    until close and only then encodes the file. For those formats streaming saves no memory over export_gif, the
+    number of frames is bounded by Viewer.GIF_FRAMES_CAP instead.
+    """
+    VIDEO_SUFFIXES = ('.avi',)
+
+    def __init__(self, file_name: str, frame_rate: float, pixels_x: int, pixels_y: int):
+        """
+
+        :param file_name: File name of output file, the suffix determines the format.
+        :param frame_rate: Frame rate of the output file.
+        :param pixels_x: Frame width.
+        :param pixels_y: Frame height.
+        """
+        self.video = Path(file_name).suffix.lower() in self.VIDEO_SUFFIXES
+        if self.video:
+            self.writer = cv2.VideoWriter(file_name, cv2.VideoWriter_fourcc(*'MJPG'), frame_rate,
+                                          (pixels_x, pixels_y))
+        else:
+            self.writer = imageio.get_writer(file_name, mode='I', duration=1/frame_rate)
+
+    def write(self, img: np.ndarray):
+        if self.video:
+            # Frames are RGB, OpenCV writes BGR
+            self.writer.write(cv2.cvtColor(img, cv2.COLOR_RGB2BGR))
+        else:
+            self.writer.append_data(img)
+
+    def close(self):
+        if self.video:
+            self.writer.release()
+        else:
+            self.writer.close()
+
+
 class Viewer:
     """
     A simple viewer that creates images of the world state.
     """
+    GROUND_PIXEL_HEIGHT = 10
+    # Workaround for an issue that saving large GIFS takes minutes
+    GIF_FRAMES_CAP = 100
+
     def __init__(self, viewer_settings: ViewerSettings):
         self.settings = viewer_settings
         self.frames = []
+        # Simulation frames per drawn frame, see plan
+        self.render_stride = 1
+        self.output_frame_rate: Optional[float] = None
+        # Streaming export, see open_stream
+        self.stream_file: Optional[str] = None
+        self.stream: Optional[FrameWriter] = None
+        # The background is drawn once, every frame starts as a copy of it in a reused buffer
+        self._background_image: Optional[np.ndarray] = None
+        self._buffer: Optional[np.ndarray] = None
+        # Threaded rasterization, see draw_state
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pending: Deque[Future] = deque()
+        # Pipelined rendering and encoding, see draw_state
+        self._pipeline: Optional[FramePipeline] = None
 
     def draw_frame(self, missiles: List[IMissile], projectiles: List[IDefenceProjectile], defences: List[IDefence]):
         """
@@ -26,20 +89,7 @@ class Viewer:
         :param defences: List of Defences
         """
         # TODO It would be nicer to have something like: draw_frame(self, world_state: WorldState)
-
-        img = np.zeros((self.settings.pixels_y, self.settings.pixels_x, 3), np.uint8)
-
-        # create simple sky and ground background
-        GROUND_PIXEL_HEIGHT = 10
-        cv2.rectangle(img, (0, 0), (self.settings.pixels_x, self.settings.pixels_y),
-                      color=(135, 206, 250), thickness=-1)
-        cv2.rectangle(img, (0, 0), (self.settings.pixels_x, GROUND_PIXEL_HEIGHT),
-                      color=(52, 140, 49), thickness=-1)
-
-        # Image offsets to move world origin to lower center of image (actually upper center, but we flip later)
-        offset = Vector()
-        offset.x = int(self.settings.pixels_x/2)
-        offset.y = GROUND_PIXEL_HEIGHT
+        img, offset = self._background()
 
         for missile in missiles:
             missile.draw(img, missile.p, offset)
@@ -50,8 +100,174 @@ class Viewer:
         for defence in defences:
             defence.draw(img, defence.p, offset)
 
-        img = cv2.flip(img, 0)
-        self.frames.append(img)
+        self._add_frame(img)
+
+    def draws_states(self) -> bool:
+        """
+        Whether frames are rasterized off the caller's thread, then the caller should hand them over with
+        draw_state instead of draw_frame.
+        """
+        return bool(self.settings.render_threads or self.settings.pipelined_rendering)
+
+    def draw_state(self, state: FrameState):
+        """
+        Draws frame for a recorded world state.
+        With the "render threads" viewer setting the state is rasterized on a thread pool, the frames are
+        added to the output in the order they were drawn. With the "pipelined rendering" viewer setting the
+        frames are rasterized and written to the output on their own threads, see FramePipeline. Call flush to
+        wait for the outstanding frames.
+        :param state: Positions and styles of the entities, it must not be changed afterwards.
+        """
+        threads = self.settings.render_threads
+        if self.settings.pipelined_rendering:
+            if self._pipeline is None:
+                self._background_template()
+                self._pipeline = FramePipeline(self._rasterize_new, self._add_new_frame, threads or 1,
+                                               self.settings.pipeline_queue_size)
+            try:
+                self._pipeline.submit(state)
+            except BaseException:
+                # The pipeline stopped its threads on the error
+                self._pipeline = None
+                raise
+            return
+
+        if not threads:
+            img, offset = self._background()
+            self._rasterize(img, offset, state)
+            self._add_frame(img)
+            return
+
+        if self._pool is None:
+            self._background_template()
+            self._pool = ThreadPoolExecutor(threads, thread_name_prefix="viewer")
+        # Limit the frames in flight, so memory stays bounded when rasterizing falls behind
+        while len(self._pending) >= 2 * threads:
+            self._add_frame(self._pending.popleft().result(), copy=False)
+        self._pending.append(self._pool.submit(self._rasterize_new, state))
+        while self._pending and self._pending[0].done():
+            self._add_frame(self._pending.popleft().result(), copy=False)
+
+    def flush(self):
+        """
+        Waits for the frames that are rasterized on the thread pool or in the pipeline and adds them to the output.
+        """
+        if self._pipeline is not None:
+            pipeline, self._pipeline = self._pipeline, None
+            pipeline.close()
+        while self._pending:
+            self._add_frame(self._pending.popleft().result(), copy=False)
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _rasterize_new(self, state: FrameState) -> np.ndarray:
+        """Draws a state into a new image, runs on the thread pool"""
+        img = self._background_template().copy()
+        self._rasterize(img, self._origin(), state)
+        return img
+
+    @staticmethod
+    def _rasterize(img: np.ndarray, offset: Vector, state: FrameState):
+        shapes = [(SHAPES[shape], rgb, scale) for _, shape, rgb, scale in state.styles]
+        for style_code, x, y in zip(state.style_codes, state.x, state.y):
+            shape, rgb, scale = shapes[style_code]
+            shape.draw(img, Vector(x, y), offset, rgb, scale)
+
+    def _background(self) -> Tuple[np.ndarray, Vector]:
+        """
+        Copies the background into the frame buffer.
+        :return: The frame buffer and the pixel position of the world origin.
+        """
+        background = self._background_template()
+        if self._buffer is None or self._buffer.shape != background.shape:
+            self._buffer = np.empty(background.shape, np.uint8)
+        np.copyto(self._buffer, background)
+        return self._buffer, self._origin()
+
+    def _background_template(self) -> np.ndarray:
+        shape = (self.settings.pixels_y, self.settings.pixels_x, 3)
+        if self._background_image is None or self._background_image.shape != shape:
+            self._background_image = self._create_background()
+        return self._background_image
+
+    def _origin(self) -> Vector:
+        # World origin at lower center of image, image rows point down so world y is subtracted from offset.y
+        offset = Vector()
+        offset.x = int(self.settings.pixels_x/2)
+        offset.y = self.settings.pixels_y - 1 - self.GROUND_PIXEL_HEIGHT
+        return offset
+
+    def _create_background(self) -> np.ndarray:
+        """
+        Creates the static simple sky and ground background, in image row order.
+        """
+        img = np.zeros((self.settings.pixels_y, self.settings.pixels_x, 3), np.uint8)
+        cv2.rectangle(img, (0, 0), (self.settings.pixels_x, self.settings.pixels_y),
+                      color=(135, 206, 250), thickness=-1)
+        cv2.rectangle(img, (0, self.settings.pixels_y - 1 - self.GROUND_PIXEL_HEIGHT),
+                      (self.settings.pixels_x, self.settings.pixels_y), color=(52, 140, 49), thickness=-1)
+        return img
+
+    def _add_frame(self, img: np.ndarray, copy: bool = True):
+        if self.stream_file:
+            if self.stream is None:
+                self.stream = FrameWriter(self.stream_file, self.output_frame_rate or 1.,
+                                          self.settings.pixels_x, self.settings.pixels_y)
+            # The writer copies the frame, so the buffer can be reused
+            self.stream.write(img)
+        else:
+            self.frames.append(img.copy() if copy else img)
+
+    def _add_new_frame(self, img: np.ndarray):
+        """Adds a frame that is not reused, runs on the encode thread of the pipeline"""
+        self._add_frame(img, copy=False)
+
+    def plan(self, frame_rate: float, total_frames: int):
+        """
+        Chooses which simulation frames are drawn, such that only frames that end up in the output are drawn.
+        The output frame rate is limited by the "frame rate (hz)" viewer setting, the number of output frames
+        by the "max frames" viewer setting and for GIFs by GIF_FRAMES_CAP.
+        :param frame_rate: Simulation frame rate.
+        :param total_frames: Number of simulation frames.
+        """
+        stride = 1
+        if self.settings.frame_rate:
+            stride = max(1, int(round(frame_rate / self.settings.frame_rate)))
+
+        max_frames = self.settings.max_frames
+        is_video = self.stream_file and Path(self.stream_file).suffix.lower() in FrameWriter.VIDEO_SUFFIXES
+        if not is_video:
+            max_frames = min(max_frames or self.GIF_FRAMES_CAP, self.GIF_FRAMES_CAP)
+        if max_frames and int(np.ceil(total_frames / stride)) > max_frames:
+            stride = int(np.ceil(total_frames / max_frames))
+
+        self.render_stride = stride
+        self.output_frame_rate = frame_rate / stride
+
+    def wants_frame(self, frame_index: int) -> bool:
+        """
+        Whether a simulation frame should be drawn, see plan.
+        :param frame_index: Index of the simulation frame, starting at 0.
+        """
+        return frame_index % self.render_stride == 0
+
+    def open_stream(self, file_name: str):
+        """
+        Starts a streaming export, frames drawn after this are written to the file directly instead of being kept.
+        :param file_name: File name of output file, .gif or .avi.
+        """
+        self.stream_file = file_name
+
+    def close_stream(self):
+        """
+        Finishes the streaming export.
+        """
+        self.flush()
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        self.stream_file = None
 
     def export_gif(self, file_name: str, frame_rate: float):
         """
@@ -59,13 +275,13 @@ class Viewer:
         :param file_name: File name of output file.
         :param frame_rate: Simulation frame rate.
         """
+        self.flush()
         num_frames = len(self.frames)
         frames = self.frames
-        duration = 1/frame_rate
-        # Workaround for an issue that saving large GIFS takes minutes
-        GIF_FRAMES_CAP = 100
-        if num_frames > GIF_FRAMES_CAP:
-            stride = int(np.ceil(num_frames / GIF_FRAMES_CAP))
+        # Only every render_stride-th frame has been drawn
+        duration = self.render_stride/frame_rate
+        if num_frames > self.GIF_FRAMES_CAP:
+            stride = int(np.ceil(num_frames / self.GIF_FRAMES_CAP))
             duration *= stride
             frames = frames[slice(0, len(frames), stride)]
 
@@ -1,3 +1,4 @@
+from typing import Optional
 
 from .json_loadable import JSONLoadable
 
@@ -9,6 +10,11 @@ class ViewerSettings(JSONLoadable):
     def __init__(self):
         self.pixels_x: int = 0
         self.pixels_y: int = 0
+        self.frame_rate: Optional[float] = None
+        self.max_frames: Optional[int] = None
+        self.render_threads: Optional[int] = None
+        self.pipelined_rendering: bool = False
+        self.pipeline_queue_size: int = 4
 
     @staticmethod
     def get_json_name() -> str:
@@ -22,5 +28,12 @@ class ViewerSettings(JSONLoadable):
             new.pixels_y = json_data["pixels y"]
         except KeyError:
             raise Exception(f"Error loading: {cls.get_json_name()}")
+        # Optional settings
+        # Also accept the spelling of the simulation settings
+        new.frame_rate = json_data.get("frame rate (hz)", json_data.get("frame rate(hz)"))
+        new.max_frames = json_data.get("max frames")
+        new.render_threads = json_data.get("render threads")
+        new.pipelined_rendering = json_data.get("pipelined rendering", False)
+        new.pipeline_queue_size = json_data.get("pipeline queue size", 4)
 
         return new
@@ -0,0 +1,73 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from src.placement_search import PlacementSearch, SearchSpace
+from src.result_cache import ResultCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Searches the defence parameters that minimize the damage received "
+                                                 "and writes the best ones as parameter files.")
+    parser.add_argument("parameters", type=Path, help="Path to the base parameters file")
+    parser.add_argument("space", type=Path, help="Path to a JSON file with the searched parameters and their ranges")
+    parser.add_argument("--method", choices=("grid", "random", "evolution"), default="evolution",
+                        help="Search method")
+    parser.add_argument("--grid-steps", type=int, default=5,
+                        help="Grid values of a parameter range that doesn't set \"steps\"")
+    parser.add_argument("--samples", type=int, default=50, help="Number of points of the random search")
+    parser.add_argument("--population", type=int, default=16, help="Population size of the evolutionary search")
+    parser.add_argument("--generations", type=int, default=10, help="Generations of the evolutionary search")
+    parser.add_argument("--replicas", type=int, default=5, help="Seeded replicas per point")
+    parser.add_argument("--processes", type=int, default=None, help="Number of worker processes, default all cores")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the first replica and of the search")
+    parser.add_argument("--best", type=int, default=3, help="Number of parameter files to write")
+    parser.add_argument("--output", type=Path, default=Path("placements"),
+                        help="Directory for the parameter files of the best points and the results of all points")
+    parser.add_argument("--cache", type=Path, default=None,
+                        help="Result cache directory, replicas that are in the cache are not run")
+    parser.add_argument("--cache-size", type=float, default=1024, help="Size limit of the result cache (MB)")
+    args = parser.parse_args()
+    if args.method == "evolution" and args.population < 2:
+        parser.error("--population must be at least 2")
+
+    for path in (args.parameters, args.space):
+        if not path.exists():
+            print(f"Invalid file path provided: {path}")
+            sys.exit(1)
+    with open(str(args.parameters)) as file_obj:
+        json_data = json.load(file_obj)
+    with open(str(args.space)) as file_obj:
+        space = SearchSpace.load_from_json(json.load(file_obj), args.grid_steps)
+
+    cache = ResultCache(args.cache, int(args.cache_size * 2 ** 20)) if args.cache else None
+    start = time.perf_counter()
+    with PlacementSearch(json_data, space, replicas=args.replicas, seed=args.seed, processes=args.processes,
+                         cache=cache) as search:
+        if args.method == "grid":
+            search.grid_search()
+        elif args.method == "random":
+            search.random_search(args.samples)
+        else:
+            search.evolutionary_search(args.population, args.generations)
+    elapsed = time.perf_counter() - start
+
+    print(f"Evaluated {len(search.results)} points of {args.replicas} replicas in {elapsed:.1f} s")
+    for rank, (point, result) in enumerate(search.best(args.best), start=1):
+        parameters = ", ".join(f"{name} = {value:g}" for name, value in space.describe(point).items())
+        print(f"{rank}. damage received {result['damage received']:.2f}, "
+              f"intercept ratio {result['intercept ratio']:.3f}: {parameters}")
+
+    paths = search.write_best(args.output, args.best)
+    with open(str(args.output / "results.json"), 'w') as file_obj:
+        json.dump({"method": args.method, "replicas": args.replicas, "seed": args.seed, "points": search.report()},
+                  file_obj, indent=2)
+    print(f"Wrote {', '.join(str(path) for path in paths)}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Scenarios shared by the tests: the parameter file with more missiles and a shorter run.
+"""
+import sys
+import os
+import copy
+import json
+from typing import Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.json_loader import JSONLoader  # noqa: E402
+from src.scenario import load_simulation  # noqa: E402
+from src.simulation import Simulation  # noqa: E402
+
+PARAMETERS = os.path.join(os.path.dirname(__file__), '..', 'parameters.json')
+SEEDS = (0, 1, 2)
+
+
+def scenario(frequency_scale: float = 3., time: float = 30., **settings) -> dict:
+    """The parameter file with more missiles, a shorter run and extra simulation settings"""
+    with open(PARAMETERS) as file_obj:
+        json_data = json.load(file_obj)
+    for node in json_data.values():
+        if "frequency (missiles/second)" in node:
+            node["frequency (missiles/second)"] *= frequency_scale
+    json_data["simulation settings"]["simulation time (s)"] = time
+    json_data["simulation settings"].update(settings)
+    return json_data
+
+
+def run(json_data: dict, seed: int, time: Optional[float] = None) -> Simulation:
+    """Runs a seeded scenario without viewer"""
+    simulation = load_simulation(JSONLoader.from_dict(copy.deepcopy(json_data)), seed=seed)
+    simulation.run(time or simulation.simulation_settings.simulation_time, verbose=False)
+    return simulation
+
+
+def assert_same_results(test, settings: dict, **base):
+    """
+    Asserts that runs with the settings give the same Tracker totals and events as runs without, for every seed.
+    :param base: Settings of both runs.
+    """
+    for seed in SEEDS:
+        with test.subTest(seed=seed, **{key.replace(" ", "_"): value for key, value in base.items()}):
+            expected = run(scenario(**base), seed).tracker
+            tracker = run(scenario(**base, **settings), seed).tracker
+            test.assertEqual(tracker.summary(), expected.summary())
+            test.assertEqual(tracker.size, expected.size)
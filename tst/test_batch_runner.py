@@ -0,0 +1,49 @@
+import sys
+import os
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.batch_runner import BatchResults, run_batch  # noqa: E402
+from scenarios import run, scenario  # noqa: E402
+
+
+class TestBatchResults(unittest.TestCase):
+    def setUp(self):
+        self.results = BatchResults([{"missiles launched": 10, "missiles intercepted": 5, "damage received": 2.},
+                                     {"missiles launched": 0, "missiles intercepted": 0, "damage received": 0.},
+                                     {"missiles launched": 4, "missiles intercepted": 4, "damage received": 4.}])
+
+    def test_intercept_ratio(self):
+        # A replica without launches counts as a ratio of 0
+        self.assertEqual(self.results.values("intercept ratio").tolist(), [0.5, 0., 1.])
+
+    def test_statistics(self):
+        statistics = self.results.statistics()
+        self.assertAlmostEqual(statistics["damage received"]["mean"], 2.)
+        self.assertAlmostEqual(statistics["damage received"]["variance"], 4.)
+        self.assertEqual(statistics["intercept ratio"]["percentiles"]["50"], 0.5)
+        self.assertEqual(list(statistics["intercept ratio"]["percentiles"]), ["5", "25", "50", "75", "95"])
+
+    def test_single_replica(self):
+        statistics = BatchResults([{"damage received": 3.}]).statistics(["damage received"])
+        self.assertEqual(statistics["damage received"]["variance"], 0.)
+
+
+class TestRunBatch(unittest.TestCase):
+    def test_replicas_are_seeded_runs(self):
+        json_data = scenario(time=10.)
+        results = run_batch(json_data, replicas=3, seed=5, processes=1)
+        self.assertEqual([summary["seed"] for summary in results.summaries], [5, 6, 7])
+        for summary in results.summaries:
+            expected = run(json_data, summary["seed"]).tracker.summary()
+            self.assertEqual({name: value for name, value in summary.items() if name != "seed"}, expected)
+
+    def test_independent_of_processes(self):
+        json_data = scenario(time=10.)
+        self.assertEqual(run_batch(json_data, replicas=4, processes=2).summaries,
+                         run_batch(json_data, replicas=4, processes=1).summaries)
+
+
+if __name__ == '__main__':
+    unittest.main()
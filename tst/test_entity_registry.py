@@ -0,0 +1,103 @@
+import sys
+import os
+import gc
+import unittest
+import weakref
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.entity_registry import EntityRegistry  # noqa: E402
+from src.missiles import DefaultMissile  # noqa: E402
+from src.util import Vector  # noqa: E402
+from scenarios import run, scenario  # noqa: E402
+
+
+def missiles(count: int):
+    return [DefaultMissile(Vector(float(x), 100.), Vector(0., -50.)) for x in range(count)]
+
+
+class TestEntityRegistry(unittest.TestCase):
+    def test_lookup(self):
+        registry = EntityRegistry()
+        entities = missiles(3)
+        ids = [registry.add(entity) for entity in entities]
+        self.assertEqual(len(set(ids)), 3)
+        self.assertEqual([registry.id_of(entity) for entity in entities], ids)
+        self.assertIs(registry.get(ids[1]), entities[1])
+        self.assertIn(entities[2], registry)
+        self.assertEqual(len(registry), 3)
+
+    def test_remove(self):
+        registry = EntityRegistry()
+        entities = missiles(3)
+        registry.extend(entities)
+        id_ = registry.id_of(entities[1])
+        registry.remove(entities[1])
+        # Lookups see the removal immediately, the list only after flush
+        self.assertFalse(registry.is_alive(id_))
+        self.assertNotIn(entities[1], registry)
+        self.assertEqual(len(registry), 2)
+        with self.assertRaises(KeyError):
+            registry.get(id_)
+        with self.assertRaises(ValueError):
+            registry.remove(entities[1])
+        self.assertEqual(list(registry), [entities[0], entities[2]])
+
+    def test_ids_are_not_reused(self):
+        registry = EntityRegistry()
+        old, new = missiles(2)
+        old_id = registry.add(old)
+        registry.remove(old)
+        new_id = registry.add(new)
+        # The slot is reused with a higher generation
+        self.assertEqual(new_id & EntityRegistry.SLOT_MASK, old_id & EntityRegistry.SLOT_MASK)
+        self.assertNotEqual(new_id, old_id)
+        self.assertFalse(registry.is_alive(old_id))
+        self.assertIs(registry.get(new_id), new)
+
+    def test_remove_while_iterating(self):
+        registry = EntityRegistry()
+        entities = missiles(5)
+        registry.extend(entities)
+        visited = []
+        for entity in registry:
+            visited.append(entity)
+            if entity is entities[1]:
+                registry.remove(entities[1])
+                registry.remove(entities[3])
+        # Like iterating over a copy of a list
+        self.assertEqual(visited, entities)
+        registry.flush()
+        self.assertEqual(registry[:], [entities[0], entities[2], entities[4]])
+
+    def test_insertion_order(self):
+        registry = EntityRegistry()
+        entities = missiles(4)
+        registry.extend(entities[:2])
+        registry.remove(entities[0])
+        registry.extend(entities[2:])
+        self.assertEqual(list(registry), entities[1:])
+        self.assertIs(registry[0], entities[1])
+
+
+class TestTargetReferences(unittest.TestCase):
+    def test_projectiles_do_not_keep_missiles(self):
+        """Projectiles refer to their target by id, a removed missile is not kept alive by them"""
+        simulation = run(scenario(time=10.), seed=0)
+        self.assertGreater(len(simulation.projectiles), 0)
+        for projectile in simulation.projectiles:
+            self.assertIsNone(projectile.target)
+            self.assertIsNotNone(projectile.target_id)
+
+        projectile = simulation.projectiles[0]
+        target = simulation.missiles.get(projectile.target_id)
+        reference = weakref.ref(target)
+        simulation.missiles.remove(target)
+        simulation.missiles.flush()
+        del target
+        gc.collect()
+        self.assertIsNone(reference())
+
+
+if __name__ == '__main__':
+    unittest.main()
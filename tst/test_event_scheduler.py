@@ -0,0 +1,84 @@
+import sys
+import os
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.event_scheduler import EventScheduler  # noqa: E402
+from src.missile_engine import MissileEngine  # noqa: E402
+from src.missiles import BoostMissile, DefaultMissile  # noqa: E402
+from src.scheduled_missile_engine import ScheduledMissileEngine  # noqa: E402
+from src.util import Vector  # noqa: E402
+from scenarios import assert_same_results  # noqa: E402
+
+
+def missiles():
+    """Missiles that reach neither the ground nor the end of their countdown exactly at a frame"""
+    return [DefaultMissile(Vector(-100., 300.), Vector(10., -50.)),
+            BoostMissile(Vector(50., 200.), Vector(0., -40.), boost=40., countdown=0.51),
+            DefaultMissile(Vector(0., 10.5), Vector(0., -50.)),
+            BoostMissile(Vector(300., 500.), Vector(-30., -40.), boost=60., countdown=2.01)]
+
+
+class TestEventScheduler(unittest.TestCase):
+    def test_pop_due(self):
+        scheduler = EventScheduler()
+        for frame, event in ((5, "c"), (2, "a"), (5, "d"), (3, "b"), (9, "e")):
+            scheduler.schedule(frame, event)
+        self.assertEqual(scheduler.next_frame(), 2)
+        self.assertEqual(scheduler.pop_due(1), [])
+        # In frame order, events of the same frame in scheduling order
+        self.assertEqual(scheduler.pop_due(5), ["a", "b", "c", "d"])
+        self.assertEqual(len(scheduler), 1)
+        self.assertEqual(scheduler.next_frame(), 9)
+        self.assertEqual(scheduler.pop_due(100), ["e"])
+        self.assertIsNone(scheduler.next_frame())
+
+
+class TestScheduledMissileEngine(unittest.TestCase):
+    def test_same_as_missile_engine(self):
+        delta_time = 1 / 30
+        engine = MissileEngine()
+        scheduled = ScheduledMissileEngine(delta_time)
+        engine.extend(missiles())
+        scheduled.extend(missiles())
+        for frame in range(300):
+            if frame == 20:
+                # Missiles launched later are anchored at their launch frame
+                engine.extend(missiles()[:2])
+                scheduled.extend(missiles()[:2])
+            fallen = [engine.id_of(missile) for missile in engine.update(delta_time)]
+            scheduled_fallen = [scheduled.id_of(missile) for missile in scheduled.update(delta_time)]
+            self.assertEqual(scheduled_fallen, fallen)
+            for id_ in fallen:
+                engine.remove(engine.get_missile(id_))
+                scheduled.remove(scheduled.get_missile(id_))
+
+            for p, range_ in ((Vector(0., 0.), 150.), (Vector(200., 0.), 400.)):
+                self.assertEqual([scheduled.id_of(missile) for missile in scheduled.in_range(p, range_)],
+                                 [engine.id_of(missile) for missile in engine.in_range(p, range_)])
+            state = scheduled.frame_state()
+            expected = engine.frame_state()
+            self.assertEqual(state.style_codes.tolist(), expected.style_codes.tolist())
+            for x, expected_x in zip(state.x, expected.x):
+                self.assertAlmostEqual(x, expected_x, places=6)
+            for y, expected_y in zip(state.y, expected.y):
+                self.assertAlmostEqual(y, expected_y, places=6)
+        self.assertEqual(len(scheduled), 0)
+
+    def test_fixed_frame_time(self):
+        scheduled = ScheduledMissileEngine(1 / 30)
+        with self.assertRaises(Exception):
+            scheduled.update(1 / 60)
+
+
+class TestEventDrivenMissiles(unittest.TestCase):
+    def test_same_results(self):
+        assert_same_results(self, {"event driven missiles": True})
+
+    def test_same_results_batched_projectiles(self):
+        assert_same_results(self, {"event driven missiles": True, "batched projectiles": True})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import sys
+import os
+import threading
+import time
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.frame_pipeline import FramePipeline  # noqa: E402
+
+
+class StageError(Exception):
+    pass
+
+
+class TestFramePipeline(unittest.TestCase):
+    def test_encoded_in_submission_order(self):
+        rng = np.random.default_rng(0)
+        delays = rng.uniform(0, 0.002, 200)
+        encoded = []
+
+        def render(item):
+            # Render threads finish out of order
+            time.sleep(delays[item])
+            return np.full(1, item)
+
+        pipeline = FramePipeline(render, lambda image: encoded.append(int(image[0])), render_threads=4, queue_size=2)
+        for item in range(200):
+            pipeline.submit(item)
+        pipeline.close()
+        self.assertEqual(encoded, list(range(200)))
+
+    def test_items_in_flight_are_bounded(self):
+        render_threads, queue_size = 2, 3
+        lock = threading.Lock()
+        counts = {"submitted": 0, "encoded": 0, "most": 0}
+
+        def encode(image):
+            # The slowest stage, the producer has to wait for it
+            time.sleep(0.002)
+            with lock:
+                counts["encoded"] += 1
+
+        pipeline = FramePipeline(lambda item: np.zeros(1), encode, render_threads, queue_size)
+        for item in range(100):
+            pipeline.submit(item)
+            with lock:
+                counts["submitted"] += 1
+                counts["most"] = max(counts["most"], counts["submitted"] - counts["encoded"])
+        pipeline.close()
+        self.assertEqual(counts["encoded"], 100)
+        self.assertLessEqual(counts["most"], 2 * queue_size + render_threads)
+
+    def test_submit_after_close(self):
+        pipeline = FramePipeline(lambda item: np.zeros(1), lambda image: None)
+        pipeline.close()
+        with self.assertRaises(Exception):
+            pipeline.submit(0)
+
+
+class TestFramePipelineErrors(unittest.TestCase):
+    def run_failing(self, fail_render: bool, items: int = 50, fail_at: int = 10):
+        encoded = []
+
+        def render(item):
+            if fail_render and item == fail_at:
+                raise StageError(item)
+            return np.full(1, item)
+
+        def encode(image):
+            if not fail_render and image[0] == fail_at:
+                raise StageError(int(image[0]))
+            encoded.append(int(image[0]))
+
+        pipeline = FramePipeline(render, encode, render_threads=2, queue_size=2)
+        with self.assertRaises(StageError):
+            for item in range(items):
+                submitted = item
+                pipeline.submit(item)
+                # Slow producer, so the error is seen by a submit rather than by close
+                time.sleep(0.001)
+            pipeline.close()
+        return pipeline, encoded, submitted
+
+    def assert_stopped(self, pipeline: FramePipeline):
+        for thread in pipeline._render_threads + [pipeline._encode_thread]:
+            self.assertFalse(thread.is_alive())
+
+    def test_render_error_stops_the_threads(self):
+        pipeline, encoded, submitted = self.run_failing(fail_render=True)
+        self.assert_stopped(pipeline)
+        self.assertLess(submitted, 49)
+        self.assertEqual(encoded, list(range(10)))
+
+    def test_encode_error_stops_the_threads(self):
+        pipeline, encoded, _ = self.run_failing(fail_render=False)
+        self.assert_stopped(pipeline)
+        self.assertEqual(encoded, list(range(10)))
+
+    def test_error_is_raised_once(self):
+        pipeline, _, _ = self.run_failing(fail_render=True)
+        pipeline.close()
+
+    def test_error_raised_by_close(self):
+        pipeline = FramePipeline(lambda item: 1 / item, lambda image: None)
+        pipeline.submit(0)
+        with self.assertRaises(ZeroDivisionError):
+            pipeline.close()
+        self.assert_stopped(pipeline)
+        self.assertEqual([thread for thread in threading.enumerate() if thread.name.startswith("pipeline")], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import sys
+import os
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.defences import BulletDefence, IDefence, SeekerDefence  # noqa: E402
+from src.json_loadable import JSONLoadable  # noqa: E402
+from src.json_loader import JSONLoader  # noqa: E402
+from src.missiles import BoostMissileGenerator, DefaultMissileGenerator  # noqa: E402
+from scenarios import PARAMETERS, scenario  # noqa: E402
+
+
+class TestRegistry(unittest.TestCase):
+    def test_registered(self):
+        self.assertIs(JSONLoadable.registry["bullet defence"], BulletDefence)
+        self.assertEqual(JSONLoadable.registered(IDefence), [BulletDefence, SeekerDefence])
+
+    def test_duplicate_name(self):
+        with self.assertRaises(Exception):
+            class OtherDefence(BulletDefence):
+                @staticmethod
+                def get_json_name() -> str:
+                    return "seeker defence"
+
+
+class TestJSONLoader(unittest.TestCase):
+    def test_load(self):
+        loader = JSONLoader(Path(PARAMETERS))
+        defences = loader.load_defences()
+        self.assertEqual([type(defence) for defence in defences], [BulletDefence] * 5 + [SeekerDefence] * 2)
+        self.assertEqual([defence.p.x for defence in defences[:5]], [-20, 30, 70, 150, -150])
+        generators = loader.load_missiles()
+        self.assertEqual([type(generator) for generator in generators],
+                         [DefaultMissileGenerator, DefaultMissileGenerator, BoostMissileGenerator])
+
+    def test_node_names(self):
+        """A node belongs to the class whose name it contains, anywhere in the node name"""
+        json_data = scenario()
+        json_data["west seeker defence"] = json_data.pop("seeker defence 1")
+        json_data["unrelated node"] = {}
+        defences = JSONLoader.from_dict(json_data).load_defences()
+        self.assertEqual([type(defence) for defence in defences], [BulletDefence] * 5 + [SeekerDefence] * 2)
+        self.assertEqual(defences[-1].p.x, 0)
+
+    def test_missing_file(self):
+        with self.assertRaises(FileNotFoundError):
+            JSONLoader(Path(PARAMETERS).with_name("missing.json"))
+
+    def test_missing_unique_node(self):
+        json_data = scenario()
+        del json_data["viewer settings"]
+        with self.assertRaises(Exception):
+            JSONLoader.from_dict(json_data).load_viewer_settings()
+
+
+class TestLoadArrays(unittest.TestCase):
+    def test_matching_entries(self):
+        columns = JSONLoader(Path(PARAMETERS)).load_arrays(BulletDefence)
+        self.assertEqual(columns["node"].tolist(), [f"bullet defence {index}" for index in range(1, 6)])
+        np.testing.assert_array_equal(columns["location (m)"], [-20, 30, 70, 150, -150])
+        np.testing.assert_array_equal(columns["reload time (s)"], [5, 1.5, 5, 5, 1.5])
+        self.assertEqual(columns["reload time (s)"].dtype, np.float64)
+        # The same values as the loaded objects
+        defences = JSONLoader(Path(PARAMETERS)).load_defences()[:5]
+        np.testing.assert_array_equal(columns["range (m)"], [defence.range for defence in defences])
+
+    def test_mismatching_entries(self):
+        json_data = scenario()
+        json_data["bullet defence 3"]["projectile radius (m)"] = 2.
+        with self.assertRaises(Exception) as context:
+            JSONLoader.from_dict(json_data).load_arrays(BulletDefence)
+        self.assertIn("bullet defence 3", str(context.exception))
+
+        del json_data["bullet defence 3"]["projectile radius (m)"]
+        del json_data["bullet defence 4"]["accuracy (%)"]
+        with self.assertRaises(Exception):
+            JSONLoader.from_dict(json_data).load_arrays(BulletDefence)
+
+    def test_no_nodes(self):
+        json_data = {name: node for name, node in scenario().items() if "boost missile" not in name}
+        columns = JSONLoader.from_dict(json_data).load_arrays(BoostMissileGenerator)
+        self.assertEqual(list(columns), ["node"])
+        self.assertEqual(len(columns["node"]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
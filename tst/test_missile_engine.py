@@ -0,0 +1,92 @@
+import sys
+import os
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.missile_engine import MissileEngine  # noqa: E402
+from src.missiles import BoostMissile, DefaultMissile, IMissile  # noqa: E402
+from src.util import Vector  # noqa: E402
+from scenarios import assert_same_results  # noqa: E402
+
+
+def missiles():
+    return [DefaultMissile(Vector(-100., 300.), Vector(10., -50.)),
+            BoostMissile(Vector(50., 200.), Vector(0., -40.), boost=40., countdown=0.5),
+            DefaultMissile(Vector(0., 10.), Vector(0., -50.))]
+
+
+class TestMissileEngine(unittest.TestCase):
+    def setUp(self):
+        self.missiles = missiles()
+        self.engine = MissileEngine(capacity=1)
+        self.engine.extend(self.missiles)
+
+    def test_update_matches_missile_objects(self):
+        for _ in range(30):
+            fallen = self.engine.update(1 / 30)
+            for missile in self.missiles:
+                missile.update(1 / 30)
+        for missile, view in zip(self.missiles, self.engine):
+            self.assertAlmostEqual(view.p.x, missile.p.x)
+            self.assertAlmostEqual(view.p.y, missile.p.y)
+            self.assertAlmostEqual(view.v.get_norm(), missile.v.get_norm())
+        self.assertTrue(list(self.engine)[1].boost_triggered_flag)
+        self.assertEqual([missile.entity_id for missile in fallen], [self.missiles[2].entity_id])
+
+    def test_remove(self):
+        view = self.engine.get_missile(1)
+        self.engine.remove(view)
+        self.assertFalse(self.engine.is_alive(1))
+        self.assertNotIn(view, self.engine)
+        self.assertEqual(len(self.engine), 2)
+        with self.assertRaises(KeyError):
+            self.engine.get_missile(1)
+        with self.assertRaises(ValueError):
+            self.engine.remove(view)
+        # Compaction keeps the launch order and the ids
+        self.engine.update(1 / 30)
+        self.assertEqual([missile.entity_id for missile in self.engine],
+                         [self.missiles[0].entity_id, self.missiles[2].entity_id])
+        self.assertTrue(self.engine.is_alive(2))
+
+    def test_views_are_kept_in_sync(self):
+        view = self.engine.get_missile(0)
+        self.assertIs(self.engine.get_missile(0), view)
+        self.engine.update(1.)
+        self.assertAlmostEqual(view.p.x, -90.)
+        self.assertAlmostEqual(view.p.y, 250.)
+        self.assertEqual(self.engine.id_of(view), 0)
+
+    def test_in_range_in_launch_order(self):
+        in_range = self.engine.in_range(Vector(0., 0.), 400.)
+        self.assertEqual([missile.entity_id for missile in in_range], [missile.entity_id for missile in self.missiles])
+        self.assertEqual(len(self.engine.in_range(Vector(0., 0.), 100.)), 1)
+
+    def test_frame_state(self):
+        state = self.engine.frame_state()
+        self.assertEqual(state.style_codes.tolist(), [0, 1, 0])
+        self.assertEqual(state.styles, MissileEngine.STYLES)
+
+    def test_unsupported_missile(self):
+        class OtherMissile(IMissile):
+            def update(self, delta_time: float):
+                pass
+
+            def get_damage(self) -> float:
+                return 1.
+
+        with self.assertRaises(Exception):
+            MissileEngine().extend([OtherMissile()])
+
+
+class TestVectorizedMissiles(unittest.TestCase):
+    def test_same_results(self):
+        assert_same_results(self, {"vectorized missiles": True})
+
+    def test_same_results_swept(self):
+        assert_same_results(self, {"vectorized missiles": True}, **{"swept collisions": True})
+
+
+if __name__ == '__main__':
+    unittest.main()
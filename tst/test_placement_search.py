@@ -0,0 +1,33 @@
+import sys
+import os
+import json
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.placement_search import PlacementSearch, SearchSpace  # noqa: E402
+
+PARAMETERS = os.path.join(os.path.dirname(__file__), '..', 'parameters.json')
+
+
+class TestEvolutionarySearch(unittest.TestCase):
+    def setUp(self):
+        with open(PARAMETERS) as file_obj:
+            self.json_data = json.load(file_obj)
+        self.json_data["simulation settings"]["simulation time (s)"] = 5
+
+    def test_population_below_two_is_rejected(self):
+        space = SearchSpace.load_from_json({"bullet defence 1": {"location (m)": {"min": -50, "max": 50}}})
+        with PlacementSearch(self.json_data, space, replicas=1, processes=1) as search:
+            with self.assertRaises(Exception):
+                search.evolutionary_search(1, 1)
+
+    def test_single_point_space(self):
+        space = SearchSpace.load_from_json({"bullet defence 1": {"location (m)": [-20]}})
+        with PlacementSearch(self.json_data, space, replicas=1, processes=1) as search:
+            search.evolutionary_search(4, 2)
+        self.assertEqual(list(search.results), [(-20,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
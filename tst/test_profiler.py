@@ -0,0 +1,90 @@
+import sys
+import os
+import csv
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.json_loader import JSONLoader  # noqa: E402
+from src.profiler import PhaseProfiler  # noqa: E402
+from src.scenario import load_simulation  # noqa: E402
+from src.simulation import Simulation  # noqa: E402
+from src.viewer import Viewer  # noqa: E402
+from scenarios import run, scenario  # noqa: E402
+
+
+def profiler() -> PhaseProfiler:
+    """Three frames of two phases, on a profiler that has to grow"""
+    new = PhaseProfiler(("a", "b"), capacity=1)
+    for frame, (a, b) in enumerate(((0.001, 0.002), (0.003, 0.), (0.002, 0.004)), start=1):
+        new.start_frame(frame, missiles=frame, projectiles=2 * frame, active_defences=1)
+        new.record(0, a)
+        new.record(1, b / 2)
+        new.record(1, b / 2)
+    return new
+
+
+class TestPhaseProfiler(unittest.TestCase):
+    def test_summary(self):
+        summary = profiler().summary()
+        self.assertEqual(list(summary), ["a", "b", "frame"])
+        self.assertAlmostEqual(summary["a"]["total (s)"], 0.006)
+        self.assertAlmostEqual(summary["a"]["mean (ms)"], 2.)
+        self.assertAlmostEqual(summary["b"]["max (ms)"], 4.)
+        self.assertAlmostEqual(summary["frame"]["p50 (ms)"], 3.)
+
+    def test_columns(self):
+        columns = profiler().columns()
+        self.assertEqual(columns["frame"], [1, 2, 3])
+        self.assertEqual(columns["projectiles"], [2, 4, 6])
+        self.assertEqual(len(columns["b (ms)"]), 3)
+
+    def test_empty(self):
+        self.assertEqual(PhaseProfiler(("a",)).summary()["a"]["max (ms)"], 0.)
+
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.csv")
+            profiler().write(path)
+            with open(path, newline='') as file_obj:
+                rows = list(csv.reader(file_obj))
+            self.assertEqual(rows[0], ["frame", "a (ms)", "b (ms)", "missiles", "projectiles", "active defences"])
+            self.assertEqual(len(rows), 4)
+
+            path = os.path.join(directory, "profile.json")
+            profiler().write(path)
+            with open(path) as file_obj:
+                data = json.load(file_obj)
+            self.assertEqual(data["frames"]["frame"], [1, 2, 3])
+            self.assertIn("frame", data["summary"])
+
+            with self.assertRaises(Exception):
+                profiler().write(os.path.join(directory, "profile.txt"))
+
+
+class TestSimulationProfiling(unittest.TestCase):
+    def test_same_results(self):
+        json_data = scenario(time=10.)
+        expected = run(json_data, 0).tracker.summary()
+        simulation = load_simulation(JSONLoader.from_dict(json_data), seed=0)
+        simulation.enable_profiling()
+        simulation.run(10., verbose=False)
+        self.assertEqual(simulation.tracker.summary(), expected)
+        self.assertEqual(simulation.profiler.size, 10 * simulation.simulation_settings.frame_rate)
+        self.assertEqual(simulation.profiler.phases, Simulation.PROFILED_PHASES)
+
+    def test_no_clock_without_profiler(self):
+        json_data = scenario(time=2.)
+        json_data["viewer settings"] = {"pixels x": 64, "pixels y": 48}
+        loader = JSONLoader.from_dict(json_data)
+        simulation = load_simulation(loader, Viewer(loader.load_viewer_settings()), seed=0)
+        with mock.patch('src.simulation.perf_counter') as perf_counter:
+            simulation.run(2., verbose=False)
+        self.assertEqual(perf_counter.call_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+import sys
+import os
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.defences import BulletProjectile, IDefenceProjectile, SeekerProjectile  # noqa: E402
+from src.entity_registry import EntityRegistry  # noqa: E402
+from src.missile_engine import MissileEngine  # noqa: E402
+from src.missiles import DefaultMissile  # noqa: E402
+from src.projectile_engine import ProjectileEngine  # noqa: E402
+from src.util import Vector  # noqa: E402
+from scenarios import assert_same_results  # noqa: E402
+
+
+def missiles():
+    return [DefaultMissile(Vector(-100., 300.), Vector(10., -50.)),
+            DefaultMissile(Vector(200., 400.), Vector(-20., -50.))]
+
+
+def projectiles(targets, target_ids):
+    """A bullet that misses, a bullet that hits and two seekers"""
+    fired = [BulletProjectile(Vector(0., 0.), Vector(0., 300.), 0.9, targets[0], hit_roll=0.95),
+             BulletProjectile(Vector(0., 0.), Vector(-100., 300.), 0.9, targets[0], hit_roll=0.1),
+             SeekerProjectile(Vector(0., 0.), Vector(0., 200.), 5., targets[0]),
+             SeekerProjectile(Vector(100., 0.), Vector(0., 200.), 5., targets[1])]
+    for projectile, target_id in zip(fired, target_ids):
+        projectile.target_id = target_id
+    return fired
+
+
+class TestProjectileEngine(unittest.TestCase):
+    def run_frames(self, missile_store, frames: int = 90, delta_time: float = 1 / 30):
+        """Runs the engine and the projectile objects side by side, returns the hits of both"""
+        targets = list(missile_store)
+        by_id = {missile_store.id_of(target): target for target in targets}
+        target_ids = [missile_store.id_of(targets[0])] * 3 + [missile_store.id_of(targets[1])]
+        engine = ProjectileEngine(capacity=1)
+        engine.extend(projectiles(targets, target_ids))
+        objects = projectiles(targets, target_ids)
+        engine_hits = []
+        object_hits = []
+        for _ in range(frames):
+            engine_hits.extend(engine.update(delta_time, missile_store))
+            for projectile in list(objects):
+                projectile.update(delta_time, by_id[projectile.target_id])
+                if projectile.hit():
+                    object_hits.append(projectile.target_id)
+                if projectile.hit_flag or projectile.miss():
+                    objects.remove(projectile)
+            if isinstance(missile_store, MissileEngine):
+                missile_store.update(delta_time)
+            else:
+                for target in targets:
+                    target.update(delta_time)
+            for projectile, state in zip(objects, engine):
+                self.assertAlmostEqual(projectile.p.x, state.p.x)
+                self.assertAlmostEqual(projectile.p.y, state.p.y)
+        return engine_hits, object_hits
+
+    def test_update_matches_projectile_objects(self):
+        registry = EntityRegistry()
+        registry.extend(missiles())
+        engine_hits, object_hits = self.run_frames(registry)
+        self.assertEqual(engine_hits, object_hits)
+        self.assertEqual(len(engine_hits), 3)
+
+    def test_targets_from_missile_engine(self):
+        registry = EntityRegistry()
+        registry.extend(missiles())
+        expected, _ = self.run_frames(registry)
+
+        missile_engine = MissileEngine()
+        missile_engine.extend(missiles())
+        # Views of the engine are kept in sync with its arrays, the projectile objects read those
+        engine_hits, object_hits = self.run_frames(missile_engine)
+        self.assertEqual(engine_hits, object_hits)
+        self.assertEqual(len(engine_hits), len(expected))
+
+    def test_seeker_on_its_target(self):
+        registry = EntityRegistry()
+        target = DefaultMissile(Vector(0., 100.), Vector(0., -50.))
+        target_id = registry.add(target)
+        seeker = SeekerProjectile(Vector(0., 100.), Vector(0., 200.), 0., target)
+        seeker.target_id = target_id
+        engine = ProjectileEngine()
+        engine.extend([seeker])
+        engine.update(1 / 30, registry)
+        seeker.update(1 / 30, target)
+        # No direction to turn to, the seeker is left with a zero velocity instead of nan
+        self.assertFalse(np.isnan(engine.v[:engine.size]).any())
+        self.assertEqual((seeker.v.x, seeker.v.y), (0., 0.))
+        self.assertEqual(engine.v[:engine.size].tolist(), [[0., 0.]])
+
+    def test_retire(self):
+        registry = EntityRegistry()
+        targets = missiles()
+        registry.extend(targets)
+        target_ids = [registry.id_of(target) for target in targets]
+        engine = ProjectileEngine()
+        engine.extend(projectiles(targets, [target_ids[0]] * 3 + [target_ids[1]]))
+        registry.remove(targets[0])
+        engine.retire(registry.is_alive)
+        self.assertEqual(len(engine), 1)
+        self.assertEqual(engine.target_ids[0], target_ids[1])
+
+    def test_frame_state(self):
+        targets = missiles()
+        engine = ProjectileEngine()
+        engine.extend(projectiles(targets, [0, 0, 0, 1]))
+        state = engine.frame_state()
+        self.assertEqual(state.style_codes.tolist(), [ProjectileEngine.BULLET] * 2 + [ProjectileEngine.SEEKER] * 2)
+        self.assertEqual(state.styles, ProjectileEngine.STYLES)
+
+    def test_unsupported_projectile(self):
+        class OtherProjectile(IDefenceProjectile):
+            def update(self, delta_time: float, target):
+                pass
+
+            def hit(self) -> bool:
+                return False
+
+            def miss(self) -> bool:
+                return False
+
+        with self.assertRaises(Exception):
+            ProjectileEngine().extend([OtherProjectile()])
+
+
+class TestBatchedProjectiles(unittest.TestCase):
+    def test_same_results(self):
+        assert_same_results(self, {"batched projectiles": True})
+
+    def test_same_results_vectorized_missiles(self):
+        assert_same_results(self, {"batched projectiles": True}, **{"vectorized missiles": True})
+
+    def test_same_results_swept(self):
+        assert_same_results(self, {"batched projectiles": True}, **{"swept collisions": True})
+
+    def test_same_results_substeps(self):
+        # At a coarse frame rate, so seekers take substeps
+        assert_same_results(self, {"batched projectiles": True},
+                            **{"swept collisions": True, "max substeps": 8, "frame rate(hz)": 5.})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import sys
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.json_loader import JSONLoader  # noqa: E402
+from src.result_cache import ResultCache, scenario_key  # noqa: E402
+from src.scenario import run_headless  # noqa: E402
+from scenarios import run, scenario  # noqa: E402
+
+
+class TestScenarioKey(unittest.TestCase):
+    def test_stable(self):
+        json_data = scenario()
+        key = scenario_key(JSONLoader.from_dict(json_data), 0)
+        self.assertEqual(scenario_key(JSONLoader.from_dict(scenario()), 0), key)
+        # Node names don't change the results
+        renamed = {(f"east {name}" if "defence" in name else name): node for name, node in json_data.items()}
+        self.assertEqual(scenario_key(JSONLoader.from_dict(renamed), 0), key)
+
+    def test_sensitive(self):
+        key = scenario_key(JSONLoader.from_dict(scenario()), 0)
+        self.assertNotEqual(scenario_key(JSONLoader.from_dict(scenario()), 1), key)
+        self.assertNotEqual(scenario_key(JSONLoader.from_dict(scenario(frequency_scale=2.)), 0), key)
+        self.assertNotEqual(scenario_key(JSONLoader.from_dict(scenario(time=20.)), 0), key)
+
+
+class TestResultCache(unittest.TestCase):
+    def test_get_put(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(Path(directory))
+            self.assertIsNone(cache.get("a"))
+            cache.put("a", {"missiles": 3})
+            self.assertEqual(cache.get("a"), {"missiles": 3})
+            self.assertIsNone(cache.trajectory("a"))
+            self.assertGreater(cache.size(), 0)
+            cache.clear()
+            self.assertIsNone(cache.get("a"))
+            self.assertEqual(cache.size(), 0)
+
+    def test_trajectory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            trajectory = Path(directory) / "trajectory"
+            trajectory.mkdir()
+            (trajectory / "positions.bin").write_bytes(b"0123")
+            cache = ResultCache(Path(directory) / "cache")
+            cache.put("a", {"missiles": 3})
+            # An entry with trajectory replaces one without
+            cache.put("a", {"missiles": 3}, trajectory)
+            self.assertEqual((cache.trajectory("a") / "positions.bin").read_bytes(), b"0123")
+            # and is not replaced by one without
+            cache.put("a", {"missiles": 4})
+            self.assertEqual(cache.get("a"), {"missiles": 3})
+            self.assertIsNotNone(cache.trajectory("a"))
+
+    def test_evict_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(Path(directory))
+            summary = {"padding": "x" * 1000}
+            cache.put("a", summary)
+            cache.put("b", summary)
+            os.utime(os.path.join(directory, "a"), (1., 1.))
+            os.utime(os.path.join(directory, "b"), (2., 2.))
+            # A read marks "a" as used, "b" is the least recently used entry
+            cache.get("a")
+            cache.max_bytes = cache.size()
+            cache.put("c", summary)
+            self.assertIsNone(cache.get("b"))
+            self.assertIsNotNone(cache.get("a"))
+            self.assertIsNotNone(cache.get("c"))
+
+
+class TestRunHeadless(unittest.TestCase):
+    def test_cached(self):
+        json_data = scenario(time=5.)
+        expected = run(json_data, 0).tracker.summary()
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(Path(directory))
+            self.assertEqual(run_headless(json_data, 0, cache), expected)
+            self.assertEqual(cache.get(scenario_key(JSONLoader.from_dict(json_data), 0)), expected)
+            with mock.patch('src.scenario.load_simulation') as load_simulation:
+                self.assertEqual(run_headless(json_data, 0, cache), expected)
+            load_simulation.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import sys
+import os
+import contextlib
+import io
+import json
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+from scaling_benchmark import build_scenario, compare, DEFENCE_SPACING, parse_list, run_case  # noqa: E402
+from scenarios import PARAMETERS, run  # noqa: E402
+
+
+def base() -> dict:
+    with open(PARAMETERS) as file_obj:
+        return json.load(file_obj)
+
+
+class TestBuildScenario(unittest.TestCase):
+    def test_scaling(self):
+        parameters = base()
+        scenario = build_scenario(parameters, 2., 12, 60., 5., {"vectorized missiles": True})
+        settings = scenario["simulation settings"]
+        self.assertEqual((settings["frame rate(hz)"], settings["simulation time (s)"]), (60., 5.))
+        self.assertTrue(settings["vectorized missiles"])
+        self.assertEqual(scenario["default missile 1"]["frequency (missiles/second)"],
+                         2. * parameters["default missile 1"]["frequency (missiles/second)"])
+        # The base file is not changed
+        self.assertNotIn("vectorized missiles", parameters["simulation settings"])
+
+        defences = [node for key, node in scenario.items() if "defence" in key]
+        self.assertEqual(len(defences), 12)
+        base_locations = [node["location (m)"] for key, node in parameters.items() if "defence" in key]
+        # The first copies keep the locations of the base file, the next ones alternate left and right
+        self.assertEqual([node["location (m)"] for node in defences[:len(base_locations)]], base_locations)
+        self.assertEqual(defences[len(base_locations)]["location (m)"], base_locations[0] - DEFENCE_SPACING)
+
+    def test_run_case(self):
+        scenario = build_scenario(base(), 1., 4, 30., 5., {})
+        case = {"name": "test", "scenario": scenario, "frequency scale": 1., "defences": 4, "frame rate": 30.,
+                "viewer": False, "seed": 0}
+        result = run_case(case)
+        self.assertEqual(result["frames"], 150)
+        self.assertEqual(result["summary"], run(scenario, 0).tracker.summary())
+        self.assertGreater(result["frames per second"], 0)
+
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            compare([result], {"metadata": {"date": "baseline"}, "cases": [result]}, 0.1)
+        self.assertIn("1.00x", output.getvalue())
+
+
+class TestParseList(unittest.TestCase):
+    def test_parse_list(self):
+        self.assertEqual(parse_list("1,2.5", float), [1., 2.5])
+        self.assertEqual(parse_list("30", int), [30])
+
+
+if __name__ == '__main__':
+    unittest.main()
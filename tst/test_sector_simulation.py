@@ -0,0 +1,43 @@
+import sys
+import os
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.json_loader import JSONLoader  # noqa: E402
+from src.sector_simulation import SectorSimulation  # noqa: E402
+from scenarios import run, scenario  # noqa: E402
+
+
+class TestSectorSimulation(unittest.TestCase):
+    def assert_sectors_equal(self, **settings):
+        json_data = scenario(frequency_scale=5., time=20., **settings)
+        for seed in (0, 1):
+            expected = run(json_data, seed).tracker
+            for sectors in (1, 2, 3):
+                with self.subTest(seed=seed, sectors=sectors):
+                    simulation = SectorSimulation(JSONLoader.from_dict(json_data), sectors, seed=seed)
+                    simulation.run(20., verbose=False)
+                    self.assertEqual(simulation.tracker.summary(), expected.summary())
+                    self.assertEqual(simulation.tracker.size, expected.size)
+
+    def test_totals_equal_single_process(self):
+        self.assert_sectors_equal()
+
+    def test_totals_equal_single_process_swept(self):
+        self.assert_sectors_equal(**{"swept collisions": True, "max substeps": 8})
+
+    def test_sector_boundaries(self):
+        boundaries = SectorSimulation.sector_boundaries([-20., 30., 70., 150.], 2, 800.)
+        np.testing.assert_allclose(boundaries, [50.])
+        np.testing.assert_allclose(SectorSimulation.sector_boundaries([], 4, 800.), [-400., 0., 400.])
+
+    def test_invalid_sectors(self):
+        with self.assertRaises(Exception):
+            SectorSimulation(JSONLoader.from_dict(scenario()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import sys
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.simulation import Simulation  # noqa: E402
+from src.snapshot import SimulationSnapshot  # noqa: E402
+from scenarios import run, scenario  # noqa: E402
+
+# Settings of the missile and projectile containers, a snapshot of each continues like the uninterrupted run
+ENGINE_MODES = ({},
+                {"vectorized missiles": True},
+                {"event driven missiles": True},
+                {"batched projectiles": True},
+                {"vectorized missiles": True, "batched projectiles": True},
+                {"event driven missiles": True, "batched projectiles": True})
+
+
+class TestSnapshot(unittest.TestCase):
+    def test_restore_continues_the_run(self):
+        for mode in ENGINE_MODES:
+            with self.subTest(mode=mode):
+                json_data = scenario(**mode)
+                expected = run(json_data, seed=1).tracker
+
+                simulation = run(json_data, seed=1, time=15.)
+                snapshot = simulation.snapshot()
+                for _ in range(2):
+                    # Every restore is an independent branch
+                    restored = Simulation.restore(snapshot)
+                    restored.run(15., verbose=False)
+                    self.assertEqual(restored.tracker.summary(), expected.summary())
+                    self.assertEqual(restored.tracker.size, expected.size)
+
+    def test_saved_snapshot(self):
+        json_data = scenario()
+        expected = run(json_data, seed=2).tracker
+        simulation = run(json_data, seed=2, time=10.)
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "snapshot.bin"
+            simulation.snapshot().save(path)
+            restored = Simulation.restore(SimulationSnapshot.load(path))
+        restored.run(20., verbose=False)
+        self.assertEqual(restored.tracker.summary(), expected.summary())
+
+    def test_snapshot_is_not_affected_by_the_run(self):
+        simulation = run(scenario(), seed=0, time=10.)
+        snapshot = simulation.snapshot()
+        size = len(snapshot)
+        simulation.run(10., verbose=False)
+        self.assertEqual(len(snapshot), size)
+        self.assertEqual(Simulation.restore(snapshot).frame, int(10. * 30))
+
+
+if __name__ == '__main__':
+    unittest.main()
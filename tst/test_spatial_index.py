@@ -0,0 +1,59 @@
+import sys
+import os
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.missiles import DefaultMissile  # noqa: E402
+from src.spatial_index import IndexedMissiles, QueryStats, SpatialIndex  # noqa: E402
+from src.util import distance, Vector  # noqa: E402
+
+
+class TestSpatialIndex(unittest.TestCase):
+    def test_query_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        xs = rng.uniform(-1000., 1000., 500)
+        ys = rng.uniform(0., 1000., 500)
+        index = SpatialIndex(xs, ys)
+        for x, radius in [(0., 300.), (-900., 250.), (950., 1000.), (2000., 100.)]:
+            expected = np.flatnonzero(np.sqrt(np.square(x - xs) + np.square(ys)) < radius)
+            self.assertEqual(index.query(Vector(x, 0.), radius).tolist(), expected.tolist())
+
+    def test_boundary(self):
+        index = SpatialIndex(np.array([100., -100., 0.]), np.array([0., 0., 100.]))
+        # Points at exactly the radius are out of range, like the distance test of the list path
+        self.assertEqual(index.query(Vector(0., 0.), 100.).tolist(), [])
+        self.assertEqual(index.query(Vector(0., 0.), 100.001).tolist(), [0, 1, 2])
+
+    def test_stats(self):
+        stats = QueryStats()
+        index = SpatialIndex(np.array([0., 10., 500.]), np.array([50., 0., 0.]), stats)
+        index.query(Vector(0., 0.), 20.)
+        index.query(Vector(500., 0.), 1.)
+        self.assertEqual(stats.queries, 2)
+        self.assertEqual(stats.population, 6)
+        # The first query computes the distances of the two points within 20 m on x, only one is in range
+        self.assertEqual(stats.candidates, 3)
+        self.assertEqual(stats.matches, 2)
+
+
+class TestIndexedMissiles(unittest.TestCase):
+    def test_in_range_in_list_order(self):
+        missiles = [DefaultMissile(Vector(x, 100.), Vector(0., -50.)) for x in (300., -50., 0., 50., -400.)]
+        indexed = IndexedMissiles(missiles)
+        in_range = indexed.in_range(Vector(0., 0.), 200.)
+        self.assertEqual(in_range, [missile for missile in missiles if distance(Vector(0., 0.), missile.p) < 200.])
+        self.assertEqual(in_range, missiles[1:4])
+
+    def test_sequence(self):
+        missiles = [DefaultMissile(Vector(x, 100.), Vector(0., -50.)) for x in (300., -50.)]
+        indexed = IndexedMissiles(missiles)
+        self.assertEqual(len(indexed), 2)
+        self.assertIs(indexed[1], missiles[1])
+        self.assertEqual(list(indexed), missiles)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import sys
+import os
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.json_loader import JSONLoader  # noqa: E402
+from src.missiles import BoostMissileGenerator, DefaultMissileGenerator  # noqa: E402
+from src.scenario import load_simulation  # noqa: E402
+from src.simulation_settings import SimulationSettings  # noqa: E402
+from src.spawner import Spawner  # noqa: E402
+from scenarios import scenario  # noqa: E402
+
+
+def spawner() -> Spawner:
+    settings = SimulationSettings()
+    settings.target_radius = 100.
+    settings.missile_spawn_radius = 2000.
+    settings.minimum_incoming_missile_angle = 30.
+    return Spawner(settings)
+
+
+def generator(frequency: float, seed: int = 0) -> DefaultMissileGenerator:
+    new = DefaultMissileGenerator()
+    new.frequency = frequency
+    new.velocity = 100.
+    new.set_spawner(spawner())
+    new.set_random(np.random.default_rng(seed))
+    return new
+
+
+class TestSpawner(unittest.TestCase):
+    def test_generate_many(self):
+        p, v = spawner().generate_many(150., 1000, np.random.default_rng(0))
+        self.assertEqual(p.shape, (1000, 2))
+        self.assertEqual(v.shape, (1000, 2))
+        np.testing.assert_allclose(np.hypot(p[:, 0], p[:, 1]), 2000.)
+        angles = np.degrees(np.arctan2(p[:, 1], p[:, 0]))
+        self.assertTrue(np.all((angles >= 30.) & (angles <= 150.)))
+        np.testing.assert_allclose(np.hypot(v[:, 0], v[:, 1]), 150.)
+        # Every missile flies to a ground target within the target radius
+        ground_x = p[:, 0] - p[:, 1] * v[:, 0] / v[:, 1]
+        self.assertTrue(np.all(np.abs(ground_x) <= 100. + 1e-6))
+
+    def test_seeded(self):
+        first = spawner().generate_many(150., 10, np.random.default_rng(1))
+        second = spawner().generate_many(150., 10, np.random.default_rng(1))
+        for a, b in zip(first, second):
+            self.assertTrue(np.array_equal(a, b))
+
+
+class TestArrivals(unittest.TestCase):
+    def test_launch_rate(self):
+        missile_generator = generator(frequency=2.)
+        launched = sum(missile_generator.launch_count(1 / 30) for _ in range(30 * 2000))
+        # Poisson process, the standard deviation of the count is sqrt(4000)
+        self.assertLess(abs(launched - 4000), 5 * np.sqrt(4000))
+
+    def test_independent_of_block_size(self):
+        counts = []
+        for block in (3, 256):
+            missile_generator = generator(frequency=5.)
+            missile_generator.ARRIVAL_BLOCK = block
+            counts.append([missile_generator.launch_count(1 / 30) for _ in range(300)])
+        self.assertEqual(counts[0], counts[1])
+
+    def test_no_frequency(self):
+        missile_generator = generator(frequency=0.)
+        self.assertEqual(sum(missile_generator.launch_count(1 / 30) for _ in range(100)), 0)
+
+    def test_update(self):
+        missile_generator = generator(frequency=3.)
+        missiles = [missile for _ in range(300) for missile in missile_generator.update(1 / 30)]
+        self.assertGreater(len(missiles), 0)
+        self.assertTrue(all(abs(missile.v.get_norm() - 100.) < 1e-9 for missile in missiles))
+
+    def test_generators_have_independent_streams(self):
+        """Adding a generator to a scenario doesn't change the missiles of the others"""
+        json_data = scenario()
+        missiles = []
+        generators = []
+        for extra in (False, True):
+            if extra:
+                json_data["boost missile 2"] = dict(json_data["boost missile 1"])
+            simulation = load_simulation(JSONLoader.from_dict(json_data), seed=3)
+            generators.append(simulation.missile_generators)
+            missiles.append([(missile.p.x, missile.p.y, missile.v.x, missile.v.y)
+                             for _ in range(300) for missile in simulation.missile_generators[0].update(1 / 30)])
+        self.assertEqual(len(generators[1]), len(generators[0]) + 1)
+        self.assertIsInstance(generators[1][-1], BoostMissileGenerator)
+        self.assertEqual(missiles[0], missiles[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import sys
+import os
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.missiles import DefaultMissile  # noqa: E402
+from src.tracker import Tracker  # noqa: E402
+from src.util import Vector  # noqa: E402
+
+
+class TestTrackerRate(unittest.TestCase):
+    def launch_at(self, tracker: Tracker, time: float):
+        tracker.set_frame(int(round(time * 30)), time)
+        tracker.register_missile_launch(DefaultMissile(Vector(), Vector()))
+
+    def test_event_at_end_time_is_counted(self):
+        tracker = Tracker()
+        for time in (1 / 30, 1., 2.):
+            self.launch_at(tracker, time)
+        self.assertEqual(tracker.rate(Tracker.LAUNCH).tolist(), [1, 1, 1])
+        self.assertEqual(tracker.rate(Tracker.LAUNCH, end_time=2.).tolist(), [1, 1, 1])
+
+    def test_events_after_end_time_are_not_counted(self):
+        tracker = Tracker()
+        for time in (0.5, 1.5, 2.5):
+            self.launch_at(tracker, time)
+        self.assertEqual(tracker.rate(Tracker.LAUNCH, end_time=1.5).tolist(), [1, 1])
+
+    def test_rate_sums_to_event_count(self):
+        tracker = Tracker()
+        times = [frame / 30 for frame in range(1, 1501, 7)] + [50.]
+        for time in times:
+            self.launch_at(tracker, time)
+        self.assertEqual(int(tracker.rate(Tracker.LAUNCH, interval=1.).sum()), len(times))
+
+    def test_empty(self):
+        self.assertEqual(Tracker().rate(Tracker.LAUNCH).tolist(), [0])
+
+
+class TestTrackerEvents(unittest.TestCase):
+    def test_columns_grow(self):
+        for capacity in (0, 1, 3):
+            with self.subTest(capacity=capacity):
+                tracker = Tracker(capacity=capacity)
+                missiles = [DefaultMissile(Vector(float(x), 0.), Vector()) for x in range(10)]
+                for missile in missiles:
+                    tracker.register_missile_launch(missile)
+                self.assertEqual(tracker.size, 10)
+                self.assertEqual(tracker.events(Tracker.LAUNCH)["x"].tolist(), [missile.p.x for missile in missiles])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import sys
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.frame_state import FrameState  # noqa: E402
+from src.json_loader import JSONLoader  # noqa: E402
+from src.scenario import load_simulation  # noqa: E402
+from src.trajectory import Trajectory, TrajectoryWriter  # noqa: E402
+from scenarios import scenario  # noqa: E402
+
+MISSILE = ("DefaultMissile", "Circle", (255, 0, 0), 5)
+BULLET = ("BulletProjectile", "Square", (0, 0, 0), 3)
+
+
+def state(ids, x, styles, style_codes=None):
+    style_codes = np.zeros(len(ids), dtype=np.int64) if style_codes is None else np.array(style_codes)
+    return FrameState(np.array(ids, dtype=np.int64), style_codes, np.array(x, dtype=float),
+                      np.array(x, dtype=float) + 100., styles)
+
+
+class TestTrajectory(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_round_trip(self):
+        writer = TrajectoryWriter(self.directory.name, frame_rate=10., metadata={"note": "test"})
+        writer.write_frame(state([1, 2], [0., 10.], [MISSILE]))
+        # The styles of a state are mapped onto the type table of the file
+        writer.write_frame(state([2, 3], [11., 20.], [BULLET, MISSILE], [1, 0]))
+        writer.write_frame(state([], [], []))
+        writer.close()
+
+        trajectory = Trajectory(self.directory.name)
+        self.assertEqual(len(trajectory), 3)
+        self.assertEqual(trajectory.frame_rate, 10.)
+        self.assertEqual(trajectory.meta["note"], "test")
+        self.assertEqual(trajectory.styles, [MISSILE, BULLET])
+
+        frame = trajectory.frame(1)
+        self.assertEqual(frame.ids.tolist(), [2, 3])
+        self.assertEqual([frame.styles[code] for code in frame.style_codes], [MISSILE, BULLET])
+        self.assertEqual(frame.x.tolist(), [11., 20.])
+        self.assertEqual(frame.y.tolist(), [111., 120.])
+        # Entity 1 disappeared in frame 1, it has a last row that only shows without alive_only
+        self.assertEqual(trajectory.frame(1, alive_only=False).ids.tolist(), [2, 3, 1])
+        self.assertEqual(len(trajectory.frame(2)), 0)
+        self.assertEqual(trajectory.frame(2, alive_only=False).ids.tolist(), [2, 3])
+
+    def test_frame_index(self):
+        writer = TrajectoryWriter(self.directory.name, frame_rate=10.)
+        for _ in range(5):
+            writer.write_frame(state([1], [0.], [MISSILE]))
+        writer.close()
+        trajectory = Trajectory(self.directory.name)
+        self.assertEqual(trajectory.frame_index(0.1), 0)
+        self.assertEqual(trajectory.frame_index(0.3), 2)
+        self.assertEqual(trajectory.frame_index(0.), 0)
+        self.assertEqual(trajectory.frame_index(10.), 4)
+
+    def test_empty(self):
+        TrajectoryWriter(self.directory.name, frame_rate=10.).close()
+        self.assertEqual(len(Trajectory(self.directory.name)), 0)
+
+    def test_missing(self):
+        with self.assertRaises(FileNotFoundError):
+            Trajectory(os.path.join(self.directory.name, "missing"))
+
+    def test_record_simulation(self):
+        json_data = scenario(time=5.)
+        recorder = TrajectoryWriter(self.directory.name, json_data["simulation settings"]["frame rate(hz)"])
+        simulation = load_simulation(JSONLoader.from_dict(json_data), recorder=recorder, seed=0)
+        simulation.run(5., verbose=False)
+        recorder.close()
+
+        trajectory = Trajectory(self.directory.name)
+        self.assertEqual(len(trajectory), round(5. * simulation.simulation_settings.frame_rate))
+        expected = simulation.frame_state()
+        frame = trajectory.frame(len(trajectory) - 1)
+        self.assertEqual(frame.ids.tolist(), expected.ids.tolist())
+        self.assertEqual([frame.styles[code] for code in frame.style_codes],
+                         [expected.styles[code] for code in expected.style_codes])
+        # Positions are stored as float32
+        np.testing.assert_allclose(frame.x, expected.x, rtol=1e-6, atol=1e-3)
+        np.testing.assert_allclose(frame.y, expected.y, rtol=1e-6, atol=1e-3)
+
+
+if __name__ == '__main__':
+    unittest.main()
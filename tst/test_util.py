@@ -0,0 +1,153 @@
+import sys
+import os
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.util import closest_approach, closest_approach_many, ground_impact_x  # noqa: E402
+from src.util import intercept, intercept_many, Vector  # noqa: E402
+
+
+class TestVector(unittest.TestCase):
+    def test_operators_return_new_vectors(self):
+        a = Vector(1., 2.)
+        b = Vector(3., -1.)
+        for result, expected in ((a + b, (4., 1.)), (a - b, (-2., 3.)), (a * 2, (2., 4.)), (2 * a, (2., 4.))):
+            self.assertEqual((result.x, result.y), expected)
+            self.assertIsNot(result, a)
+        self.assertEqual((a.x, a.y), (1., 2.))
+
+    def test_in_place_operators(self):
+        a = Vector(1., 2.)
+        original = a
+        a += Vector(1., 1.)
+        a -= Vector(0., 2.)
+        a *= 3
+        self.assertIs(a, original)
+        self.assertEqual((a.x, a.y), (6., 3.))
+        a.add_scaled(Vector(1., -1.), 0.5)
+        self.assertEqual((a.x, a.y), (6.5, 2.5))
+
+    def test_copy(self):
+        a = Vector(1., 2.)
+        b = a.copy()
+        b += Vector(1., 1.)
+        self.assertEqual((a.x, a.y), (1., 2.))
+
+    def test_normalize(self):
+        a = Vector(3., 4.)
+        self.assertEqual(a.get_norm(), 5.)
+        a.normalize(10.)
+        self.assertAlmostEqual(a.x, 6.)
+        self.assertAlmostEqual(a.y, 8.)
+        zero = Vector()
+        zero.normalize()
+        self.assertEqual((zero.x, zero.y), (0, 0))
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            Vector().z = 1.
+
+
+class TestIntercept(unittest.TestCase):
+    def assert_same_as_many(self, target_p, target_v, intercept_p, speed):
+        velocity = intercept(Vector(*target_p), Vector(*target_v), Vector(*intercept_p), speed)
+        velocities, feasible, _ = intercept_many([target_p], [target_v], [intercept_p], speed)
+        self.assertEqual(velocity is not None, bool(feasible[0]))
+        if velocity is not None:
+            np.testing.assert_allclose([velocity.x, velocity.y], velocities[0], rtol=1e-12, atol=1e-12)
+
+    def test_equal_to_intercept_many(self):
+        rng = np.random.default_rng(0)
+        for _ in range(2000):
+            self.assert_same_as_many(rng.uniform(-800, 800, 2), rng.uniform(-120, 120, 2),
+                                     (rng.uniform(-200, 200), 0.), rng.uniform(20, 120))
+
+    def test_solution_meets_target(self):
+        target_p, target_v, intercept_p = Vector(300., 400.), Vector(-10., -50.), Vector(20., 0.)
+        velocity = intercept(target_p, target_v, intercept_p, 90.)
+        self.assertAlmostEqual(velocity.get_norm(), 90.)
+        # Time at which the projectile covered the distance to the target along the solution
+        d = Vector(target_p.x - intercept_p.x, target_p.y - intercept_p.y)
+        time = d.x / (velocity.x - target_v.x)
+        self.assertAlmostEqual(d.y / (velocity.y - target_v.y), time)
+
+    def test_faster_target_moving_away(self):
+        self.assertIsNone(intercept(Vector(0., 100.), Vector(0., 100.), Vector(), 50.))
+        self.assert_same_as_many((0., 100.), (0., 100.), (0., 0.), 50.)
+
+    def test_target_as_fast_as_projectile(self):
+        # The quadratic degenerates to a linear equation
+        self.assert_same_as_many((0., 100.), (0., -50.), (0., 0.), 50.)
+        self.assertIsNone(intercept(Vector(0., 100.), Vector(0., 50.), Vector(), 50.))
+        self.assert_same_as_many((0., 100.), (0., 50.), (0., 0.), 50.)
+
+    def test_target_at_same_height(self):
+        # The previous solver divided by the height difference
+        velocity = intercept(Vector(100., 0.), Vector(), Vector(), 50.)
+        self.assertAlmostEqual(velocity.x, 50.)
+        self.assertAlmostEqual(velocity.y, 0.)
+
+    def test_zero_speed(self):
+        self.assertIsNone(intercept(Vector(0., 100.), Vector(0., -50.), Vector(), 0.))
+        self.assert_same_as_many((0., 100.), (0., -50.), (0., 0.), 0.)
+
+
+class TestClosestApproach(unittest.TestCase):
+    def assert_same_as_many(self, relative_p, relative_v, delta_time):
+        time, distance = closest_approach(Vector(*relative_p), Vector(*relative_v), delta_time)
+        times, distances = closest_approach_many([relative_p], [relative_v], delta_time)
+        self.assertAlmostEqual(time, times[0])
+        self.assertAlmostEqual(distance, distances[0])
+        return time, distance
+
+    def test_closest_within_step(self):
+        time, distance = self.assert_same_as_many((-10., 3.), (100., 0.), 1.)
+        self.assertAlmostEqual(time, 0.1)
+        self.assertAlmostEqual(distance, 3.)
+
+    def test_passes_through(self):
+        # A step much longer than the distance still finds the hit the end positions miss
+        time, distance = self.assert_same_as_many((-10., 0.), (100., 0.), 1.)
+        self.assertAlmostEqual(time, 0.1)
+        self.assertAlmostEqual(distance, 0.)
+
+    def test_closest_after_step(self):
+        time, distance = self.assert_same_as_many((-10., 3.), (1., 0.), 1.)
+        self.assertEqual(time, 1.)
+        self.assertAlmostEqual(distance, np.hypot(9., 3.))
+
+    def test_moving_apart(self):
+        time, distance = self.assert_same_as_many((10., 3.), (1., 0.), 1.)
+        self.assertEqual(time, 0.)
+        self.assertAlmostEqual(distance, np.hypot(10., 3.))
+
+    def test_no_relative_motion(self):
+        time, distance = self.assert_same_as_many((3., 4.), (0., 0.), 1.)
+        self.assertEqual(time, 0.)
+        self.assertAlmostEqual(distance, 5.)
+
+    def test_zero_step(self):
+        time, distance = self.assert_same_as_many((-10., 3.), (100., 0.), 0.)
+        self.assertEqual(time, 0.)
+        self.assertAlmostEqual(distance, np.hypot(10., 3.))
+
+    def test_step_per_pair(self):
+        times, distances = closest_approach_many([(-10., 0.), (-10., 0.)], [(100., 0.), (100., 0.)],
+                                                 np.array([0.05, 1.]))
+        np.testing.assert_allclose(times, [0.05, 0.1])
+        np.testing.assert_allclose(distances, [5., 0.], atol=1e-12)
+
+
+class TestGroundImpact(unittest.TestCase):
+    def test_crossing(self):
+        self.assertAlmostEqual(ground_impact_x(Vector(10., -5.), Vector(10., -10.)), 5.)
+
+    def test_vertical(self):
+        self.assertAlmostEqual(ground_impact_x(Vector(10., -5.), Vector(0., -10.)), 10.)
+
+
+if __name__ == '__main__':
+    unittest.main()
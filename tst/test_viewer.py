@@ -0,0 +1,211 @@
+import sys
+import os
+import tempfile
+import unittest
+
+import cv2
+import imageio
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.defences import BulletDefence, BulletProjectile  # noqa: E402
+from src.drawable import Circle  # noqa: E402
+from src.frame_state import FrameState  # noqa: E402
+from src.json_loader import JSONLoader  # noqa: E402
+from src.missiles import DefaultMissile  # noqa: E402
+from src.scenario import load_simulation  # noqa: E402
+from src.util import Vector  # noqa: E402
+from src.viewer import FrameWriter, Viewer  # noqa: E402
+from src.viewer_settings import ViewerSettings  # noqa: E402
+from scenarios import scenario  # noqa: E402
+
+MISSILE = ("DefaultMissile", "Circle", (255, 0, 0), 5)
+
+
+def viewer_settings(**settings) -> ViewerSettings:
+    return ViewerSettings.load_from_json({"pixels x": 64, "pixels y": 48, **settings})
+
+
+def states(count: int):
+    """States with a single missile moving to the right"""
+    return [FrameState(np.array([1]), np.array([0]), np.array([-20. + 2 * i]), np.array([10.]), [MISSILE])
+            for i in range(count)]
+
+
+class TestFrameWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_formats(self):
+        frames = [np.full((48, 64, 3), 20 * i, np.uint8) for i in range(5)]
+        for suffix in ('.gif', '.avi'):
+            with self.subTest(suffix=suffix):
+                file_name = os.path.join(self.directory.name, "out" + suffix)
+                writer = FrameWriter(file_name, 10., 64, 48)
+                for frame in frames:
+                    writer.write(frame)
+                writer.close()
+                if suffix == '.avi':
+                    capture = cv2.VideoCapture(file_name)
+                    count = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+                    capture.release()
+                else:
+                    count = len(imageio.mimread(file_name))
+                self.assertEqual(count, len(frames))
+
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_stream_keeps_no_frames(self):
+        file_name = os.path.join(self.directory.name, "stream.gif")
+        viewer = Viewer(viewer_settings())
+        viewer.open_stream(file_name)
+        viewer.plan(10., 8)
+        for state in states(8):
+            viewer.draw_state(state)
+        self.assertEqual(viewer.frames, [])
+        viewer.close_stream()
+        self.assertIsNone(viewer.stream)
+
+        streamed = imageio.mimread(file_name)
+        self.assertEqual(len(streamed), 8)
+        # The frames are the same as those kept in memory without a stream
+        in_memory = Viewer(viewer_settings())
+        for state in states(8):
+            in_memory.draw_state(state)
+        for streamed_frame, frame in zip(streamed, in_memory.frames):
+            self.assertTrue(np.array_equal(np.asarray(streamed_frame)[..., :3], frame))
+
+
+class TestFramePlan(unittest.TestCase):
+    def test_output_frame_rate(self):
+        viewer = Viewer(viewer_settings(**{"frame rate (hz)": 10}))
+        viewer.open_stream("out.avi")
+        viewer.plan(60., 600)
+        self.assertEqual(viewer.render_stride, 6)
+        self.assertEqual(viewer.output_frame_rate, 10.)
+        self.assertEqual([index for index in range(20) if viewer.wants_frame(index)], [0, 6, 12, 18])
+
+    def test_max_frames(self):
+        viewer = Viewer(viewer_settings(**{"max frames": 50}))
+        viewer.open_stream("out.avi")
+        viewer.plan(30., 300)
+        self.assertEqual(viewer.render_stride, 6)
+        self.assertEqual(len([index for index in range(300) if viewer.wants_frame(index)]), 50)
+
+    def test_gif_frames_cap(self):
+        for settings in ({}, {"max frames": 1000}):
+            with self.subTest(**{key.replace(" ", "_"): value for key, value in settings.items()}):
+                viewer = Viewer(viewer_settings(**settings))
+                viewer.plan(30., 3000)
+                self.assertEqual(len([index for index in range(3000) if viewer.wants_frame(index)]),
+                                 Viewer.GIF_FRAMES_CAP)
+
+    def test_video_draws_every_frame(self):
+        viewer = Viewer(viewer_settings())
+        viewer.open_stream("out.avi")
+        viewer.plan(30., 3000)
+        self.assertEqual(viewer.render_stride, 1)
+
+    def test_frame_rate_spellings(self):
+        self.assertEqual(viewer_settings(**{"frame rate (hz)": 12}).frame_rate, 12)
+        self.assertEqual(viewer_settings(**{"frame rate(hz)": 12}).frame_rate, 12)
+        self.assertIsNone(viewer_settings().frame_rate)
+
+    def test_simulation_draws_planned_frames(self):
+        json_data = scenario(time=4.)
+        json_data["viewer settings"].update({"pixels x": 64, "pixels y": 48, "frame rate (hz)": 5})
+        loader = JSONLoader.from_dict(json_data)
+        viewer = Viewer(loader.load_viewer_settings())
+        simulation = load_simulation(loader, viewer, seed=0)
+        simulation.run(4., verbose=False)
+        frames = int(4. * simulation.simulation_settings.frame_rate)
+        self.assertEqual(len(viewer.frames), len(range(0, frames, viewer.render_stride)))
+        self.assertEqual(viewer.output_frame_rate, 5.)
+
+
+def flipped_frame(settings: ViewerSettings, drawables) -> np.ndarray:
+    """A frame drawn the way the viewer did before the cached background: in world orientation, then flipped"""
+    img = np.zeros((settings.pixels_y, settings.pixels_x, 3), np.uint8)
+    cv2.rectangle(img, (0, 0), (settings.pixels_x, settings.pixels_y), color=(135, 206, 250), thickness=-1)
+    cv2.rectangle(img, (0, 0), (settings.pixels_x, Viewer.GROUND_PIXEL_HEIGHT), color=(52, 140, 49), thickness=-1)
+    for drawable in drawables:
+        x = drawable.p.x + int(settings.pixels_x / 2)
+        y = drawable.p.y + Viewer.GROUND_PIXEL_HEIGHT
+        if drawable.shape is Circle:
+            cv2.circle(img, (int(x), int(y)), drawable.scale, drawable.rgb, -1)
+        else:
+            scale = int(drawable.scale)
+            corner = (int(x - drawable.scale / 2), int(y - drawable.scale / 2))
+            cv2.rectangle(img, corner, (corner[0] + scale, corner[1] + scale), drawable.rgb, -1)
+    return cv2.flip(img, 0)
+
+
+class TestBackground(unittest.TestCase):
+    def test_same_as_flipped_frame(self):
+        settings = viewer_settings()
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            missiles = [DefaultMissile(Vector(x, y), Vector()) for x, y in rng.uniform((-30., 0.), (30., 40.), (3, 2))]
+            projectiles = [BulletProjectile(Vector(x, y), Vector(), 1., missiles[0])
+                           for x, y in rng.uniform((-30., 0.), (30., 40.), (3, 2))]
+            defence = BulletDefence()
+            defence.p = Vector(float(rng.integers(-30, 30)), 0.)
+            viewer = Viewer(settings)
+            viewer.draw_frame(missiles, projectiles, [defence])
+            expected = flipped_frame(settings, missiles + projectiles + [defence])
+            self.assertTrue(np.array_equal(viewer.frames[0], expected))
+
+    def test_buffer_is_reused(self):
+        viewer = Viewer(viewer_settings())
+        created = []
+        create_background = viewer._create_background
+        viewer._create_background = lambda: created.append(1) or create_background()
+        for state in states(3):
+            viewer.draw_state(state)
+        self.assertEqual(len(created), 1)
+        # Every output frame is its own copy of the buffer
+        self.assertFalse(any(np.shares_memory(frame, viewer._buffer) for frame in viewer.frames))
+        self.assertFalse(np.array_equal(viewer.frames[0], viewer.frames[2]))
+
+
+class TestRenderThreads(unittest.TestCase):
+    def test_same_frames_in_order(self):
+        expected = Viewer(viewer_settings())
+        for state in states(20):
+            expected.draw_state(state)
+        for threads in (1, 2, 4):
+            with self.subTest(threads=threads):
+                viewer = Viewer(viewer_settings(**{"render threads": threads}))
+                self.assertTrue(viewer.draws_states())
+                for state in states(20):
+                    viewer.draw_state(state)
+                    # Frames in flight are bounded
+                    self.assertLessEqual(len(viewer._pending), 2 * threads)
+                viewer.flush()
+                self.assertEqual(len(viewer.frames), len(expected.frames))
+                for frame, expected_frame in zip(viewer.frames, expected.frames):
+                    self.assertTrue(np.array_equal(frame, expected_frame))
+
+    def test_simulation_frames(self):
+        """Frames rasterized from frame states equal frames drawn from the world objects"""
+        json_data = scenario(time=3.)
+        frames = []
+        for viewer_node in ({}, {"render threads": 2}):
+            json_data["viewer settings"] = {"pixels x": 800, "pixels y": 600, **viewer_node}
+            loader = JSONLoader.from_dict(json_data)
+            viewer = Viewer(loader.load_viewer_settings())
+            load_simulation(loader, viewer, seed=0).run(3., verbose=False)
+            frames.append(viewer.frames)
+        self.assertEqual(len(frames[0]), len(frames[1]))
+        for frame, threaded_frame in zip(*frames):
+            self.assertTrue(np.array_equal(frame, threaded_frame))
+
+
+if __name__ == '__main__':
+    unittest.main()